@@ -1,14 +1,24 @@
 """投标文件生成 API — 上传解析 + Qwen 生成标书框架，全链路打通。"""
 
-from fastapi import APIRouter, UploadFile, File
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi import APIRouter, UploadFile, File, Header, Query
+from pydantic import BaseModel, Field
 from typing import Optional
-import json, zipfile, io, re
-import xml.etree.ElementTree as ET
+import json
 
+from app.config import settings
+from app.core.documents.docx import extract_docx_text
 from app.core.llm import get_llm
+from app.core.llm.scheduler import Priority, set_llm_context
+from app.core.ner import get_detector
+from app.core.ner.masker import NERMasker
+from app.core.ner.demasker import NERDemasker
+from app.services.bidding_generator import Chapter, generate_chapters, generate_from_template
+from app.services.bidding_template import lines, load_template, render
+from app.services.parse_store import document_id, get_parse_store
+from app.services.tender_parser import parse_document, parse_json_response
+from app.utils.errors import NotFoundError
 from app.utils.logger import logger
+from app.utils.resumable import open_stream, parse_last_event_id, resume_stream
 
 router = APIRouter()
 
@@ -40,81 +50,94 @@ PARSE_SYSTEM_PROMPT = """你是一位专业的招标文件分析专家。给你
 - requirements 提取最关键的 3-5 条
 - disqualification_risks 提取可能导致投标被否决的条件"""
 
-
-def extract_text_from_docx(file_bytes: bytes) -> str:
-    """从 docx 文件字节中提取纯文本（不依赖 python-docx）"""
-    try:
-        with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
-            xml_content = zf.read("word/document.xml")
-        
-        root = ET.fromstring(xml_content)
-        ns = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-        
-        paragraphs = []
-        for p in root.findall('.//w:p', ns):
-            texts = [t.text for t in p.findall('.//w:t', ns) if t.text]
-            line = ''.join(texts).strip()
-            if line:
-                paragraphs.append(line)
-        
-        return '\n'.join(paragraphs)
-    except Exception as e:
-        logger.error(f"DOCX extraction error: {e}")
-        return ""
+# 解析结果存储键的一部分：修改上面的提示词或切窗/合并规则（tender_parser）时递增，旧结果随之失效
+PARSE_PROMPT_VERSION = "2"
 
 
 @router.post("/parse")
-async def parse_bidding_document(file: UploadFile = File(...)):
-    """上传招标文件 → AI 解析提取关键信息"""
+async def parse_bidding_document(
+    file: UploadFile = File(...),
+    mode: Optional[str] = Query(None, pattern="^(full|head)$"),
+    refresh: bool = False,
+):
+    """上传招标文件 → AI 解析提取关键信息（同一文件再次上传直接返回已存储的结果）"""
     
+    # 批量任务：让位于交互式对话
+    set_llm_context(Priority.BATCH)
     try:
         # 1. 读取文件内容
         file_bytes = await file.read()
         filename = file.filename or "unknown"
         logger.info(f"Parsing bidding document: {filename} ({len(file_bytes)} bytes)")
-        
-        # 2. 提取文本
-        if filename.endswith('.docx'):
-            text = extract_text_from_docx(file_bytes)
-        elif filename.endswith('.txt'):
-            text = file_bytes.decode('utf-8', errors='ignore')
-        else:
+        if not filename.endswith(('.docx', '.txt')):
             return {"success": False, "message": f"不支持的文件格式: {filename}，请上传 .docx 或 .txt 文件"}
+
+        # 2. 按文件内容（SHA-256）+ 提示词版本查找已存储的解析结果
+        mode = mode or settings.BIDDING_PARSE_MODE
+        version = f"{PARSE_PROMPT_VERSION}/{mode}"
+        store = get_parse_store()
+        doc_id = await document_id(file_bytes)
+        if store is not None and not refresh:
+            stored = await store.get_result(doc_id, version)
+            if stored is not None:
+                logger.info(f"Parse store hit: {filename} ({doc_id[:12]}, {mode} mode)")
+                return {"success": True, "data": {**stored, "filename": filename, "document_id": doc_id, "cached": True}}
+
+        # 3. 提取文本（已存储的文本直接复用）
+        document = await store.get_document(doc_id) if store is not None else None
+        if document is not None:
+            text = document.text
+        elif filename.endswith('.docx'):
+            # 流式解析（含表格、页眉页脚、脚注），在独立进程中运行，不阻塞事件循环
+            try:
+                text = await extract_docx_text(file_bytes)
+            except Exception as e:
+                logger.error(f"DOCX extraction error: {e}")
+                text = ""
+        else:
+            text = file_bytes.decode('utf-8', errors='ignore')
         
         if not text or len(text) < 50:
             return {"success": False, "message": "文件内容提取失败或内容过少"}
+        if store is not None and document is None:
+            await store.put_document(doc_id, filename, len(file_bytes), text)
         
-        # 截取前 8000 字符避免超出上下文限制
-        text_truncated = text[:8000]
-        logger.info(f"Extracted {len(text)} chars, using first {len(text_truncated)} for parsing")
-        
-        # 3. 调用 Qwen 解析
+        # 4. NER 脱敏后调用 LLM 解析
+        #    full：按章节切窗、并发解析全文后合并去重；head：仅解析前 8000 字符（单次调用）
+        source = text if mode == "full" else text[:settings.BIDDING_PARSE_WINDOW_CHARS]
+        logger.info(f"Extracted {len(text)} chars, parsing {len(source)} ({mode} mode)")
+        masked_text, mapping = await NERMasker(get_detector()).amask(source)
         llm = get_llm()
-        prompt = f"请分析以下招标文件内容，提取关键信息：\n\n{text_truncated}"
-        
-        response = await llm.generate(prompt, system=PARSE_SYSTEM_PROMPT)
-        
-        # 4. 尝试解析 JSON
-        try:
-            # 提取 JSON 块（处理可能包含 markdown 代码块的情况）
-            json_match = re.search(r'\{[\s\S]*\}', response)
-            if json_match:
-                parsed = json.loads(json_match.group())
-            else:
-                parsed = json.loads(response)
-        except json.JSONDecodeError:
-            logger.warning(f"JSON parse failed, returning raw: {response[:200]}")
-            parsed = {"raw_response": response, "parse_error": True}
+        demasker = NERDemasker()
+        restore = (lambda response: demasker.demask(response, mapping)) if mapping else None
+
+        if mode == "full":
+            parsed, coverage = await parse_document(llm, masked_text, PARSE_SYSTEM_PROMPT, restore=restore)
+        else:
+            prompt = f"请分析以下招标文件内容，提取关键信息：\n\n{masked_text}"
+            response = await llm.generate(prompt, system=PARSE_SYSTEM_PROMPT)
+            if restore:
+                response = restore(response)
+            coverage = {"windows": 1, "failed_windows": [], "coverage": round(len(source) / len(text), 4)}
+
+            # 5. 尝试解析 JSON（处理可能包含 markdown 代码块的情况）
+            try:
+                parsed = parse_json_response(response)
+            except json.JSONDecodeError:
+                logger.warning(f"JSON parse failed, returning raw: {response[:200]}")
+                parsed = {"raw_response": response, "parse_error": True}
         
-        return {
-            "success": True,
-            "data": {
-                "parsed": parsed,
-                "text_length": len(text),
-                "filename": filename,
-                "model": llm.get_model_name(),
-            }
+        data = {
+            "parsed": parsed,
+            "text_length": len(text),
+            "model": llm.get_model_name(),
+            "mode": mode,
+            "coverage": coverage,
         }
+        # 只存储完整的结果：解析失败或有窗口失败的下次重新解析
+        if store is not None and not parsed.get("parse_error") and not coverage["failed_windows"]:
+            await store.put_result(doc_id, version, data)
+        return {"success": True, "data": {**data, "filename": filename, "document_id": doc_id, "cached": False}}
         
     except Exception as e:
         logger.error(f"Parse error: {e}")
@@ -161,6 +184,19 @@ BIDDING_SYSTEM_PROMPT = """你是一位资深的律所投标文书专家，专
 - 内容要充实饱满，每章不少于 3-5 个段落
 - 投标函中的承诺条款要完整、规范"""
 
+# 与上面「章节结构」一致；parallel 模式下每章一个并发流，按此顺序输出
+BIDDING_CHAPTERS = (
+    Chapter("一", "投标函", "致招标人的正式承诺函，包含投标报价、有效期、联系方式等"),
+    Chapter("二", "资格审查资料", "投标人基本情况表（Markdown 表格）"),
+    Chapter("三", "投标一览表", "服务内容/报价明细表（Markdown 表格）"),
+    Chapter("四", "企业信誉声明函", "无行贿/违法记录声明"),
+    Chapter("五", "非联合体投标及不转包承诺函", "独立投标声明"),
+    Chapter("六", "商务条款偏离表", "逐条列出\"无偏离\"（Markdown 表格）"),
+    Chapter("七", "法定代表人身份证明", "含姓名/性别/年龄/职务"),
+    Chapter("八", "法定代表人授权委托书", "如有委托代理人，含被授权人信息和权限范围"),
+)
+BIDDING_TITLE = "投标文件（商务分册）"
+
 
 class BiddingRequest(BaseModel):
     """投标文件生成请求"""
@@ -183,17 +219,43 @@ class BiddingRequest(BaseModel):
     parsed_requirements: Optional[str] = ""
     parsed_risks: Optional[str] = ""
     budget: Optional[str] = ""
+    document_id: Optional[str] = ""  # /parse 返回的 document_id：上面三项留空时从已存储的解析结果补全
+    mode: Optional[str] = Field(None, pattern="^(template|parallel|single)$")  # 留空按 BIDDING_GENERATE_MODE
     stream: bool = True
 
 
+def _joined(value) -> str:
+    """解析结果中的列表字段 → 与请求字段一致的多行文本"""
+    return "\n".join(value) if isinstance(value, list) else str(value or "")
+
+
+async def _fill_from_parse_store(req: BiddingRequest):
+    """用已存储的解析结果补全未填写的招标要求 / 否决条件 / 预算（不重新提取、不重新解析）"""
+    if not req.document_id:
+        return
+    store = get_parse_store()
+    if store is None:
+        return
+    # 任一模式、但只取当前提示词版本的结果：旧版本的解析结果不再使用
+    stored = await store.get_result(req.document_id, f"{PARSE_PROMPT_VERSION}/", prefix=True)
+    if stored is None:
+        logger.warning(f"No stored parse result for document {req.document_id[:12]}")
+        return
+    parsed = stored.get("parsed", {})
+    req.parsed_requirements = req.parsed_requirements or _joined(parsed.get("requirements"))
+    req.parsed_risks = req.parsed_risks or _joined(parsed.get("disqualification_risks"))
+    if not req.budget and parsed.get("budget") not in (None, "未明确"):
+        req.budget = parsed["budget"]
+
+
 @router.post("/generate")
 async def generate_bidding_document(req: BiddingRequest):
     """生成投标文件框架 — SSE 流式输出"""
+    set_llm_context(Priority.BATCH)
+    await _fill_from_parse_store(req)
 
-    # 构建 prompt
-    user_prompt = f"""请根据以下信息，生成完整的投标文件框架（商务分册）：
-
-## 投标基本信息
+    # 构建 prompt（投标信息 + 解析出的要求，两种模式共用）
+    context = f"""## 投标基本信息
 
 - **投标人名称**：{req.company_name}
 - **法定代表人**：{req.legal_representative}
@@ -214,32 +276,74 @@ async def generate_bidding_document(req: BiddingRequest):
 
     # 如果有从招标文件中解析出的要求，加入 prompt
     if req.parsed_requirements:
-        user_prompt += f"\n\n## 招标文件关键要求\n\n{req.parsed_requirements}"
+        context += f"\n\n## 招标文件关键要求\n\n{req.parsed_requirements}"
     
     if req.parsed_risks:
-        user_prompt += f"\n\n## 否决条件（务必在投标文件中避免）\n\n{req.parsed_risks}"
-
-    user_prompt += "\n\n请按照标准格式生成完整的投标文件框架，已知信息直接填入，未知信息用【待填写】标注。"
+        context += f"\n\n## 否决条件（务必在投标文件中避免）\n\n{req.parsed_risks}"
 
     try:
         llm = get_llm()
-        logger.info(f"Bidding generation: {req.company_name} → {req.project_name}")
-
-        if req.stream:
-            async def event_generator():
-                try:
-                    async for chunk in llm.stream(user_prompt, system=BIDDING_SYSTEM_PROMPT):
-                        yield f"data: {json.dumps({'content': chunk, 'done': False}, ensure_ascii=False)}\n\n"
-                    yield f"data: {json.dumps({'content': '', 'done': True}, ensure_ascii=False)}\n\n"
-                except Exception as e:
-                    logger.error(f"Bidding stream error: {e}")
-                    yield f"data: {json.dumps({'content': f'[生成错误] {str(e)}', 'done': True}, ensure_ascii=False)}\n\n"
-
-            return StreamingResponse(event_generator(), media_type="text/event-stream")
+        mode = req.mode or settings.BIDDING_GENERATE_MODE
+        logger.info(f"Bidding generation: {req.company_name} → {req.project_name} ({mode} mode)")
+
+        if mode == "template":
+            try:
+                template = load_template()
+            except (OSError, ValueError) as e:
+                logger.warning(f"Bidding template unavailable, generating chapters instead: {e}")
+                mode = "parallel"
+
+        if mode == "template":
+            # 模板预填：固定文本和表格由请求字段直接渲染、立即输出，只有自由文本段落调用模型（并发、按顺序输出）
+            requirements, risks = lines(req.parsed_requirements), lines(req.parsed_risks)
+            rendered = render(template, {
+                **req.model_dump(),
+                "requirements": requirements,
+                "risks": risks,
+                "has_requirements": bool(requirements or risks),
+                "has_risks": bool(risks),
+            })
+            chunks = generate_from_template(
+                llm,
+                BIDDING_SYSTEM_PROMPT,
+                f"请根据以下信息撰写{BIDDING_TITLE}中的指定部分，已知信息直接填入，未知信息用【待填写】标注：\n\n{context}",
+                rendered,
+            )
+            if req.stream:
+                return open_stream(chunks, error_prefix="[生成错误]").response()
+            response = "".join([chunk async for chunk in chunks])
+        elif mode == "parallel":
+            # 各章节并发生成（共享系统提示词 + 投标信息前缀），按章节顺序输出，单章失败单独重试
+            chunks = generate_chapters(
+                llm,
+                BIDDING_SYSTEM_PROMPT,
+                f"请根据以下信息，撰写{BIDDING_TITLE}中的指定章节，已知信息直接填入，未知信息用【待填写】标注：\n\n{context}",
+                BIDDING_CHAPTERS,
+                title=BIDDING_TITLE,
+            )
+            if req.stream:
+                # 可续传：生成在后台进行，断线后凭 X-Stream-ID + Last-Event-ID 续接
+                return open_stream(chunks, error_prefix="[生成错误]").response()
+            response = "".join([chunk async for chunk in chunks])
         else:
+            user_prompt = (
+                f"请根据以下信息，生成完整的投标文件框架（商务分册）：\n\n{context}"
+                "\n\n请按照标准格式生成完整的投标文件框架，已知信息直接填入，未知信息用【待填写】标注。"
+            )
+            if req.stream:
+                return open_stream(llm.stream(user_prompt, system=BIDDING_SYSTEM_PROMPT), error_prefix="[生成错误]").response()
             response = await llm.generate(user_prompt, system=BIDDING_SYSTEM_PROMPT)
-            return {"success": True, "data": {"content": response, "model": llm.get_model_name()}}
+        return {"success": True, "data": {"content": response, "model": llm.get_model_name()}}
 
     except Exception as e:
         logger.error(f"Bidding generation error: {e}")
         return {"success": False, "message": str(e)}
+
+
+@router.get("/generate/{stream_id}")
+async def resume_bidding_document(stream_id: str, last_event_id: Optional[str] = Header(None)):
+    """断线续传：从 Last-Event-ID 之后的帧继续输出（生成未中断，不会重新调用模型）"""
+    stream = resume_stream(stream_id)
+    if stream is None:
+        raise NotFoundError("生成流不存在或已过期，请重新生成")
+    return stream.response(parse_last_event_id(last_event_id))
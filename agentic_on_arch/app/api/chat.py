@@ -1,15 +1,23 @@
 """Chat API with SSE streaming — connects to real LLM."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
 from fastapi.responses import StreamingResponse
 
+from app.config import settings
 from app.schemas.chat import ChatRequest
 from app.core.llm import get_llm
+from app.core.llm.scheduler import Priority, set_llm_context
+from app.core.ner import get_detector
 from app.core.ner.masker import NERMasker
 from app.core.ner.demasker import NERDemasker
+from app.core.ner.mapping_store import mapping_store
+from app.services.auth_service import token_user_id
+from app.services.chat_history import discard_conversation, persist_turn, start_conversation
 from app.utils.response import ok
 from app.utils.logger import logger
-import json
+from app.utils.sse import SSE_HEADERS, sse_stream
+from app.utils.tokens import estimate_tokens
+from typing import Optional
 import traceback
 
 router = APIRouter()
@@ -31,49 +39,108 @@ SYSTEM_PROMPT = """你是一家顶级律师事务所的 AI 法律助手，名称
 - 用中文回答"""
 
 
+async def _mask_message(message: str, owner_id: Optional[int], conversation_id: Optional[int]):
+    """Mask `message`, extending the stored mapping of (owner_id, conversation_id) when both are given."""
+    masker = NERMasker(get_detector())
+    if owner_id is None or conversation_id is None:
+        masked, mapping = await masker.amask(message)
+        return masked, mapping, len(mapping)
+    # Held from retrieve to store: concurrent turns must not give one [PER-n] to different people
+    async with mapping_store.lock(owner_id, conversation_id):
+        mapping = await mapping_store.retrieve(owner_id, conversation_id)
+        known = len(mapping) if mapping else 0
+        masked, mapping = await masker.amask(message, mapping)
+        if len(mapping) > known:
+            await mapping_store.store(owner_id, conversation_id, mapping)
+    return masked, mapping, len(mapping) - known
+
+
 @router.post("/completions")
-async def chat_completions(req: ChatRequest):
+async def chat_completions(req: ChatRequest, authorization: Optional[str] = Header(None)):
     """Chat endpoint — returns SSE stream or JSON."""
 
     try:
         # Step 1: NER de-identification
-        masker = NERMasker()
-        masked_message, mapping = masker.mask(req.message)
-        ner_count = len(mapping)
+        # Extend the conversation's mapping so placeholders stay stable across turns.
+        # Only for an authenticated caller, keyed by their id: conversation_id comes
+        # from the client, and another user's mapping would demask their placeholders.
+        owner_id = token_user_id(authorization)
+        user_id = owner_id or 1  # TODO: require JWT
+        set_llm_context(Priority.INTERACTIVE, user_id)
+        keep_mapping = owner_id is not None
+        masked_message, mapping, ner_count = await _mask_message(
+            req.message, owner_id, req.conversation_id if keep_mapping else None
+        )
         if ner_count > 0:
-            logger.info(f"NER masked: {ner_count} entities detected")
+            logger.info(f"NER masked: {ner_count} new entities detected ({len(mapping)} in conversation)")
 
         # Step 2: Get LLM
         llm = get_llm()
         logger.info(f"LLM provider: {llm.get_model_name()}")
 
+        # Step 3: Persistence — the conversation is checked (owner) or created while
+        # the LLM runs; messages are written behind the response (app.services.chat_history)
+        conversation = None
+        if settings.CHAT_PERSIST_ENABLED:
+            conversation = start_conversation(req.conversation_id, user_id, req.message[:30], req.agent_id)
+        prompt_tokens = estimate_tokens(masked_message)
+
         if req.stream:
             # SSE streaming response
-            async def event_generator():
+            done_fields = {}
+
+            async def restored_chunks():
+                # Stateful: holds back placeholders split across chunks
+                demasker = NERDemasker().streaming(mapping) if mapping else None
+                restored, output_tokens = [], 0
                 try:
-                    logger.info("SSE event_generator started")
-                    demasker = NERDemasker()
-                    chunk_count = 0
                     async for chunk in llm.stream(masked_message, system=SYSTEM_PROMPT):
+                        output_tokens += estimate_tokens(chunk)
                         # Re-identify entities in streamed chunks
-                        restored = demasker.demask(chunk, mapping) if mapping else chunk
-                        chunk_count += 1
-                        if chunk_count <= 3:
-                            logger.info(f"SSE chunk #{chunk_count}: [{restored[:30]}]")
-                        yield f"data: {json.dumps({'content': restored, 'done': False}, ensure_ascii=False)}\n\n"
-                    logger.info(f"SSE complete: {chunk_count} chunks total")
-                    yield f"data: {json.dumps({'content': '', 'done': True}, ensure_ascii=False)}\n\n"
-                except Exception as e:
-                    logger.error(f"Stream error: {traceback.format_exc()}")
-                    yield f"data: {json.dumps({'content': f'[错误] {str(e)}', 'done': True}, ensure_ascii=False)}\n\n"
-
-            return StreamingResponse(event_generator(), media_type="text/event-stream")
+                        restored.append(demasker.feed(chunk) if demasker else chunk)
+                        yield restored[-1]
+                    if demasker:
+                        restored.append(demasker.flush())
+                        yield restored[-1]
+                except BaseException:
+                    # LLM failed or client gone: nothing is persisted for this turn
+                    if conversation is not None:
+                        discard_conversation(conversation, req.conversation_id)
+                    raise
+                if conversation is not None:
+                    conversation_id = await persist_turn(
+                        conversation, req.message, "".join(restored), prompt_tokens, output_tokens,
+                        model=llm.get_model_name(),
+                    )
+                    done_fields["conversation_id"] = conversation_id
+                    # Keep placeholders stable in the new conversation's next turns
+                    if keep_mapping and mapping and conversation_id not in (None, req.conversation_id):
+                        await mapping_store.store(owner_id, conversation_id, mapping)
+
+            return StreamingResponse(
+                sse_stream(restored_chunks(), error_prefix="[错误]", done_fields=done_fields),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS,
+            )
         else:
             # Non-streaming response
-            response = await llm.generate(masked_message, system=SYSTEM_PROMPT)
+            try:
+                response = await llm.generate(masked_message, system=SYSTEM_PROMPT)
+            except Exception:
+                if conversation is not None:
+                    discard_conversation(conversation, req.conversation_id)
+                raise
             demasker = NERDemasker()
             restored = demasker.demask(response, mapping) if mapping else response
-            return ok(data={"content": restored, "model": llm.get_model_name()})
+            conversation_id = None
+            if conversation is not None:
+                conversation_id = await persist_turn(
+                    conversation, req.message, restored, prompt_tokens, estimate_tokens(response),
+                    model=llm.get_model_name(),
+                )
+                if keep_mapping and mapping and conversation_id not in (None, req.conversation_id):
+                    await mapping_store.store(owner_id, conversation_id, mapping)
+            return ok(data={"content": restored, "model": llm.get_model_name(), "conversation_id": conversation_id})
 
     except Exception as e:
         logger.error(f"Chat error: {traceback.format_exc()}")
@@ -4,9 +4,13 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
+from app.config import settings
+from app.core.rag.pipeline import RAGPipeline
 from app.dependencies import get_db
 from app.schemas.knowledge import KnowledgeBaseCreate, SearchRequest
-from app.models.knowledge import KnowledgeBase
+from app.models.knowledge import KnowledgeBase, Document, DocumentChunk
+from app.services.parse_store import get_parse_store
+from app.utils.errors import NotFoundError
 from app.utils.response import ok
 
 router = APIRouter()
@@ -29,6 +33,34 @@ async def create_knowledge_base(req: KnowledgeBaseCreate, db: AsyncSession = Dep
     return ok(data={"id": kb.id, "name": kb.name})
 
 
+@router.post("/{kb_id}/documents/parsed/{document_id}")
+async def import_parsed_document(kb_id: int, document_id: str, db: AsyncSession = Depends(get_db)):
+    """Add a tender uploaded to /api/bidding/parse, reusing its stored text (no re-extraction)."""
+    kb = await db.get(KnowledgeBase, kb_id)
+    if kb is None:
+        raise NotFoundError("知识库不存在")
+    store = get_parse_store()
+    stored = await store.get_document(document_id) if store is not None else None
+    if stored is None:
+        raise NotFoundError("解析记录不存在，请重新上传招标文件")
+
+    pipeline = RAGPipeline(kb.embedding_model, settings.CHUNK_SIZE, settings.CHUNK_OVERLAP, settings.TOP_K)
+    chunks = pipeline.chunk_text(stored.text)
+    embeddings = await pipeline.embed(chunks)
+    doc = Document(
+        knowledge_base_id=kb.id, title=stored.filename, file_type=stored.filename.rsplit(".", 1)[-1],
+        content=stored.text, chunk_count=len(chunks), metadata_={"sha256": document_id, "size": stored.size},
+    )
+    db.add(doc)
+    await db.flush()
+    db.add_all([
+        DocumentChunk(document_id=doc.id, chunk_index=i, content=chunk, embedding=embedding)
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+    ])
+    kb.doc_count = (kb.doc_count or 0) + 1
+    return ok(data={"id": doc.id, "title": doc.title, "chunk_count": len(chunks)})
+
+
 @router.post("/search")
 async def search(req: SearchRequest, db: AsyncSession = Depends(get_db)):
     """Semantic search within a knowledge base (pgvector)."""
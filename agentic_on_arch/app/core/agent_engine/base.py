@@ -3,6 +3,8 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List
 
+from app.core.agent_engine.context import ConversationContext
+
 
 class BaseAgent(ABC):
     """Base class for all agents."""
@@ -12,7 +14,8 @@ class BaseAgent(ABC):
         self.llm_provider = llm_provider
         self.system_prompt = system_prompt
         self.skills = skills or []
-        self.memory: List[Dict[str, str]] = []
+        # Token-budgeted history with background summarization of older turns
+        self.memory = ConversationContext(llm_provider)
 
     @abstractmethod
     async def run(self, user_input: str, context: Dict[str, Any] = None) -> str:
@@ -20,10 +23,10 @@ class BaseAgent(ABC):
         ...
 
     def add_to_memory(self, role: str, content: str):
-        self.memory.append({"role": role, "content": content})
+        self.memory.add(role, content)
 
     def get_memory(self) -> List[Dict[str, str]]:
-        return self.memory
+        return self.memory.get_messages()
 
     def clear_memory(self):
         self.memory.clear()
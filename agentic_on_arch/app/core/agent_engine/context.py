@@ -0,0 +1,156 @@
+"""Token-budgeted conversation context for agents.
+
+Keeps the prompt history of a long matter bounded without re-scanning it:
+
+- each message's token count (app.utils.tokens, CJK-aware) and rendered
+  line are computed once, when it is added; the running total is updated
+  incrementally
+- the prompt budget is per model (LLM_CONTEXT_BUDGETS, falling back to
+  LLM_CONTEXT_DEFAULT_BUDGET), minus the output reserve
+- once the uncompacted history passes AGENT_COMPACT_RATIO of the budget,
+  the oldest turns are folded into a running summary by a background LLM
+  call (batch priority); the summary is cached and replaces those turns
+- render() never waits for compaction: it takes the summary plus the newest
+  messages that fit, so a prompt stays within budget even while a summary
+  is still being written (or if summarization fails)
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.tokens import estimate_tokens
+
+Summarizer = Callable[[str, List[Dict[str, str]], int], Awaitable[str]]
+
+_MESSAGE_OVERHEAD = 4  # role label and separators per rendered message
+_RETRY_SECONDS = 30.0
+
+SUMMARY_SYSTEM_PROMPT = """你是律所 AI 助手的对话记录员。请把已有摘要与新增的对话合并为一份新的摘要，供后续对话作为上下文。
+要求：
+- 保留当事人、案件事实、关键日期与金额、已给出的法律意见和待办事项
+- 删除寒暄与重复内容，不要编造
+- 使用简洁的要点列表，中文输出"""
+
+
+def context_budget(provider: str) -> int:
+    """Prompt token budget for a provider (what the prompt may use, not the model maximum)."""
+    return settings.LLM_CONTEXT_BUDGETS.get(provider) or settings.LLM_CONTEXT_DEFAULT_BUDGET
+
+
+async def llm_summarizer(provider: str, summary: str, messages: List[Dict[str, str]], max_tokens: int) -> str:
+    """Fold `messages` into `summary` with one LLM call, at batch priority."""
+    from app.core.llm import get_llm
+    from app.core.llm.scheduler import Priority, set_llm_context
+
+    set_llm_context(Priority.BATCH)  # runs in its own task: does not change the caller's priority
+    dialogue = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = f"已有摘要：\n{summary or '（无）'}\n\n新增对话：\n{dialogue}\n\n请输出合并后的摘要，不超过 {max_tokens} 字。"
+    return (await get_llm(provider).generate(prompt, system=SUMMARY_SYSTEM_PROMPT)).strip()
+
+
+class ConversationContext:
+    def __init__(
+        self,
+        provider: str = "",
+        budget: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.provider = provider or settings.DEFAULT_LLM
+        self.budget = budget or context_budget(self.provider)
+        # History gets what is left after the output reserve
+        self.history_budget = max(256, self.budget - settings.LLM_EXPECTED_OUTPUT_TOKENS)
+        self.summarizer = summarizer or (lambda s, m, n: llm_summarizer(self.provider, s, m, n))
+        self._messages: deque = deque()  # (message dict, tokens, rendered line), oldest first
+        self._tokens = 0  # tokens of the messages not folded into the summary
+        self.summary = ""
+        self.summary_tokens = 0
+        self._compaction: Optional[asyncio.Task] = None
+        self._retry_at = 0.0  # after a failed summary, do not retry on every message
+
+    def add(self, role: str, content: str):
+        line = f"{role}: {content}"
+        tokens = estimate_tokens(content) + _MESSAGE_OVERHEAD
+        self._messages.append(({"role": role, "content": content}, tokens, line))
+        self._tokens += tokens
+        self._maybe_compact()
+
+    def get_messages(self) -> List[Dict[str, str]]:
+        """Messages not yet folded into the summary."""
+        return [m for m, _, _ in self._messages]
+
+    def clear(self):
+        if self._compaction is not None:
+            self._compaction.cancel()
+            self._compaction = None
+        self._messages.clear()
+        self._tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+
+    @property
+    def tokens(self) -> int:
+        """Tokens the full history would take: summary plus unfolded messages."""
+        return self.summary_tokens + self._tokens
+
+    def render(self, max_tokens: Optional[int] = None) -> Tuple[str, int]:
+        """History text within `max_tokens` (default: the history budget) and its token count."""
+        limit = self.history_budget if max_tokens is None else max_tokens
+        used = self.summary_tokens if self.summary_tokens <= limit else 0
+        lines = []
+        for _, tokens, line in reversed(self._messages):
+            if used + tokens > limit:
+                break
+            lines.append(line)
+            used += tokens
+        lines.reverse()
+        if self.summary and self.summary_tokens <= limit:
+            lines.insert(0, f"（此前对话摘要）\n{self.summary}")
+        return "\n".join(lines), used
+
+    # ── background compaction ──
+
+    def _maybe_compact(self):
+        if self._compaction is not None or self.tokens <= self.history_budget * settings.AGENT_COMPACT_RATIO:
+            return
+        if time.monotonic() < self._retry_at:
+            return
+        # Fold the oldest messages until the recent ones fit in the keep share
+        keep = self.history_budget * settings.AGENT_KEEP_RECENT_RATIO
+        remaining = self._tokens
+        count = 0
+        for _, tokens, _ in self._messages:
+            if remaining <= keep or count >= len(self._messages) - 1:
+                break
+            remaining -= tokens
+            count += 1
+        if count:
+            self._compaction = asyncio.ensure_future(self._compact(count))
+
+    async def _compact(self, count: int):
+        batch = [self._messages[i][0] for i in range(count)]
+        max_summary = max(64, int(self.history_budget * settings.AGENT_SUMMARY_RATIO))
+        try:
+            summary = await self.summarizer(self.summary, batch, max_summary)
+        except Exception as e:
+            logger.warning(f"Context compaction failed ({len(batch)} messages kept uncompacted): {e}")
+            self._retry_at = time.monotonic() + _RETRY_SECONDS
+            return
+        finally:
+            self._compaction = None
+        # Only appends happened meanwhile, so the folded messages are still the oldest
+        for _ in range(count):
+            _, tokens, _ = self._messages.popleft()
+            self._tokens -= tokens
+        self.summary = summary
+        self.summary_tokens = estimate_tokens(summary) + _MESSAGE_OVERHEAD
+        logger.debug(f"Compacted {count} messages into a {self.summary_tokens}-token summary")
+        self._maybe_compact()
+
+    async def wait_compaction(self):
+        """Wait for a running compaction (tests / benchmarks; prompts never need to)."""
+        while self._compaction is not None:
+            await asyncio.shield(self._compaction)
@@ -5,17 +5,19 @@ from app.core.agent_engine.base import BaseAgent
 from app.core.llm import get_llm
 from app.core.skills.registry import skill_registry
 from app.utils.logger import logger
+from app.utils.tokens import estimate_tokens
 
 
 class AgentExecutor(BaseAgent):
     """Default agent executor implementing ReAct-style loop."""
 
     async def run(self, user_input: str, context: Dict[str, Any] = None) -> str:
-        self.add_to_memory("user", user_input)
         llm = get_llm(self.llm_provider)
 
-        # Build prompt with context
+        # Build prompt with context (history before this turn), then record the
+        # turn so it is kept even if the LLM call fails
         prompt = self._build_prompt(user_input, context)
+        self.add_to_memory("user", user_input)
 
         # Call LLM
         response = await llm.generate(prompt, system=self.system_prompt)
@@ -26,6 +28,7 @@ class AgentExecutor(BaseAgent):
 
     def _build_prompt(self, user_input: str, context: Dict[str, Any] = None) -> str:
         parts = []
+        question = f"用户问题：{user_input}"
 
         # Add available skills info
         if self.skills:
@@ -36,10 +39,11 @@ class AgentExecutor(BaseAgent):
         if context:
             parts.append(f"上下文信息：\n{context}\n")
 
-        # Add conversation history
-        if len(self.memory) > 1:
-            history = "\n".join([f"{m['role']}: {m['content']}" for m in self.memory[:-1]])
+        # Add conversation history: whatever the model budget leaves after the rest
+        fixed = estimate_tokens(self.system_prompt) + estimate_tokens(question) + sum(estimate_tokens(p) for p in parts)
+        history, _ = self.memory.render(max(0, self.memory.history_budget - fixed))
+        if history:
             parts.append(f"对话历史：\n{history}\n")
 
-        parts.append(f"用户问题：{user_input}")
+        parts.append(question)
         return "\n".join(parts)
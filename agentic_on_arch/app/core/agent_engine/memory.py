@@ -3,23 +3,36 @@
 from typing import List, Dict
 from collections import deque
 
+from app.utils.tokens import estimate_tokens
+
 
 class AgentMemory:
-    """Sliding-window memory for agent conversations."""
+    """Sliding-window memory for agent conversations.
+
+    Token counts are computed once per message and kept as a running total.
+    For budget-bounded prompts with summaries see context.ConversationContext.
+    """
 
     def __init__(self, max_turns: int = 20):
         self.max_turns = max_turns
-        self._messages: deque = deque(maxlen=max_turns * 2)
+        self._messages: deque = deque()
+        self._tokens = 0
 
     def add(self, role: str, content: str):
-        self._messages.append({"role": role, "content": content})
+        tokens = estimate_tokens(content)
+        self._messages.append(({"role": role, "content": content}, tokens))
+        self._tokens += tokens
+        if len(self._messages) > self.max_turns * 2:
+            _, evicted = self._messages.popleft()
+            self._tokens -= evicted
 
     def get_messages(self) -> List[Dict[str, str]]:
-        return list(self._messages)
+        return [m for m, _ in self._messages]
 
     def clear(self):
         self._messages.clear()
+        self._tokens = 0
 
     def token_estimate(self) -> int:
-        """Rough token count estimate (Chinese ~ 1 char per token)."""
-        return sum(len(m["content"]) for m in self._messages)
+        """Estimated tokens of the window (CJK-aware, see app.utils.tokens); O(1)."""
+        return self._tokens
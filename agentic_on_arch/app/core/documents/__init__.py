@@ -0,0 +1 @@
+"""Document text extraction for uploaded tender files."""
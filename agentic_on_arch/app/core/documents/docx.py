@@ -0,0 +1,170 @@
+"""Streaming DOCX text extraction (no python-docx).
+
+iter_docx_blocks() walks the XML parts with ET.iterparse straight from the
+zip member stream and yields one Block per paragraph or table row, clearing
+parsed elements as it goes, so memory stays bounded by the largest single
+paragraph / table row rather than the size of document.xml.
+
+Covered parts, in output order: the body (paragraphs and tables), footnotes,
+endnotes, then headers and footers (their lines de-duplicated, since every
+section repeats them) — tender budgets and 否决条件 often sit in tables and
+footnotes.
+
+Parsing is CPU-bound and expat holds the GIL, so extract_docx_text() runs it
+in a small process pool (DOCX_EXTRACT_WORKERS; 0 = a worker thread) and the
+event loop stays responsive while a 40MB upload is parsed.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Union
+
+from app.config import settings
+from app.utils.logger import logger
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_P, _T, _TAB, _BR, _CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+_TR, _TC = _W + "tr", _W + "tc"
+_CONTAINERS = {_W + "body", _W + "hdr", _W + "ftr", _W + "footnotes", _W + "endnotes"}
+
+_PART_ORDER = (
+    (re.compile(r"word/document\.xml$"), "body"),
+    (re.compile(r"word/footnotes\.xml$"), "footnote"),
+    (re.compile(r"word/endnotes\.xml$"), "endnote"),
+    (re.compile(r"word/header\d*\.xml$"), "header"),
+    (re.compile(r"word/footer\d*\.xml$"), "footer"),
+)
+
+
+class Block(NamedTuple):
+    kind: str  # paragraph | table | footnote | endnote | header | footer
+    text: str  # a table row is its cells joined with " | "
+
+
+def _iter_part(stream: BinaryIO, kind: str) -> Iterator[Block]:
+    paragraph_kind, table_kind = ("paragraph", "table") if kind == "body" else (kind, kind)
+    paragraphs: List[List[str]] = []  # open paragraphs (text boxes nest them)
+    rows: List[List[str]] = []  # open table rows (nested tables)
+    cells: List[List[str]] = []  # open table cells
+    container = None
+    depth = 0
+    container_depth = -1
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            depth += 1
+            if tag == _P:
+                paragraphs.append([])
+            elif tag == _TR:
+                rows.append([])
+            elif tag == _TC:
+                cells.append([])
+            elif tag in _CONTAINERS:
+                container, container_depth = elem, depth
+            continue
+
+        depth -= 1
+        if tag == _T:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == _TAB:
+            if paragraphs:
+                paragraphs[-1].append("\t")
+        elif tag in (_BR, _CR):
+            if paragraphs:
+                paragraphs[-1].append("\n")
+        elif tag == _P:
+            text = "".join(paragraphs.pop()).strip()
+            if text:
+                if paragraphs:  # text box inside a paragraph: inline it
+                    paragraphs[-1].append(" " + text)
+                elif cells:
+                    cells[-1].append(text)
+                else:
+                    yield Block(paragraph_kind, text)
+        elif tag == _TC:
+            rows[-1].append(" ".join(cells.pop()))
+        elif tag == _TR:
+            row = rows.pop()
+            if any(row):
+                text = " | ".join(row)
+                if cells:  # nested table: the row belongs to the outer cell
+                    cells[-1].append(text)
+                else:
+                    yield Block(table_kind, text)
+
+        if tag == _P or tag == _TR:
+            elem.clear()  # inside a large table: keep only empty shells until it ends
+        # A top-level child is done: drop it (and everything parsed before it)
+        if depth == container_depth and container is not None:
+            container.clear()
+
+
+def iter_docx_blocks(source: Union[bytes, str, BinaryIO], max_xml_mb: Optional[int] = None) -> Iterator[Block]:
+    """Yield text blocks from a .docx (bytes, path or file object), part by part."""
+    limit = (max_xml_mb or settings.DOCX_MAX_XML_MB) * 1024 * 1024
+    with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as zf:
+        names = zf.namelist()
+        for pattern, kind in _PART_ORDER:
+            seen = set()
+            for name in sorted(n for n in names if pattern.match(n)):
+                size = zf.getinfo(name).file_size
+                if size > limit:
+                    # Zip-bomb guard: declared uncompressed size of one XML part
+                    raise ValueError(f"{name} is {size // (1024 * 1024)}MB uncompressed (limit {limit // (1024 * 1024)}MB)")
+                with zf.open(name) as stream:
+                    for block in _iter_part(stream, kind):
+                        if kind in ("header", "footer"):
+                            if block.text in seen:
+                                continue
+                            seen.add(block.text)
+                        yield block
+
+
+def docx_text(source: Union[bytes, str, BinaryIO]) -> str:
+    """Plain text of a .docx: one line per paragraph / table row."""
+    return "\n".join(block.text for block in iter_docx_blocks(source))
+
+
+_pool: Optional[Executor] = None
+
+
+def _get_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        if settings.DOCX_EXTRACT_WORKERS > 0:
+            # spawn: forking a process that runs threads (uvicorn, LLM pools) is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.DOCX_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="docx")
+    return _pool
+
+
+async def extract_docx_text(data: bytes) -> str:
+    """docx_text() off the event loop, in the extraction worker pool."""
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), docx_text, data)
+    except BrokenProcessPool:
+        # A worker died (OOM kill, ...): start a fresh pool for later calls
+        logger.warning("DOCX extraction pool broken, recreating it")
+        close_docx_pool()
+        return await loop.run_in_executor(_get_pool(), docx_text, data)
+
+
+def close_docx_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+        logger.info("DOCX extraction pool closed")
@@ -0,0 +1,78 @@
+"""Section-aware windows over long tender documents.
+
+split_windows() cuts extracted text (one line per paragraph / table row, see
+docx.py) into windows of at most `window_chars`, preferring to cut before a
+heading (第一章 / 第二节 / 一、 / （一） / 1.2 ...) and otherwise at a line
+boundary, so a requirement list or a 否决条件 clause is rarely split across two
+LLM calls. Consecutive windows share `overlap_chars` of trailing lines for the
+cases where a cut inside a section cannot be avoided. Together the windows
+cover every character of the text.
+"""
+
+import re
+from typing import List, NamedTuple
+
+_HEADING = re.compile(
+    r"^\s*(第[一二三四五六七八九十百零〇\d]+[章节部分篇条]|[一二三四五六七八九十]+、|（[一二三四五六七八九十]+）|\d+(\.\d+)*[.、\s])"
+)
+
+
+class Window(NamedTuple):
+    index: int
+    start: int  # character offsets into the source text
+    end: int
+    heading: str  # the section heading the window starts in ("" before the first)
+    text: str
+
+
+def _is_heading(line: str) -> bool:
+    return len(line) <= 60 and bool(_HEADING.match(line))
+
+
+def split_windows(text: str, window_chars: int = 8000, overlap_chars: int = 200) -> List[Window]:
+    """Cover `text` with windows of at most `window_chars` characters (a longer single line is cut)."""
+    if len(text) <= window_chars:
+        return [Window(0, 0, len(text), "", text)]
+
+    # Line offsets (keeping the newline with its line) and the heading in force at each line
+    lines, offsets, headings = [], [], []
+    position, heading = 0, ""
+    for line in text.splitlines(keepends=True):
+        if _is_heading(line):
+            heading = line.strip()
+        lines.append(line)
+        offsets.append(position)
+        headings.append(heading)
+        position += len(line)
+    offsets.append(position)
+
+    windows: List[Window] = []
+    i = 0
+    while i < len(lines):
+        start = offsets[i]
+        # Furthest line end that fits, and the last heading inside the window after its midpoint
+        j, cut = i, None
+        while j < len(lines) and offsets[j + 1] - start <= window_chars:
+            j += 1
+            if j < len(lines) and offsets[j] - start >= window_chars // 2 and _is_heading(lines[j]):
+                cut = j
+        if j == i:
+            # A single line longer than a window: hard cut inside it
+            end = start + window_chars
+            windows.append(Window(len(windows), start, end, headings[i], text[start:end]))
+            lines[i] = text[end:offsets[i + 1]]
+            offsets[i] = end
+            continue
+        if j < len(lines) and cut is not None:
+            j = cut  # end right before a heading instead of mid-section
+        end = offsets[j]
+        windows.append(Window(len(windows), start, end, headings[i], text[start:end]))
+        if j >= len(lines):
+            break
+        # Next window: restart a few lines back for overlap, unless it starts a new section
+        k = j
+        if not _is_heading(lines[j]):
+            while k > i + 1 and offsets[j] - offsets[k - 1] <= overlap_chars:
+                k -= 1
+        i = k
+    return windows
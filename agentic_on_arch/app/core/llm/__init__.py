@@ -1,13 +1,35 @@
-"""LLM adapter layer — factory function to get the active LLM provider."""
+"""LLM adapter layer — process-wide registry of long-lived provider adapters.
+
+Each adapter is created once (at startup for configured providers, otherwise
+on first use) and reused, so its HTTP connection pool survives across requests.
+Adapters are wrapped (outermost first) in metrics instrumentation
+(app.core.llm.instrumented), the exact-match response cache
+(app.core.llm.cache, LLM_CACHE_ENABLED) and single-flight coalescing of
+identical in-flight calls (app.core.llm.coalesce, LLM_COALESCE_ENABLED).
+
+Raw provider adapters sit behind a per-provider concurrency / tokens-per-minute
+governor with priority classes (app.core.llm.scheduler, LLM_GOVERNOR_ENABLED).
+The "router" provider (app.core.llm.router) spreads calls over the raw
+provider adapters by rolling latency / error rate, with failover and hedging.
+"""
+
+import time
+from typing import Dict
 
 from app.config import settings
+from app.core.llm.base import BaseLLM
+from app.utils.logger import logger
+from app.utils.metrics import LLM_CACHE_HIT_RATIO, LLM_INFLIGHT, LLM_QUEUE_DEPTH, REGISTRY
 
+_adapters: Dict[str, BaseLLM] = {}  # wrapped adapters handed out by get_llm
+_providers: Dict[str, BaseLLM] = {}  # governed provider adapters (shared by get_llm and the router)
+_created_at: Dict[str, float] = {}
 
-def get_llm(provider: str = None):
-    """Return an LLM adapter instance based on provider name."""
-    name = provider or settings.DEFAULT_LLM
 
-    if name == "claude":
+def _create(name: str) -> BaseLLM:
+    if name == "router":
+        return _create_router()
+    elif name == "claude":
         from app.core.llm.claude import ClaudeLLM
         return ClaudeLLM()
     elif name == "qwen":
@@ -16,5 +38,120 @@ def get_llm(provider: str = None):
     elif name == "glm":
         from app.core.llm.glm import GLMLLM
         return GLMLLM()
+    elif name == "fake":
+        from app.core.llm.fake import FakeLLM
+        return FakeLLM()
     else:
         raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def _provider(name: str) -> BaseLLM:
+    """Provider adapter without the cache / coalescing layers, created once."""
+    llm = _providers.get(name)
+    if llm is None:
+        llm = _create(name)
+        if settings.LLM_GOVERNOR_ENABLED and name != "router":
+            from app.core.llm.scheduler import GovernedLLM, build_scheduler
+            llm = GovernedLLM(llm, build_scheduler(name))
+        _providers[name] = llm
+    return llm
+
+
+def _create_router() -> BaseLLM:
+    from app.core.llm.router import RouterLLM
+    names = settings.LLM_ROUTER_PROVIDERS or [n for n in _configured_providers() if n != "router"]
+    members = {}
+    for name in names:
+        try:
+            members[name] = _provider(name)
+        except Exception as e:
+            logger.warning(f"LLM router: skipping {name}: {e}")
+    return RouterLLM(members)
+
+
+def get_llm(provider: str = None) -> BaseLLM:
+    """Return the shared LLM adapter for a provider name."""
+    name = provider or settings.DEFAULT_LLM
+    llm = _adapters.get(name)
+    if llm is None:
+        llm = _provider(name)
+        if settings.LLM_COALESCE_ENABLED:
+            from app.core.llm.coalesce import CoalescingLLM
+            llm = CoalescingLLM(llm, name)
+        if settings.LLM_CACHE_ENABLED:
+            from app.core.llm.cache import CachedLLM, get_response_cache
+            llm = CachedLLM(llm, name, get_response_cache())
+        from app.core.llm.instrumented import InstrumentedLLM
+        llm = InstrumentedLLM(llm, name)
+        _adapters[name] = llm
+        _created_at[name] = time.time()
+    return llm
+
+
+def _configured_providers():
+    keys = {"claude": settings.CLAUDE_API_KEY, "qwen": settings.QWEN_API_KEY, "glm": settings.GLM_API_KEY}
+    names = [name for name, key in keys.items() if key]
+    if settings.DEFAULT_LLM not in names:
+        names.append(settings.DEFAULT_LLM)
+    return names
+
+
+async def init_llms():
+    """Create adapters for configured providers and warm their connection pools (lifespan startup)."""
+    for name in _configured_providers():
+        try:
+            llm = get_llm(name)
+            if settings.LLM_WARMUP:
+                await llm.warmup()
+            logger.info(f"LLM adapter ready: {name} ({llm.get_model_name()})")
+        except Exception as e:
+            # The app must still start (e.g. SDK not installed for an unused provider)
+            logger.warning(f"LLM adapter {name} unavailable: {e}")
+
+
+async def close_llms():
+    """Close all adapter connection pools and the response cache (lifespan shutdown)."""
+    for name, llm in list(_providers.items()):
+        try:
+            await llm.aclose()
+        except Exception as e:
+            logger.warning(f"LLM adapter {name} close failed: {e}")
+    _adapters.clear()
+    _providers.clear()
+    _created_at.clear()
+    from app.core.llm.cache import close_response_cache
+    close_response_cache()
+
+
+def llm_pool_stats() -> Dict[str, dict]:
+    """Per-provider adapter age and connection pool stats."""
+    now = time.time()
+    return {
+        name: {"model": llm.get_model_name(), "age_s": round(now - _created_at[name], 1), **llm.pool_stats()}
+        for name, llm in _adapters.items()
+    }
+
+
+def llm_cache_stats() -> Dict[str, float]:
+    """Response cache hit-rate / size statistics (empty when the cache is disabled)."""
+    if not settings.LLM_CACHE_ENABLED:
+        return {}
+    from app.core.llm.cache import get_response_cache
+    return get_response_cache().stats()
+
+
+def _collect_metrics():
+    """Copy governor queue state and cache hit rate into gauges before a /metrics scrape."""
+    for name, llm in _providers.items():
+        scheduler = getattr(llm, "scheduler", None)
+        if scheduler is None:
+            continue
+        stats = scheduler.stats()
+        LLM_INFLIGHT.set(stats["active"], provider=name)
+        for priority in ("interactive", "normal", "batch"):
+            LLM_QUEUE_DEPTH.set(stats["queued_by_priority"].get(priority, 0), provider=name, priority=priority)
+    if settings.LLM_CACHE_ENABLED:
+        LLM_CACHE_HIT_RATIO.set(llm_cache_stats()["hit_rate"])
+
+
+REGISTRY.add_collector(_collect_metrics)
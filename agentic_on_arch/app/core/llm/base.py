@@ -1,7 +1,7 @@
 """Base LLM interface — all adapters must implement this."""
 
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict
 
 
 class BaseLLM(ABC):
@@ -21,3 +21,13 @@ class BaseLLM(ABC):
     def get_model_name(self) -> str:
         """Return the current model identifier."""
         ...
+
+    async def warmup(self):
+        """Open connections ahead of the first request. Optional."""
+
+    async def aclose(self):
+        """Release connection pools / threads at shutdown. Optional."""
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Connection pool statistics. Optional."""
+        return {}
@@ -0,0 +1,253 @@
+"""Exact-match LLM response cache.
+
+Identical (provider, model, system prompt, prompt, params) requests are served
+from cache instead of calling the provider again — e.g. a tender document that
+is re-uploaded or retried in /api/bidding/parse.
+
+Prompts reach the adapters already NER-masked, so the key and the cached
+response only contain placeholders ([PER-001] …), never raw PII; a hit is
+de-masked with the caller's own mapping like any other response.
+
+- Memory: LRU bounded by entry count and bytes, fixed TTL from creation
+- Disk (optional, LLM_CACHE_PATH): SQLite file behind the memory tier,
+  survives restarts and is shared by workers on the same host
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, Dict, Optional
+
+from app.config import settings
+from app.core.llm.base import BaseLLM
+from app.utils.logger import logger
+
+_ENTRY_OVERHEAD = 96  # approximate per-entry bookkeeping cost in bytes
+
+
+class ResponseCache:
+    """Two-tier (memory LRU → optional SQLite) cache of complete responses."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, max_bytes: int, path: Optional[str] = None):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key → (expires_at, value)
+        self._bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evicted_ttl = 0
+        self._evicted_lru = 0
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+            )
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+
+    @staticmethod
+    def make_key(provider: str, model: str, system: str, prompt: str, params: dict) -> str:
+        raw = json.dumps([provider, model, system, prompt, params], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    # --- memory tier ---
+
+    @staticmethod
+    def _size(key: str, value: str) -> int:
+        return len(key) + len(value.encode()) + _ENTRY_OVERHEAD
+
+    def _remove(self, key: str):
+        _, value = self._data.pop(key)
+        self._bytes -= self._size(key, value)
+
+    def _remember(self, key: str, expires_at: float, value: str):
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (expires_at, value)
+        self._bytes += self._size(key, value)
+        while self._data and (self._bytes > self.max_bytes or len(self._data) > self.max_entries):
+            oldest = next(iter(self._data))
+            if oldest == key:  # a single entry larger than the budget is still kept
+                break
+            self._remove(oldest)
+            self._evicted_lru += 1
+
+    # --- disk tier (runs in the default executor) ---
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._db.execute("SELECT expires_at, value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row
+
+    def _disk_set(self, key: str, expires_at: float, value: str):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, value),
+            )
+            self._db.commit()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # --- public API ---
+
+    async def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value
+            self._remove(key)
+            self._evicted_ttl += 1
+        if self._db is not None:
+            try:
+                row = await self._run(self._disk_get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache disk read failed: {e}")
+                row = None
+            if row is not None and row[0] > now:
+                self._remember(key, row[0], row[1])
+                self._hits += 1
+                self._disk_hits += 1
+                return row[1]
+        self._misses += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        self._stores += 1
+        if self._db is not None:
+            try:
+                await self._run(self._disk_set, key, expires_at, value)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache disk write failed: {e}")
+
+    def clear(self):
+        self._data.clear()
+        self._bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "stores": self._stores,
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evicted_ttl": self._evicted_ttl,
+            "evicted_lru": self._evicted_lru,
+            "disk": bool(self._db),
+        }
+
+
+class CachedLLM(BaseLLM):
+    """
+    Wraps a provider adapter with the response cache.
+
+    Pass cache=False to generate/stream to bypass it for a single call.
+    A streamed miss is stored only if the stream ran to completion; a hit is
+    replayed as a stream of LLM_CACHE_REPLAY_CHUNK_CHARS-sized chunks.
+    """
+
+    def __init__(self, llm: BaseLLM, provider: str, cache: ResponseCache):
+        self.llm = llm
+        self.provider = provider
+        self.cache = cache
+
+    def _key(self, prompt: str, system: str, params: dict) -> str:
+        return self.cache.make_key(self.provider, self.llm.get_model_name(), system, prompt, params)
+
+    async def generate(self, prompt: str, system: str = "", cache: bool = True, **kwargs) -> str:
+        if not cache:
+            return await self.llm.generate(prompt, system=system, **kwargs)
+        key = self._key(prompt, system, kwargs)
+        hit = await self.cache.get(key)
+        if hit is not None:
+            return hit
+        text = await self.llm.generate(prompt, system=system, **kwargs)
+        if text:
+            await self.cache.set(key, text)
+        return text
+
+    async def stream(self, prompt: str, system: str = "", cache: bool = True, **kwargs) -> AsyncGenerator[str, None]:
+        if not cache:
+            async for chunk in self.llm.stream(prompt, system=system, **kwargs):
+                yield chunk
+            return
+        key = self._key(prompt, system, kwargs)
+        hit = await self.cache.get(key)
+        if hit is not None:
+            size = settings.LLM_CACHE_REPLAY_CHUNK_CHARS
+            for i in range(0, len(hit), size):
+                yield hit[i:i + size]
+            return
+        parts = []
+        async for chunk in self.llm.stream(prompt, system=system, **kwargs):
+            parts.append(chunk)
+            yield chunk
+        text = "".join(parts)
+        if text:
+            await self.cache.set(key, text)
+
+    def get_model_name(self) -> str:
+        return self.llm.get_model_name()
+
+    async def warmup(self):
+        await self.llm.warmup()
+
+    async def aclose(self):
+        await self.llm.aclose()
+
+    def pool_stats(self) -> Dict[str, int]:
+        return self.llm.pool_stats()
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide response cache (created on first use)."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+            path=settings.LLM_CACHE_PATH,
+        )
+    return _cache
+
+
+def close_response_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
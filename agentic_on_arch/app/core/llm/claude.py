@@ -1,14 +1,16 @@
 """Claude (Anthropic) LLM adapter."""
 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Dict
 from app.core.llm.base import BaseLLM
+from app.core.llm.http import build_async_client, pool_stats, warm_up
 from app.config import settings
 
 
 class ClaudeLLM(BaseLLM):
     def __init__(self):
         import anthropic
-        self.client = anthropic.AsyncAnthropic(api_key=settings.CLAUDE_API_KEY)
+        self.http = build_async_client()
+        self.client = anthropic.AsyncAnthropic(api_key=settings.CLAUDE_API_KEY, http_client=self.http)
         self.model = settings.CLAUDE_MODEL
 
     async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
@@ -28,3 +30,12 @@ class ClaudeLLM(BaseLLM):
 
     def get_model_name(self) -> str:
         return self.model
+
+    async def warmup(self):
+        await warm_up(self.http, str(self.client.base_url), settings.LLM_WARMUP_CONNECTIONS)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    def pool_stats(self) -> Dict[str, int]:
+        return pool_stats(self.http)
@@ -0,0 +1,191 @@
+"""Single-flight coalescing of identical in-flight LLM requests.
+
+When several users send the same request at the same time (same tender file
+uploaded by a whole team, same Copilot question), only the first one reaches
+the provider:
+- generate: later callers await the leader's upstream task
+- stream: one upstream stream is pumped into a shared buffer and fanned out to
+  every subscriber, no faster than the fastest of them reads; a late joiner
+  first replays the chunks already received
+
+The upstream call is cancelled only when every caller has gone away, so one
+client disconnecting never breaks the others' responses. Requests are only
+coalesced while in flight; completed responses are the cache's job
+(app.core.llm.cache).
+"""
+
+import asyncio
+from functools import partial
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.core.llm.base import BaseLLM
+from app.core.llm.cache import ResponseCache
+
+
+class _SharedCall:
+    """One upstream generate() awaited by many callers."""
+
+    def __init__(self, coro, forget: Callable[["_SharedCall"], None]):
+        self.task = asyncio.ensure_future(coro)
+        self.task.add_done_callback(lambda _: forget(self))
+        self.waiters = 0
+        self._forget = forget
+
+    async def result(self) -> str:
+        self.waiters += 1
+        try:
+            return await asyncio.shield(self.task)
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and not self.task.done():
+                # Forget it now, not in the done callback: a caller arriving
+                # in between must start a new call, not join a cancelled one
+                self._forget(self)
+                self.task.cancel()
+
+
+class _SharedStream:
+    """
+    One upstream stream() fanned out to many subscribers.
+
+    The pump reads upstream at the pace of the fastest subscriber: it stops
+    once that one is LLM_STREAM_QUEUE_SIZE chunks behind, so a shared stream
+    keeps the backpressure of a single one.
+    """
+
+    def __init__(self, upstream: AsyncGenerator[str, None], forget: Callable[["_SharedStream"], None]):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self._forget = forget
+        self._positions: Dict[object, int] = {}  # subscriber → chunks it has received
+        self._updated = asyncio.Event()
+        self._consumed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(upstream))
+        self.task.add_done_callback(lambda _: forget(self))
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def _pump(self, upstream: AsyncGenerator[str, None]):
+        try:
+            async for chunk in upstream:
+                self.chunks.append(chunk)
+                self._notify()
+                while len(self.chunks) - max(self._positions.values(), default=0) >= settings.LLM_STREAM_QUEUE_SIZE:
+                    self._consumed.clear()
+                    await self._consumed.wait()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            await upstream.aclose()
+            self.done = True
+            self._notify()
+
+    async def subscribe(self) -> AsyncGenerator[str, None]:
+        self.subscribers += 1
+        me = object()
+        self._positions[me] = i = 0
+        try:
+            while True:
+                while i < len(self.chunks):
+                    yield self.chunks[i]
+                    i += 1
+                    self._positions[me] = i
+                    self._consumed.set()
+                updated = self._updated
+                if self.done:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await updated.wait()
+        finally:
+            self.subscribers -= 1
+            del self._positions[me]
+            self._consumed.set()
+            if self.subscribers == 0 and not self.done:
+                self._forget(self)
+                self.task.cancel()
+
+
+class CoalescingLLM(BaseLLM):
+    """
+    Wraps a provider adapter so identical concurrent calls share one upstream request.
+
+    Pass coalesce=False to generate/stream to opt a single call out.
+    """
+
+    def __init__(self, llm: BaseLLM, provider: str):
+        self.llm = llm
+        self.provider = provider
+        self._calls: Dict[str, _SharedCall] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+        self._requests = 0
+        self._upstream = 0
+
+    @staticmethod
+    def _forget(table: dict, key: str, entry):
+        # Only the entry itself: a newer call may already be under the same key
+        if table.get(key) is entry:
+            del table[key]
+
+    def _key(self, kind: str, prompt: str, system: str, params: dict) -> str:
+        return ResponseCache.make_key(self.provider, self.llm.get_model_name(), system, prompt, {kind: params})
+
+    async def generate(self, prompt: str, system: str = "", coalesce: bool = True, **kwargs) -> str:
+        self._requests += 1
+        if not coalesce:
+            self._upstream += 1
+            return await self.llm.generate(prompt, system=system, **kwargs)
+        key = self._key("generate", prompt, system, kwargs)
+        call = self._calls.get(key)
+        if call is None or call.task.cancelled():
+            self._upstream += 1
+            call = _SharedCall(self.llm.generate(prompt, system=system, **kwargs), partial(self._forget, self._calls, key))
+            self._calls[key] = call
+        return await call.result()
+
+    async def stream(self, prompt: str, system: str = "", coalesce: bool = True, **kwargs) -> AsyncGenerator[str, None]:
+        self._requests += 1
+        if not coalesce:
+            self._upstream += 1
+            async for chunk in self.llm.stream(prompt, system=system, **kwargs):
+                yield chunk
+            return
+        key = self._key("stream", prompt, system, kwargs)
+        shared = self._streams.get(key)
+        if shared is None or shared.task.done():
+            self._upstream += 1
+            shared = _SharedStream(self.llm.stream(prompt, system=system, **kwargs), partial(self._forget, self._streams, key))
+            self._streams[key] = shared
+        subscription = shared.subscribe()
+        try:
+            async for chunk in subscription:
+                yield chunk
+        finally:
+            # Leave right away when our caller goes, not whenever the generator is collected
+            await subscription.aclose()
+
+    def get_model_name(self) -> str:
+        return self.llm.get_model_name()
+
+    async def warmup(self):
+        await self.llm.warmup()
+
+    async def aclose(self):
+        await self.llm.aclose()
+
+    def pool_stats(self) -> Dict[str, float]:
+        return {
+            **self.llm.pool_stats(),
+            "requests": self._requests,
+            "upstream_calls": self._upstream,
+            "coalesced": self._requests - self._upstream,
+            "inflight": len(self._calls) + len(self._streams),
+        }
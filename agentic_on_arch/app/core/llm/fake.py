@@ -0,0 +1,67 @@
+"""Offline fake LLM provider (DEFAULT_LLM=fake or get_llm("fake")).
+
+Streams canned legal text with configurable time-to-first-token, token rate,
+chunk size and error injection, so /api/chat and /api/bidding can be run and
+load-tested without provider keys or network access. Output follows the
+same token estimate the governor uses (app.utils.tokens): one CJK character
+is one token.
+"""
+
+import asyncio
+import random
+from typing import AsyncGenerator
+
+from app.config import settings
+from app.core.llm.base import BaseLLM
+
+_TEXT = (
+    "根据《中华人民共和国民法典》第五百七十七条，当事人一方不履行合同义务或者履行合同义务不符合约定的，"
+    "应当承担继续履行、采取补救措施或者赔偿损失等违约责任。建议：一、固定履约证据；二、发送书面催告函；"
+    "三、在诉讼时效期间内主张权利。"
+)
+
+
+class FakeLLM(BaseLLM):
+    def __init__(self):
+        self.ttft = settings.FAKE_LLM_TTFT_MS / 1000
+        self.tokens_per_second = settings.FAKE_LLM_TOKENS_PER_SECOND
+        self.chunk_tokens = max(1, settings.FAKE_LLM_CHUNK_TOKENS)
+        self.output_tokens = settings.FAKE_LLM_OUTPUT_TOKENS
+        self.error_rate = settings.FAKE_LLM_ERROR_RATE
+        self.error_mode = settings.FAKE_LLM_ERROR_MODE
+        self._rng = random.Random(settings.FAKE_LLM_SEED)
+
+    def _text(self) -> str:
+        repeats = self.output_tokens // len(_TEXT) + 1
+        return (_TEXT * repeats)[:self.output_tokens]
+
+    def _duration(self, tokens: int) -> float:
+        """Time to emit `tokens`; a rate of 0 (or below) means no pacing."""
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _should_fail(self) -> bool:
+        return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
+        fail = self._should_fail()
+        await asyncio.sleep(self.ttft + self._duration(self.output_tokens))
+        if fail:
+            raise RuntimeError("Fake LLM injected error")
+        return self._text()
+
+    async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
+        fail = self._should_fail()
+        text = self._text()
+        await asyncio.sleep(self.ttft)
+        if fail and self.error_mode == "start":
+            raise RuntimeError("Fake LLM injected error")
+        interval = self._duration(self.chunk_tokens)
+        for i in range(0, len(text), self.chunk_tokens):
+            if i:
+                await asyncio.sleep(interval)
+            if fail and i >= len(text) // 2:
+                raise RuntimeError("Fake LLM injected mid-stream error")
+            yield text[i:i + self.chunk_tokens]
+
+    def get_model_name(self) -> str:
+        return "fake"
@@ -1,38 +1,67 @@
-"""GLM-4 (ZhipuAI / 智谱) LLM adapter."""
+"""GLM-4 (ZhipuAI / 智谱) LLM adapter.
 
-from typing import AsyncGenerator
+Talks to the v4 chat-completions HTTP API through the shared async httpx pool
+instead of the synchronous zhipuai SDK, so a GLM request never blocks the
+event loop. Streaming reads the SSE body line by line; the socket is only read
+as fast as the consumer pulls chunks, which gives natural backpressure.
+"""
+
+import json
+from typing import AsyncGenerator, Dict
 from app.core.llm.base import BaseLLM
+from app.core.llm.http import build_async_client, pool_stats, warm_up
 from app.config import settings
 
 
 class GLMLLM(BaseLLM):
     def __init__(self):
-        from zhipuai import ZhipuAI
-        self.client = ZhipuAI(api_key=settings.GLM_API_KEY)
+        self.http = build_async_client(
+            base_url=settings.GLM_BASE_URL,
+            headers={"Authorization": f"Bearer {settings.GLM_API_KEY}"},
+        )
         self.model = settings.GLM_MODEL
 
-    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+    def _payload(self, prompt: str, system: str, stream: bool, **kwargs) -> dict:
+        return {
+            "model": self.model,
+            "messages": [
                 {"role": "system", "content": system or "你是律所AI助手。"},
                 {"role": "user", "content": prompt},
             ],
-        )
-        return response.choices[0].message.content
+            "stream": stream,
+            **kwargs,
+        }
+
+    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
+        response = await self.http.post("/chat/completions", json=self._payload(prompt, system, False, **kwargs))
+        if response.is_error:
+            raise RuntimeError(f"GLM API error {response.status_code}: {response.text[:200]}")
+        return response.json()["choices"][0]["message"]["content"]
 
     async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system or "你是律所AI助手。"},
-                {"role": "user", "content": prompt},
-            ],
-            stream=True,
-        )
-        for chunk in response:
-            if chunk.choices and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        payload = self._payload(prompt, system, True, **kwargs)
+        async with self.http.stream("POST", "/chat/completions", json=payload) as response:
+            if response.is_error:
+                body = await response.aread()
+                raise RuntimeError(f"GLM API error {response.status_code}: {body[:200].decode(errors='ignore')}")
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices")
+                if choices and choices[0].get("delta", {}).get("content"):
+                    yield choices[0]["delta"]["content"]
 
     def get_model_name(self) -> str:
         return self.model
+
+    async def warmup(self):
+        await warm_up(self.http, settings.GLM_BASE_URL, settings.LLM_WARMUP_CONNECTIONS)
+
+    async def aclose(self):
+        await self.http.aclose()
+
+    def pool_stats(self) -> Dict[str, int]:
+        return pool_stats(self.http)
@@ -0,0 +1,50 @@
+"""Shared HTTP connection pools for LLM adapters.
+
+Adapters are long-lived (see app.core.llm registry), so each provider keeps one
+keep-alive pool for the life of the process instead of paying a TCP + TLS
+handshake on every chat turn.
+"""
+
+import asyncio
+from typing import Dict
+
+import httpx
+
+from app.config import settings
+from app.utils.logger import logger
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    # Long read timeout: a streamed completion may pause while the model thinks
+    return httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10.0)
+
+
+def build_async_client(**kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(limits=_limits(), timeout=_timeout(), **kwargs)
+
+
+async def warm_up(client: httpx.AsyncClient, url: str, connections: int = 1):
+    """Open keep-alive connections ahead of the first request (any HTTP status counts)."""
+    # Concurrent requests so that each one opens its own connection
+    results = await asyncio.gather(*(client.head(url) for _ in range(connections)), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, Exception)]
+    if errors:
+        logger.warning(f"LLM pool warm-up failed for {url}: {errors[0]}")
+
+
+def pool_stats(client: httpx.AsyncClient) -> Dict[str, int]:
+    """Connection counts of the client's pool (best effort — relies on httpcore internals)."""
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return {}
+    idle = sum(1 for c in connections if c.is_idle())
+    return {"connections": len(connections), "idle": idle, "active": len(connections) - idle}
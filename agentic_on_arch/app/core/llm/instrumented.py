@@ -0,0 +1,63 @@
+"""Metrics wrapper for the adapters handed out by get_llm (outermost layer).
+
+Records, per provider and route: TTFT, total duration, chunk count, output
+tokens and errors (see app.utils.metrics). Being outermost, it measures what
+the API handler experiences — cache hits and coalesced calls included.
+A stream the client abandons is not counted as an error.
+"""
+
+import time
+from typing import AsyncGenerator, Dict
+
+from app.core.llm.base import BaseLLM
+from app.utils.metrics import LLM_CHUNKS, LLM_ERRORS, LLM_LATENCY, LLM_OUTPUT_TOKENS, LLM_TTFT, current_route
+from app.utils.tokens import estimate_tokens
+
+
+class InstrumentedLLM(BaseLLM):
+    def __init__(self, llm: BaseLLM, provider: str):
+        self.llm = llm
+        self.provider = provider
+
+    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
+        route = current_route()
+        t0 = time.perf_counter()
+        try:
+            text = await self.llm.generate(prompt, system=system, **kwargs)
+        except Exception:
+            LLM_ERRORS.inc(provider=self.provider, route=route, kind="generate")
+            raise
+        LLM_LATENCY.observe(time.perf_counter() - t0, provider=self.provider, route=route, kind="generate")
+        LLM_OUTPUT_TOKENS.observe(estimate_tokens(text), provider=self.provider, route=route, kind="generate")
+        return text
+
+    async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
+        route = current_route()
+        t0 = time.perf_counter()
+        chunks = 0
+        tokens = 0
+        try:
+            async for chunk in self.llm.stream(prompt, system=system, **kwargs):
+                if chunks == 0:
+                    LLM_TTFT.observe(time.perf_counter() - t0, provider=self.provider, route=route)
+                chunks += 1
+                tokens += estimate_tokens(chunk)
+                yield chunk
+        except Exception:
+            LLM_ERRORS.inc(provider=self.provider, route=route, kind="stream")
+            raise
+        LLM_LATENCY.observe(time.perf_counter() - t0, provider=self.provider, route=route, kind="stream")
+        LLM_CHUNKS.observe(chunks, provider=self.provider, route=route)
+        LLM_OUTPUT_TOKENS.observe(tokens, provider=self.provider, route=route, kind="stream")
+
+    def get_model_name(self) -> str:
+        return self.llm.get_model_name()
+
+    async def warmup(self):
+        await self.llm.warmup()
+
+    async def aclose(self):
+        await self.llm.aclose()
+
+    def pool_stats(self) -> Dict[str, object]:
+        return self.llm.pool_stats()
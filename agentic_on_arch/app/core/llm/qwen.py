@@ -1,47 +1,124 @@
 """Qwen (DashScope / 通义千问) LLM adapter."""
 
 import asyncio
-from typing import AsyncGenerator
+import concurrent.futures
+import threading
+import time
+from typing import AsyncGenerator, Dict
 from app.core.llm.base import BaseLLM
 from app.config import settings
 
 
+class _StreamPool:
+    """Dedicated bounded thread pool for blocking SDK calls, with saturation counters."""
+
+    def __init__(self, workers: int):
+        self.max_workers = workers
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qwen-llm")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._peak_active = 0
+        self._started = 0
+        self._wait_total = 0.0
+
+    def submit(self, fn) -> concurrent.futures.Future:
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._started += 1
+                self._peak_active = max(self._peak_active, self._active)
+                self._wait_total += time.perf_counter() - submitted
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        return self._executor.submit(run)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "threads_max": self.max_workers,
+                "threads_active": self._active,
+                "threads_peak": self._peak_active,
+                "threads_queued": self._queued,
+                "saturation": round(self._active / self.max_workers, 3),
+                "avg_wait_ms": round(self._wait_total / self._started * 1000, 2) if self._started else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
 class QwenLLM(BaseLLM):
     def __init__(self):
-        import dashscope
-        dashscope.api_key = settings.QWEN_API_KEY
+        # Key is passed per call instead of mutating the global dashscope.api_key
+        self.api_key = settings.QWEN_API_KEY
         self.model = settings.QWEN_MODEL
+        self.pool = _StreamPool(settings.QWEN_THREAD_POOL_SIZE)
 
     async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
-        """Non-streaming generation — run blocking SDK call in a thread."""
-        loop = asyncio.get_running_loop()
+        """Non-streaming generation — run blocking SDK call in the adapter's thread pool."""
         def _call():
             from dashscope import Generation
             response = Generation.call(
                 model=self.model,
+                api_key=self.api_key,
                 messages=[
                     {"role": "system", "content": system or "你是律所AI助手。"},
                     {"role": "user", "content": prompt},
                 ],
                 result_format="message",
             )
+            if response.status_code != 200:
+                raise RuntimeError(f"DashScope error {response.status_code}: {response.message}")
             return response.output.choices[0].message.content
-        return await loop.run_in_executor(None, _call)
+        return await asyncio.wrap_future(self.pool.submit(_call))
 
     async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
-        """Streaming generation — offload synchronous SDK iterator to a thread,
-        push chunks into an asyncio.Queue so the event loop stays unblocked."""
-        queue: asyncio.Queue = asyncio.Queue()
+        """Streaming generation — a pool thread drives the synchronous SDK iterator.
+
+        Chunks go through a bounded asyncio.Queue: when the consumer is slow the
+        thread blocks on put and stops reading from DashScope (backpressure).
+        When the consumer goes away (client disconnect closes this generator),
+        the thread stops pulling and closes the upstream iterator.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LLM_STREAM_QUEUE_SIZE)
         sentinel = object()  # marks end of stream
+        cancelled = threading.Event()
 
         # Capture the running event loop BEFORE entering the background thread
         loop = asyncio.get_running_loop()
 
+        def _put(item) -> bool:
+            """Blocking put from the worker thread; False once the consumer is gone."""
+            try:
+                future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            except RuntimeError:  # event loop closed
+                return False
+            while True:
+                try:
+                    future.result(timeout=0.25)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    if cancelled.is_set():
+                        future.cancel()
+                        return False
+
         def _stream_in_thread():
             from dashscope import Generation
+            responses = None
             try:
                 responses = Generation.call(
                     model=self.model,
+                    api_key=self.api_key,
                     messages=[
                         {"role": "system", "content": system or "你是律所AI助手。"},
                         {"role": "user", "content": prompt},
@@ -51,24 +128,42 @@ class QwenLLM(BaseLLM):
                     incremental_output=True,
                 )
                 for response in responses:
+                    if cancelled.is_set():
+                        break
+                    if response.status_code != 200:
+                        raise RuntimeError(f"DashScope error {response.status_code}: {response.message}")
                     if response.output and response.output.choices:
                         chunk = response.output.choices[0].message.content
-                        loop.call_soon_threadsafe(queue.put_nowait, chunk)
+                        if chunk and not _put(chunk):
+                            break
             except Exception as e:
-                loop.call_soon_threadsafe(queue.put_nowait, f"[错误] {str(e)}")
+                _put(e)
             finally:
-                loop.call_soon_threadsafe(queue.put_nowait, sentinel)
+                # Stop the upstream HTTP stream if we left early
+                if responses is not None and hasattr(responses, "close"):
+                    responses.close()
+                _put(sentinel)
 
-        # Start blocking iteration in background thread
-        loop.run_in_executor(None, _stream_in_thread)
+        # Start blocking iteration in the dedicated pool
+        self.pool.submit(_stream_in_thread)
 
         # Yield chunks as they arrive
-        while True:
-            item = await queue.get()
-            if item is sentinel:
-                break
-            yield item
+        try:
+            while True:
+                item = await queue.get()
+                if item is sentinel:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
 
     def get_model_name(self) -> str:
         return self.model
 
+    async def aclose(self):
+        self.pool.shutdown()
+
+    def pool_stats(self) -> Dict[str, float]:
+        return self.pool.stats()
@@ -0,0 +1,226 @@
+"""Latency-aware multi-provider router with failover and hedged requests.
+
+RouterLLM implements BaseLLM over several provider adapters (claude / qwen /
+glm). Per provider and per call kind it keeps a rolling window of
+time-to-first-token (stream) or latency (generate) and of outcomes:
+
+- routing: healthy providers first, fastest rolling p50 first; providers
+  without samples yet are tried first so they get measured
+- health: a provider whose rolling error rate reaches the threshold is
+  skipped for a cooldown, then probed again
+- failover: an error before the first chunk moves on to the next provider
+- hedging: if the primary has not answered within its rolling p95, a second
+  request goes to the next provider; the first to answer wins and the loser
+  is cancelled (which also stops its upstream stream)
+
+Once a stream has yielded its first chunk it is never restarted elsewhere —
+an error after that point is raised to the caller.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.llm.base import BaseLLM
+from app.utils.logger import logger
+
+_MIN_SAMPLES = 5  # below this, quantiles and error rate are not trusted
+
+
+class _ProviderStats:
+    """Rolling latency and outcome windows for one provider."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.latency = {"generate": deque(maxlen=window), "stream": deque(maxlen=window)}
+        self.outcomes: deque = deque(maxlen=window)  # True = error
+        self.unhealthy_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+
+    def quantile(self, kind: str, q: float) -> Optional[float]:
+        samples = self.latency[kind] or self.latency["stream" if kind == "generate" else "generate"]
+        if len(samples) < _MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.unhealthy_until
+
+    def record_latency(self, kind: str, seconds: float):
+        self.latency[kind].append(seconds)
+
+    def record_outcome(self, error: bool, now: float):
+        self.outcomes.append(error)
+        if error:
+            self.errors += 1
+            if len(self.outcomes) >= _MIN_SAMPLES and self.error_rate() >= settings.LLM_ROUTER_MAX_ERROR_RATE:
+                self.unhealthy_until = now + settings.LLM_ROUTER_COOLDOWN_SECONDS
+                self.outcomes.clear()  # half-open after the cooldown
+
+    def snapshot(self, now: float) -> dict:
+        p50 = self.quantile("stream", 0.5)
+        p95 = self.quantile("stream", 0.95)
+        return {
+            "healthy": self.healthy(now),
+            "ttft_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "ttft_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "requests": self.requests,
+            "errors": self.errors,
+            "wins": self.wins,
+        }
+
+
+class RouterLLM(BaseLLM):
+    """Routes each call to the fastest healthy provider, with failover and optional hedging."""
+
+    def __init__(self, providers: Dict[str, BaseLLM], hedge: bool = None):
+        if not providers:
+            raise ValueError("RouterLLM needs at least one provider")
+        self.providers = providers
+        self.hedge = settings.LLM_ROUTER_HEDGE if hedge is None else hedge
+        self.stats = {name: _ProviderStats(settings.LLM_ROUTER_WINDOW) for name in providers}
+        self._hedged = 0
+        self._hedge_wins = 0
+        self._failovers = 0
+
+    # --- routing ---
+
+    def rank(self, kind: str) -> List[str]:
+        """Providers in the order they should be tried for this kind of call."""
+        now = time.monotonic()
+        order = list(self.providers)
+
+        def score(name: str):
+            stats = self.stats[name]
+            p50 = stats.quantile(kind, 0.5)
+            return (not stats.healthy(now), p50 is not None, p50 or 0.0, order.index(name))
+
+        return sorted(order, key=score)
+
+    def _hedge_delay(self, name: str, kind: str) -> float:
+        p95 = self.stats[name].quantile(kind, 0.95)
+        low = settings.LLM_ROUTER_HEDGE_MIN_MS / 1000
+        high = settings.LLM_ROUTER_HEDGE_MAX_MS / 1000
+        return high if p95 is None else min(max(p95, low), high)
+
+    async def _race(
+        self,
+        kind: str,
+        start: Callable[[str], Awaitable],
+        discard: Optional[Callable[[object], Awaitable]] = None,
+    ) -> Tuple[str, object]:
+        """Run start(name) on ranked providers with failover and hedging; return the first success."""
+        order = self.rank(kind)
+        pending: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+        next_index = 0
+        hedged = False
+
+        def launch():
+            nonlocal next_index
+            name = order[next_index]
+            next_index += 1
+            self.stats[name].requests += 1
+            pending[asyncio.ensure_future(start(name))] = name
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and not hedged and next_index < len(order) and len(pending) == 1:
+                    timeout = self._hedge_delay(order[next_index - 1], kind)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    self._hedged += 1
+                    launch()
+                    continue
+                winner = None
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is not None:
+                        self.stats[name].record_outcome(True, time.monotonic())
+                        errors.append(f"{name}: {task.exception()}")
+                        logger.warning(f"LLM router: {name} {kind} failed: {task.exception()}")
+                    elif winner is None:
+                        winner = (name, task.result())
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    self.stats[winner[0]].wins += 1
+                    if hedged and winner[0] != order[0]:
+                        self._hedge_wins += 1
+                    return winner
+                if not pending and next_index < len(order):
+                    self._failovers += 1
+                    launch()
+            raise RuntimeError(f"All LLM providers failed: {'; '.join(errors)}")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # --- BaseLLM ---
+
+    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
+        async def start(name: str) -> str:
+            t0 = time.perf_counter()
+            text = await self.providers[name].generate(prompt, system=system, **kwargs)
+            self.stats[name].record_latency("generate", time.perf_counter() - t0)
+            self.stats[name].record_outcome(False, time.monotonic())
+            return text
+
+        _, text = await self._race("generate", start)
+        return text
+
+    async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
+        async def start(name: str):
+            agen = self.providers[name].stream(prompt, system=system, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                first = await agen.__anext__()
+            except StopAsyncIteration:
+                first = None
+            except BaseException:
+                await agen.aclose()
+                raise
+            self.stats[name].record_latency("stream", time.perf_counter() - t0)
+            return agen, first
+
+        async def discard(opened):
+            await opened[0].aclose()
+
+        name, (agen, first) = await self._race("stream", start, discard)
+        stats = self.stats[name]
+        try:
+            if first is not None:
+                yield first
+                async for chunk in agen:
+                    yield chunk
+            stats.record_outcome(False, time.monotonic())
+        except Exception:
+            stats.record_outcome(True, time.monotonic())
+            raise
+        finally:
+            await agen.aclose()
+
+    def get_model_name(self) -> str:
+        return "router(" + ",".join(f"{n}:{p.get_model_name()}" for n, p in self.providers.items()) + ")"
+
+    def pool_stats(self) -> Dict[str, object]:
+        now = time.monotonic()
+        return {
+            "order": self.rank("stream"),
+            "hedged": self._hedged,
+            "hedge_wins": self._hedge_wins,
+            "failovers": self._failovers,
+            "providers": {name: stats.snapshot(now) for name, stats in self.stats.items()},
+        }
@@ -0,0 +1,235 @@
+"""Per-provider concurrency / tokens-per-minute governor with priority scheduling.
+
+Every raw provider adapter is wrapped in GovernedLLM, which admits a call
+only when its ProviderScheduler has a free concurrency slot and enough token
+budget. Waiting calls are ordered by:
+
+1. priority class — INTERACTIVE (Copilot chat) before NORMAL before BATCH
+   (bidding generate / parse)
+2. fair share — within a class, the user with the fewest calls in flight
+3. arrival order
+
+A call that waits longer than its class's queue timeout fails with
+RateLimitError instead of piling up. Token budgets are a token bucket refilled
+continuously at tokens_per_minute; a call reserves its estimated prompt +
+expected output tokens up front and is settled with the actual estimate when
+it finishes.
+
+The priority class and user are taken from a context variable set by the
+API handler (set_llm_context), so they flow through the cache, coalescing and
+router layers without being part of any request key.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.llm.base import BaseLLM
+from app.utils.errors import RateLimitError
+from app.utils.metrics import LLM_QUEUE_WAIT
+from app.utils.tokens import estimate_tokens
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # Copilot chat — a user is watching the stream
+    NORMAL = 1  # agents and anything that did not set a class
+    BATCH = 2  # bidding generation / tender parsing
+
+
+_context: "ContextVar[Tuple[Priority, str]]" = ContextVar("llm_context", default=(Priority.NORMAL, "anonymous"))
+
+
+def set_llm_context(priority: Priority, user_id=None):
+    """Tag the LLM calls made by the current request with a priority class and user."""
+    _context.set((priority, "anonymous" if user_id is None else str(user_id)))
+
+
+class _Ticket:
+    __slots__ = ("priority", "user", "tokens", "seq", "enqueued_at", "granted")
+
+    def __init__(self, priority: Priority, user: str, tokens: int, seq: int):
+        self.priority = priority
+        self.user = user
+        self.tokens = tokens
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class ProviderScheduler:
+    """Admission control for one provider: concurrency slots + token bucket + priority queue."""
+
+    def __init__(self, name: str, max_concurrency: int, tokens_per_minute: int = 0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.tpm = tokens_per_minute  # 0 = unlimited
+        self.tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._waiters: List[_Ticket] = []
+        self._seq = itertools.count()
+        self.active = 0
+        self._active_by_user: Dict[str, int] = defaultdict(int)
+        # metrics
+        self._admitted = 0
+        self._timeouts = 0
+        self._peak_queue = 0
+        self._waits = {p: deque(maxlen=1000) for p in Priority}
+
+    # --- token bucket ---
+
+    def _refill(self, now: float):
+        if self.tpm:
+            self.tokens = min(float(self.tpm), self.tokens + (now - self._refilled_at) * self.tpm / 60)
+        self._refilled_at = now
+
+    def _wake_later(self, delay: float):
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    # --- queue ---
+
+    def _dispatch(self):
+        now = time.monotonic()
+        self._refill(now)
+        while self._waiters and self.active < self.max_concurrency:
+            ticket = min(self._waiters, key=lambda t: (t.priority, self._active_by_user.get(t.user, 0), t.seq))
+            if self.tpm and self.tokens < ticket.tokens:
+                # Head of line waits for the bucket; lower classes must not overtake it
+                self._wake_later((ticket.tokens - self.tokens) * 60 / self.tpm)
+                break
+            self._waiters.remove(ticket)
+            if self.tpm:
+                self.tokens -= ticket.tokens
+            self.active += 1
+            self._active_by_user[ticket.user] += 1
+            self._admitted += 1
+            self._waits[ticket.priority].append(now - ticket.enqueued_at)
+            LLM_QUEUE_WAIT.observe(now - ticket.enqueued_at, provider=self.name, priority=ticket.priority.name.lower())
+            ticket.granted.set_result(None)
+
+    async def acquire(self, tokens: int) -> _Ticket:
+        """Wait for a slot and token budget; raises RateLimitError after the class's queue timeout."""
+        priority, user = _context.get()
+        if self.tpm:
+            tokens = min(tokens, self.tpm)  # a single huge call must still be admissible
+        ticket = _Ticket(priority, user, tokens, next(self._seq))
+        self._waiters.append(ticket)
+        self._peak_queue = max(self._peak_queue, len(self._waiters))
+        self._dispatch()
+        if ticket.granted.done():
+            return ticket
+        timeout = settings.LLM_QUEUE_TIMEOUT_SECONDS.get(priority.name.lower())
+        try:
+            await asyncio.wait({ticket.granted}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(ticket)
+            raise
+        if not ticket.granted.done():
+            self._abandon(ticket)
+            self._timeouts += 1
+            raise RateLimitError(f"LLM 服务繁忙（{self.name} 排队超时 {timeout:g}s），请稍后重试")
+        return ticket
+
+    def _abandon(self, ticket: _Ticket):
+        if ticket.granted.done():
+            self.release(ticket, ticket.tokens)  # granted just as the caller gave up
+        else:
+            self._waiters.remove(ticket)
+            ticket.granted.cancel()
+
+    def release(self, ticket: _Ticket, used_tokens: int):
+        """Free the slot and settle the reservation against the tokens actually used."""
+        self.active -= 1
+        self._active_by_user[ticket.user] -= 1
+        if self._active_by_user[ticket.user] <= 0:
+            del self._active_by_user[ticket.user]
+        if self.tpm:
+            self._refill(time.monotonic())
+            self.tokens = min(float(self.tpm), self.tokens + ticket.tokens - used_tokens)
+        self._dispatch()
+
+    def stats(self) -> Dict[str, object]:
+        self._refill(time.monotonic())
+        waits = {}
+        for priority, samples in self._waits.items():
+            if samples:
+                ordered = sorted(samples)
+                waits[priority.name.lower()] = {
+                    "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                    "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                    "max_ms": round(ordered[-1] * 1000, 1),
+                }
+        queued = defaultdict(int)
+        for ticket in self._waiters:
+            queued[ticket.priority.name.lower()] += 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "queued_by_priority": dict(queued),
+            "peak_queue": self._peak_queue,
+            "users_active": len(self._active_by_user),
+            "tpm": self.tpm,
+            "tokens_available": round(self.tokens) if self.tpm else None,
+            "admitted": self._admitted,
+            "timeouts": self._timeouts,
+            "wait": waits,
+        }
+
+
+class GovernedLLM(BaseLLM):
+    """Wraps a provider adapter so every call goes through its ProviderScheduler."""
+
+    def __init__(self, llm: BaseLLM, scheduler: ProviderScheduler):
+        self.llm = llm
+        self.scheduler = scheduler
+
+    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
+        used = estimate_tokens(system) + estimate_tokens(prompt)
+        ticket = await self.scheduler.acquire(used + settings.LLM_EXPECTED_OUTPUT_TOKENS)
+        try:
+            text = await self.llm.generate(prompt, system=system, **kwargs)
+            used += estimate_tokens(text)
+            return text
+        finally:
+            self.scheduler.release(ticket, used)
+
+    async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
+        used = estimate_tokens(system) + estimate_tokens(prompt)
+        ticket = await self.scheduler.acquire(used + settings.LLM_EXPECTED_OUTPUT_TOKENS)
+        try:
+            async for chunk in self.llm.stream(prompt, system=system, **kwargs):
+                used += estimate_tokens(chunk)
+                yield chunk
+        finally:
+            self.scheduler.release(ticket, used)
+
+    def get_model_name(self) -> str:
+        return self.llm.get_model_name()
+
+    async def warmup(self):
+        await self.llm.warmup()
+
+    async def aclose(self):
+        await self.llm.aclose()
+
+    def pool_stats(self) -> Dict[str, object]:
+        return {**self.llm.pool_stats(), "scheduler": self.scheduler.stats()}
+
+
+def build_scheduler(name: str) -> ProviderScheduler:
+    return ProviderScheduler(
+        name,
+        max_concurrency=settings.LLM_CONCURRENCY_LIMITS.get(name, settings.LLM_DEFAULT_CONCURRENCY),
+        tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE.get(name, 0),
+    )
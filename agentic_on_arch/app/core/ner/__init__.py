@@ -0,0 +1,39 @@
+"""NER gateway — factory for the active entity detector (settings.NER_MODE)."""
+
+from app.config import settings
+
+_detector = None
+
+
+def get_detector():
+    """Return the process-wide detector; the BERT model is loaded once on first use."""
+    global _detector
+    if _detector is None:
+        if settings.NER_MODE == "regex":
+            from app.core.ner.detector import NERDetector
+            _detector = NERDetector()
+        elif settings.NER_MODE == "bert":
+            from app.core.ner.bert_detector import BertNERDetector, OnnxTokenClassifier
+            classifier = OnnxTokenClassifier(
+                settings.NER_MODEL_DIR,
+                max_seq_len=settings.NER_MAX_SEQ_LEN,
+                num_threads=settings.NER_NUM_THREADS,
+            )
+            _detector = BertNERDetector(
+                classifier,
+                max_batch_size=settings.NER_BATCH_MAX_SIZE,
+                max_wait_ms=settings.NER_BATCH_WAIT_MS,
+                segment_chars=settings.NER_MAX_SEQ_LEN - 2,  # [CLS] / [SEP]
+            )
+        else:
+            raise ValueError(f"Unknown NER mode: {settings.NER_MODE}")
+    return _detector
+
+
+def close_detector():
+    """Stop the BERT detector's micro-batcher thread (lifespan shutdown)."""
+    global _detector
+    close = getattr(_detector, "close", None)
+    if close is not None:
+        close()
+    _detector = None
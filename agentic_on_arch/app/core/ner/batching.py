@@ -0,0 +1,98 @@
+"""Micro-batching scheduler — coalesces concurrent model calls into shared forward passes."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.logger import logger
+
+
+class MicroBatcher:
+    """
+    Collect single-item requests from concurrent coroutines and run them as one batch.
+
+    A batch is dispatched when `max_batch_size` items are queued or `max_wait_ms`
+    has passed since the first queued item, whichever comes first. The batch
+    function is blocking (e.g. an ONNX forward pass) and runs on a dedicated
+    worker thread so the event loop stays free.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 2.0,
+        workers: int = 1,
+    ):
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ner-batch")
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches = 0
+        self._items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch, loop)
+        return await future
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            # Skip callers that were cancelled while waiting
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if batch:
+                self._batches += 1
+                self._items += len(batch)
+                work = loop.run_in_executor(self._executor, self.fn, [item for item, _ in batch])
+                work.add_done_callback(lambda w, b=batch: self._resolve(b, w))
+            if len(self._pending) < self.max_batch_size:
+                break
+
+        if self._pending:
+            self._timer = loop.call_later(self.max_wait, self._dispatch, loop)
+
+    @staticmethod
+    def _resolve(batch: List[Tuple[Any, asyncio.Future]], work: asyncio.Future):
+        error = work.exception()
+        if error is not None:
+            logger.error(f"Micro-batch failed ({len(batch)} items): {error}")
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(error)
+            return
+        for (_, fut), result in zip(batch, work.result()):
+            if not fut.done():
+                fut.set_result(result)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "queued": len(self._pending),
+        }
+
+    def close(self):
+        """Fail requests still queued and stop the worker thread (running batches finish)."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        for _, fut in pending:
+            if not fut.done():
+                fut.set_exception(RuntimeError("NER batcher closed"))
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,160 @@
+"""NER entity detector — Phase 2: Legal-BERT token classification on CPU (ONNX Runtime).
+
+Structured identifiers (ID card, bank card, phone, email, case number) are
+still found by the regex engine, which is exact for them; the model adds
+free-form entities (PER / ORG / ADDR) that rules cannot catch. Concurrent
+requests share forward passes through MicroBatcher.
+"""
+
+import asyncio
+import bisect
+import json
+import os
+import re
+from typing import List, Tuple
+
+from app.core.ner.batching import MicroBatcher
+from app.core.ner.detector import NERDetector
+
+Span = Tuple[str, int, int]  # (entity_type, start_pos, end_pos) within one segment
+
+# Model label suffix → entity type used in placeholders
+LABEL_MAP = {"PER": "PER", "ORG": "ORG", "LOC": "ADDR", "ADDR": "ADDR"}
+
+# Preferred segment boundaries (sentence ends)
+_SENTENCE = re.compile(r"[^。！？；\n]*[。！？；\n]?")
+
+
+class OnnxTokenClassifier:
+    """
+    BIO token-classification model exported to ONNX (e.g. via optimum).
+
+    model_dir must contain model.onnx, tokenizer.json and config.json (id2label).
+    """
+
+    def __init__(self, model_dir: str, max_seq_len: int = 256, num_threads: int = 0):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads  # 0 = let ORT decide
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_len)
+        self.tokenizer.enable_padding()
+        self.max_seq_len = max_seq_len
+
+        with open(os.path.join(model_dir, "config.json"), encoding="utf-8") as f:
+            id2label = json.load(f)["id2label"]
+        self.labels = [id2label[str(i)] for i in range(len(id2label))]
+
+    def predict(self, texts: List[str]) -> List[List[Span]]:
+        """Run one forward pass over a batch of texts; returns character spans per text."""
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(feeds["input_ids"])
+        logits = self.session.run(None, feeds)[0]
+        predictions = logits.argmax(axis=-1)
+        return [
+            self._decode(predictions[i], encodings[i].offsets, encodings[i].attention_mask)
+            for i in range(len(texts))
+        ]
+
+    def _decode(self, label_ids, offsets, attention_mask) -> List[Span]:
+        """Merge BIO token labels into (entity_type, start, end) character spans."""
+        spans: List[Span] = []
+        current = None  # [etype, start, end]
+        for label_id, (start, end), attended in zip(label_ids, offsets, attention_mask):
+            if not attended or start == end:  # padding / special tokens
+                continue
+            label = self.labels[label_id]
+            prefix, _, name = label.partition("-")
+            etype = LABEL_MAP.get(name)
+            if etype and prefix == "I" and current and current[0] == etype:
+                current[2] = end
+                continue
+            if current:
+                spans.append(tuple(current))
+                current = None
+            if etype:
+                current = [etype, start, end]
+        if current:
+            spans.append(tuple(current))
+        return spans
+
+
+class BertNERDetector:
+    """Detect PII with regex rules plus a token-classification model."""
+
+    def __init__(self, classifier, max_batch_size: int = 16, max_wait_ms: float = 2.0, segment_chars: int = 254):
+        self.classifier = classifier
+        self.rules = NERDetector()
+        self.segment_chars = segment_chars
+        self.batcher = MicroBatcher(classifier.predict, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    def detect(self, text: str) -> List[Tuple[str, str, int, int]]:
+        """Synchronous detection (no cross-request batching). Same contract as NERDetector.detect."""
+        segments = self._segments(text)
+        results = self.classifier.predict([seg for _, seg in segments]) if segments else []
+        return self._merge(text, segments, results)
+
+    def iter_entities(self, text: str):
+        """Entities in text order (same contract as NERDetector.iter_entities)."""
+        return reversed(self.detect(text))
+
+    async def adetect(self, text: str) -> List[Tuple[str, str, int, int]]:
+        """Detection with segments queued on the shared micro-batcher."""
+        segments = self._segments(text)
+        results = await asyncio.gather(*(self.batcher.submit(seg) for _, seg in segments))
+        return self._merge(text, segments, results)
+
+    def close(self):
+        self.batcher.close()
+
+    def _segments(self, text: str) -> List[Tuple[int, str]]:
+        """Split text into (offset, segment) pieces that fit the model's sequence length."""
+        limit = self.segment_chars
+        segments = []
+        start = 0
+        end = 0
+        for match in _SENTENCE.finditer(text):
+            if not match.group():
+                continue
+            if match.end() - start > limit and end > start:
+                segments.append((start, text[start:end]))
+                start = end
+            end = match.end()
+            # A single sentence longer than the limit is hard-split
+            while end - start > limit:
+                segments.append((start, text[start:start + limit]))
+                start += limit
+        if end > start:
+            segments.append((start, text[start:end]))
+        return segments
+
+    def _merge(self, text: str, segments, results) -> List[Tuple[str, str, int, int]]:
+        """Combine rule and model spans; rule spans win on overlap. Sorted by start descending."""
+        entities = list(self.rules.iter_entities(text))
+        # Rule spans are non-overlapping and in text order, so overlap is a bisect away
+        starts = [start for _, _, start, _ in entities]
+        ends = [end for _, _, _, end in entities]
+        for (offset, _), spans in zip(segments, results):
+            for etype, s, e in spans:
+                start, end = offset + s, offset + e
+                i = bisect.bisect_right(starts, start)
+                if (i > 0 and ends[i - 1] > start) or (i < len(starts) and starts[i] < end):
+                    continue
+                entities.append((etype, text[start:end], start, end))
+        entities.sort(key=lambda x: x[2], reverse=True)
+        return entities
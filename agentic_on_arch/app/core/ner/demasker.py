@@ -1,7 +1,24 @@
 """NER Demasker — restores original PII after LLM response."""
 
+import re
+import time
 from typing import Dict
 
+from app.utils.metrics import NER_DEMASK, current_route
+
+# Placeholder produced by NERMasker, e.g. [PER-001], [ID_CARD-012]
+PLACEHOLDER_PATTERN = re.compile(r"\[[A-Z_]{1,16}-\d{1,6}\]")
+
+# An unfinished placeholder at the very end of a chunk, e.g. "[", "[PER", "[PER-0"
+_PARTIAL_TAIL = re.compile(r"\[(?:[A-Z_]{1,16}(?:-\d{0,6})?)?\Z")
+
+
+def _substitute(text: str, mapping: Dict[str, str]) -> str:
+    """Replace every known placeholder in one regex pass; unknown ones are left as-is."""
+    if "[" not in text:
+        return text
+    return PLACEHOLDER_PATTERN.sub(lambda m: mapping.get(m.group(), m.group()), text)
+
 
 class NERDemasker:
     """Restore placeholder tokens back to original PII values."""
@@ -14,7 +31,48 @@ class NERDemasker:
             text: LLM response text containing placeholders like [PER-001]
             mapping: {placeholder: original_value} from NERMasker
         """
-        result = text
-        for placeholder, original in mapping.items():
-            result = result.replace(placeholder, original)
-        return result
+        t0 = time.perf_counter()
+        restored = _substitute(text, mapping)
+        NER_DEMASK.observe(time.perf_counter() - t0, route=current_route())
+        return restored
+
+    def streaming(self, mapping: Dict[str, str]) -> "StreamingDemasker":
+        """Return a stateful demasker for one SSE stream."""
+        return StreamingDemasker(mapping)
+
+
+class StreamingDemasker:
+    """
+    Incremental demasker for chunked LLM output.
+
+    A placeholder split across chunks (e.g. "...[PER-0" + "01]...") is held
+    back until the next chunk completes it. Call flush() after the last chunk
+    to release whatever is still pending.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = mapping
+        self._pending = ""
+        self._elapsed = 0.0  # time spent in feed(), reported once at flush()
+
+    def feed(self, chunk: str) -> str:
+        """Return the demasked text that is safe to emit now (may be empty)."""
+        t0 = time.perf_counter()
+        text = self._pending + chunk if self._pending else chunk
+        tail = _PARTIAL_TAIL.search(text, max(0, len(text) - 24))
+        if tail:
+            self._pending = text[tail.start():]
+            text = text[:tail.start()]
+        else:
+            self._pending = ""
+        restored = _substitute(text, self.mapping)
+        self._elapsed += time.perf_counter() - t0
+        return restored
+
+    def flush(self) -> str:
+        """Return any held-back text at end of stream."""
+        t0 = time.perf_counter()
+        text, self._pending = self._pending, ""
+        restored = _substitute(text, self.mapping)
+        NER_DEMASK.observe(self._elapsed + time.perf_counter() - t0, route=current_route())
+        return restored
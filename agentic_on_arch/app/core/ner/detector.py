@@ -3,44 +3,96 @@
 Detects personally identifiable information (PII) in Chinese legal text:
 - 人名 (PER), 身份证号 (ID), 银行卡号 (BANK), 手机号 (PHONE),
   地址 (ADDR), 公司名 (ORG), 案号 (CASE_NO)
+
+All rules are compiled into one engine that scans the text in a single
+left-to-right pass and returns non-overlapping spans.
 """
 
 import re
-from typing import List, Tuple
+import string
+from typing import Dict, Iterator, List, Tuple
+
+# Common Chinese surnames for name detection (simplified)
+SURNAMES = set("赵钱孙李周吴郑王冯陈褚卫蒋沈韩杨朱秦尤许何吕施张孔曹严华金魏陶姜戚谢邹喻柏水窦章云苏潘葛奚范彭郎鲁韦昌马苗凤花方俞任袁柳酆鲍史唐费廉岑薛雷贺倪汤滕殷罗毕郝邬安常乐于时傅皮卞齐康伍余元卜顾孟平黄")
+
+_EMAIL_CHARS = string.ascii_letters + string.digits + "._%+-"
 
-# Entity type → regex pattern
+# (entity_type, possible first characters, pattern for the rest of the match)
+#
+# Rules are listed in priority order: when several rules match at the same
+# position, the first one wins. Longer / more specific shapes come first so an
+# 18-digit ID card is not reported as a bank card, and the phone number inside
+# it is not reported at all.
+#
+# Lookbehinds run after the first character is consumed, hence the extra ".".
+RULES = (
+    ("CASE_NO", "(（", r"\d{4}[\)）][\u4e00-\u9fa5]+\d+号"),
+    # Only start at the beginning of a local-part run, so a run without "@"
+    # is rejected once instead of once per character.
+    ("EMAIL", _EMAIL_CHARS, r"(?<![a-zA-Z0-9._%+-].)[a-zA-Z0-9._%+-]*@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"),
+    # Exactly 18 characters: never the middle of a longer digit run (a 19-digit bank card)
+    ("ID_CARD", "123456789", r"(?<!\d.)\d{5}(?:19|20)\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01])\d{3}[\dXx](?!\d)"),
+    ("BANK_CARD", "123456789", r"\d{15,18}"),
+    ("PHONE", "1", r"[3-9]\d{9}"),
+    # Simple name detection (2-4 char after common surname)
+    ("PER", "".join(sorted(SURNAMES)), r"(?<=[：:，,。\s].)[\u4e00-\u9fa5]{1,3}(?=[，,。、\s])"),
+)
+
+# Entity type → standalone regex pattern (same semantics as the engine rule)
 PATTERNS = {
-    "PHONE": re.compile(r"1[3-9]\d{9}"),
-    "ID_CARD": re.compile(r"[1-9]\d{5}(?:19|20)\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01])\d{3}[\dXx]"),
-    "BANK_CARD": re.compile(r"[1-9]\d{15,18}"),
-    "EMAIL": re.compile(r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}"),
-    "CASE_NO": re.compile(r"[\(（]\d{4}[\)）][\u4e00-\u9fa5]+\d+号"),
+    etype: re.compile("[" + re.escape(first) + "]" + rest)
+    for etype, first, rest in RULES
 }
 
-# Common Chinese surnames for name detection (simplified)
-SURNAMES = set("赵钱孙李周吴郑王冯陈褚卫蒋沈韩杨朱秦尤许何吕施张孔曹严华金魏陶姜戚谢邹喻柏水窦章云苏潘葛奚范彭郎鲁韦昌马苗凤花方俞任袁柳酆鲍史唐费廉岑薛雷贺倪汤滕殷罗毕郝邬安常乐于时傅皮卞齐康伍余元卜顾孟平黄")
+
+def _compile_engine(rules) -> Tuple["re.Pattern", List[str]]:
+    """
+    Build one alternation that dispatches on the first character.
+
+    Every top-level branch starts with a literal character, which lets the
+    regex engine skip non-candidate characters (most of a Chinese document)
+    in C instead of trying every rule at every position. Returns the compiled
+    pattern and a table mapping capture-group index → entity type.
+    """
+    by_char: Dict[str, List[int]] = {}
+    for i, (_, first, _) in enumerate(rules):
+        for ch in first:
+            by_char.setdefault(ch, []).append(i)
+
+    branches = []
+    group_types = [""]  # group 0 is the whole match
+    for ch, rule_ids in by_char.items():
+        alternatives = []
+        for i in rule_ids:
+            etype, _, rest = rules[i]
+            alternatives.append(f"({rest})")
+            group_types.append(etype)
+        branches.append(re.escape(ch) + "(?:" + "|".join(alternatives) + ")")
+
+    return re.compile("|".join(branches)), group_types
+
+
+ENGINE, _GROUP_TYPES = _compile_engine(RULES)
 
 
 class NERDetector:
     """Detect PII entities in text using regex patterns."""
 
+    def iter_entities(self, text: str) -> Iterator[Tuple[str, str, int, int]]:
+        """Yield non-overlapping (entity_type, entity_value, start_pos, end_pos) in text order."""
+        types = _GROUP_TYPES
+        for match in ENGINE.finditer(text):
+            yield types[match.lastindex], match.group(), match.start(), match.end()
+
     def detect(self, text: str) -> List[Tuple[str, str, int, int]]:
         """
         Returns list of (entity_type, entity_value, start_pos, end_pos).
         Sorted by start position descending (for safe replacement).
         """
-        entities = []
-
-        # Regex-based detection
-        for etype, pattern in PATTERNS.items():
-            for match in pattern.finditer(text):
-                entities.append((etype, match.group(), match.start(), match.end()))
-
-        # Simple name detection (2-4 char after common surname)
-        name_pattern = re.compile(r"(?<=[：:，,。\s])([" + "".join(SURNAMES) + r"][\u4e00-\u9fa5]{1,3})(?=[，,。、\s])")
-        for match in name_pattern.finditer(text):
-            entities.append(("PER", match.group(), match.start(), match.end()))
-
-        # Sort by start position descending for safe replacement
-        entities.sort(key=lambda x: x[2], reverse=True)
+        entities = list(self.iter_entities(text))
+        entities.reverse()
         return entities
+
+    async def adetect(self, text: str) -> List[Tuple[str, str, int, int]]:
+        """Async counterpart of detect() so callers can swap in a batched model detector."""
+        return self.detect(text)
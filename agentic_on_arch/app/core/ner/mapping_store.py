@@ -1,36 +1,233 @@
-"""Encrypted mapping store for De-ID / Re-ID sessions."""
+"""Encrypted mapping store for De-ID / Re-ID sessions.
 
+Mappings are serialized, encrypted with AES-256-GCM and kept in a pluggable
+backend:
+- MemoryBackend: in-process LRU with sliding TTL and a byte budget
+- RedisBackend: shared across uvicorn workers (any Redis-protocol server)
+"""
+
+import asyncio
+import base64
 import hashlib
 import json
+import os
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Dict, Optional
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app.config import settings
 from app.utils.logger import logger
 
+_NONCE_BYTES = 12
+_ENTRY_OVERHEAD = 96  # approximate per-entry bookkeeping cost in bytes
+
+
+class MappingBackend(ABC):
+    """Key → encrypted blob storage. TTL is sliding: a read renews the entry."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    def stats(self) -> Dict[str, float]:
+        return {}
+
+
+class MemoryBackend(MappingBackend):
+    """
+    In-process LRU store bounded by entry count and total bytes.
+
+    Every entry has the same sliding TTL, so LRU order is also expiry order:
+    expired entries are always at the head and are swept in O(1) amortized.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int, max_entries: int = 100_000):
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key → (expires_at, value)
+        self._bytes = 0
+        self._evicted_ttl = 0
+        self._evicted_lru = 0
+
+    @staticmethod
+    def _size(key: str, value: bytes) -> int:
+        return len(key) + len(value) + _ENTRY_OVERHEAD
+
+    def _remove(self, key: str):
+        _, value = self._data.pop(key)
+        self._bytes -= self._size(key, value)
+
+    def _sweep_expired(self, now: float):
+        while self._data:
+            key, (expires_at, _) = next(iter(self._data.items()))
+            if expires_at > now:
+                break
+            self._remove(key)
+            self._evicted_ttl += 1
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        expires_at, value = entry
+        if expires_at <= now:
+            self._remove(key)
+            self._evicted_ttl += 1
+            return None
+        self._data[key] = (now + self.ttl, value)
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes):
+        now = time.monotonic()
+        if key in self._data:
+            self._remove(key)
+        self._sweep_expired(now)
+        self._data[key] = (now + self.ttl, value)
+        self._bytes += self._size(key, value)
+        while self._data and (self._bytes > self.max_bytes or len(self._data) > self.max_entries):
+            oldest = next(iter(self._data))
+            if oldest == key:  # a single entry larger than the budget is still kept
+                break
+            self._remove(oldest)
+            self._evicted_lru += 1
+
+    async def delete(self, key: str):
+        if key in self._data:
+            self._remove(key)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "evicted_ttl": self._evicted_ttl,
+            "evicted_lru": self._evicted_lru,
+        }
+
+
+class RedisBackend(MappingBackend):
+    """Redis-protocol backend; expiry and memory eviction are handled by the server."""
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "ner:map:"):
+        import redis.asyncio as redis
+        self.client = redis.from_url(url)
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.getex(self.prefix + key, px=self.ttl_ms)
+
+    async def set(self, key: str, value: bytes):
+        await self.client.set(self.prefix + key, value, px=self.ttl_ms)
+
+    async def delete(self, key: str):
+        await self.client.delete(self.prefix + key)
+
+
+def _load_key() -> bytes:
+    """AES-256 key from NER_MAPPING_KEY (base64), or derived from JWT_SECRET in dev."""
+    if settings.NER_MAPPING_KEY:
+        key = base64.b64decode(settings.NER_MAPPING_KEY)
+        if len(key) != 32:
+            raise ValueError("NER_MAPPING_KEY must be 32 bytes (base64-encoded)")
+        return key
+    if settings.ENV == "prod":
+        logger.warning("NER_MAPPING_KEY not set — deriving mapping key from JWT_SECRET")
+    return hashlib.sha256(f"ner-mapping:{settings.JWT_SECRET}".encode()).digest()
+
+
+def _build_backend() -> MappingBackend:
+    if settings.NER_MAPPING_BACKEND == "memory":
+        return MemoryBackend(settings.NER_MAPPING_TTL_SECONDS, settings.NER_MAPPING_MAX_BYTES)
+    if settings.NER_MAPPING_BACKEND == "redis":
+        return RedisBackend(settings.NER_MAPPING_REDIS_URL, settings.NER_MAPPING_TTL_SECONDS)
+    raise ValueError(f"Unknown mapping backend: {settings.NER_MAPPING_BACKEND}")
+
 
 class MappingStore:
     """
     Session-scoped encrypted mapping store.
-    In production, this should use Redis or DB with AES-256 encryption.
-    Currently uses in-memory dict for development.
+
+    Values are AES-256-GCM encrypted with the session key as associated data,
+    so a blob cannot be replayed under another session.
     """
 
-    def __init__(self):
-        self._sessions: Dict[str, Dict[str, str]] = {}
+    def __init__(self, backend: MappingBackend = None, key: bytes = None):
+        self.backend = backend or _build_backend()
+        self._aead = AESGCM(key or _load_key())
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def lock(self, user_id: int, conversation_id: int) -> asyncio.Lock:
+        """
+        Per-session lock for retrieve → extend → store, so concurrent turns of one
+        conversation do not number new entities from the same stored mapping.
+        In-process only: with RedisBackend, turns of one conversation on
+        different workers are not serialized.
+        """
+        key = self._session_key(user_id, conversation_id)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
 
     def _session_key(self, user_id: int, conversation_id: int) -> str:
         return hashlib.sha256(f"{user_id}:{conversation_id}".encode()).hexdigest()
 
-    def store(self, user_id: int, conversation_id: int, mapping: Dict[str, str]):
+    def _encrypt(self, key: str, mapping: Dict[str, str]) -> bytes:
+        nonce = os.urandom(_NONCE_BYTES)
+        plaintext = json.dumps(mapping, ensure_ascii=False, separators=(",", ":")).encode()
+        return nonce + self._aead.encrypt(nonce, plaintext, key.encode())
+
+    def _decrypt(self, key: str, blob: bytes) -> Dict[str, str]:
+        plaintext = self._aead.decrypt(blob[:_NONCE_BYTES], blob[_NONCE_BYTES:], key.encode())
+        return json.loads(plaintext)
+
+    async def store(self, user_id: int, conversation_id: int, mapping: Dict[str, str]):
         key = self._session_key(user_id, conversation_id)
-        self._sessions[key] = mapping
+        await self.backend.set(key, self._encrypt(key, mapping))
+        self._stores += 1
         logger.debug(f"NER mapping stored: {len(mapping)} entities for session {key[:8]}...")
 
-    def retrieve(self, user_id: int, conversation_id: int) -> Optional[Dict[str, str]]:
+    async def retrieve(self, user_id: int, conversation_id: int) -> Optional[Dict[str, str]]:
         key = self._session_key(user_id, conversation_id)
-        return self._sessions.get(key)
+        blob = await self.backend.get(key)
+        if blob is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return self._decrypt(key, blob)
 
-    def clear(self, user_id: int, conversation_id: int):
+    async def clear(self, user_id: int, conversation_id: int):
         key = self._session_key(user_id, conversation_id)
-        self._sessions.pop(key, None)
+        await self.backend.delete(key)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "stores": self._stores,
+            **self.backend.stats(),
+        }
 
 
 # Global singleton
@@ -1,37 +1,105 @@
 """NER Masker — de-identifies PII before sending to LLM."""
 
-from typing import Dict, Tuple
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
 from app.core.ner.detector import NERDetector
+from app.utils.metrics import NER_MASK, current_route
 
 
 class NERMasker:
     """Replace PII entities with placeholder tokens."""
 
-    def __init__(self):
-        self.detector = NERDetector()
+    def __init__(self, detector=None):
+        # NERDetector (regex) or BertNERDetector — see app.core.ner.get_detector
+        self.detector = detector or NERDetector()
 
-    def mask(self, text: str) -> Tuple[str, Dict[str, str]]:
+    def mask(self, text: str, mapping: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, str]]:
         """
         Mask all PII in text.
 
+        Args:
+            mapping: existing mapping to extend in place (e.g. the conversation's
+                mapping from MappingStore), so known values keep their placeholders
+
         Returns:
             (masked_text, mapping): mapping is {placeholder: original_value}
             e.g. {"[PER-001]": "张三", "[PHONE-001]": "13812345678"}
         """
-        entities = self.detector.detect(text)
-        mapping = {}
-        counters = {}
-        masked = text
+        t0 = time.perf_counter()
+        mapping = {} if mapping is None else mapping
+        index, counters = self._reverse_index(mapping)
+        masked = self._mask_into(text, self.detector.iter_entities(text), mapping, index, counters)
+        NER_MASK.observe(time.perf_counter() - t0, route=current_route())
+        return masked, mapping
 
+    async def amask(self, text: str, mapping: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, str]]:
+        """Async variant of mask() — lets a model-based detector batch across requests."""
+        t0 = time.perf_counter()
+        entities = await self.detector.adetect(text)
+        mapping = {} if mapping is None else mapping
+        index, counters = self._reverse_index(mapping)
+        masked = self._mask_into(text, reversed(entities), mapping, index, counters)
+        NER_MASK.observe(time.perf_counter() - t0, route=current_route())
+        return masked, mapping
+
+    def mask_many(self, texts: Iterable[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Mask a batch of texts (e.g. paragraphs / RAG chunks) with one shared mapping.
+
+        The same value gets the same placeholder in every text of the batch.
+
+        Returns:
+            (masked_texts, mapping): masked_texts is in input order
+        """
+        mapping: Dict[str, str] = {}
+        index: Dict[str, str] = {}
+        counters: Dict[str, int] = {}
+        masked = [
+            self._mask_into(text, self.detector.iter_entities(text), mapping, index, counters)
+            for text in texts
+        ]
+        return masked, mapping
+
+    @staticmethod
+    def _reverse_index(mapping: Dict[str, str]) -> Tuple[Dict[str, str], Dict[str, int]]:
+        """Rebuild {value: placeholder} and per-type counters from an existing mapping."""
+        index: Dict[str, str] = {}
+        counters: Dict[str, int] = {}
+        for placeholder, value in mapping.items():
+            index[value] = placeholder
+            etype, _, number = placeholder[1:-1].rpartition("-")
+            counters[etype] = max(counters.get(etype, 0), int(number))
+        return index, counters
+
+    @staticmethod
+    def _mask_into(
+        text: str,
+        entities: Iterable[Tuple[str, str, int, int]],
+        mapping: Dict[str, str],
+        index: Dict[str, str],
+        counters: Dict[str, int],
+    ) -> str:
+        """
+        Mask one text in a single pass, extending mapping / index / counters in place.
+
+        entities must be non-overlapping and in text order.
+        index is the reverse {original_value: placeholder} view of mapping.
+        """
+        parts = []
+        pos = 0
         for etype, value, start, end in entities:
-            if value in [v for v in mapping.values()]:
-                # Same entity appeared before, reuse the same placeholder
-                placeholder = [k for k, v in mapping.items() if v == value][0]
-            else:
+            placeholder = index.get(value)
+            if placeholder is None:
+                # First occurrence of this value, allocate a new placeholder
                 counters[etype] = counters.get(etype, 0) + 1
                 placeholder = f"[{etype}-{counters[etype]:03d}]"
                 mapping[placeholder] = value
+                index[value] = placeholder
+            parts.append(text[pos:start])
+            parts.append(placeholder)
+            pos = end
 
-            masked = masked[:start] + placeholder + masked[end:]
-
-        return masked, mapping
+        if not parts:
+            return text
+        parts.append(text[pos:])
+        return "".join(parts)
@@ -13,8 +13,27 @@ from app.utils.logger import logger
 async def lifespan(app: FastAPI):
     """Startup / shutdown lifecycle."""
     logger.info(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} starting ({settings.ENV})")
+    # Load the NER detector up front (BERT mode loads the ONNX model here)
+    from app.core.ner import get_detector
+    get_detector()
+    logger.info(f"NER detector ready (mode={settings.NER_MODE})")
+    # Create LLM adapters once and warm their keep-alive pools
+    from app.core.llm import init_llms, close_llms
+    await init_llms()
     yield
     logger.info("👋 Shutting down")
+    from app.utils.resumable import close_streams
+    close_streams()
+    # Write-behind chat messages still buffered
+    from app.services.chat_history import close_message_writer
+    await close_message_writer()
+    from app.core.documents.docx import close_docx_pool
+    close_docx_pool()
+    from app.services.parse_store import close_parse_store
+    close_parse_store()
+    from app.core.ner import close_detector
+    close_detector()
+    await close_llms()
 
 
 def create_app() -> FastAPI:
@@ -33,8 +52,13 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Stream-ID"],  # resumable SSE streams
     )
 
+    # --- Metrics route label (pure ASGI, safe for SSE) ---
+    from app.utils.metrics import RouteMiddleware
+    app.add_middleware(RouteMiddleware)
+
     # --- Exception handlers ---
     register_exception_handlers(app)
 
@@ -48,6 +72,8 @@ def create_app() -> FastAPI:
     app.include_router(bidding.router, prefix="/api/bidding", tags=["投标"])
 
     # --- Health check ---
+    from app.core.llm import llm_cache_stats, llm_pool_stats
+
     @app.get("/health", tags=["系统"])
     async def health():
         return {
@@ -55,8 +81,18 @@ def create_app() -> FastAPI:
             "app": settings.APP_NAME,
             "version": settings.APP_VERSION,
             "env": settings.ENV,
+            "llm": llm_pool_stats(),
+            "llm_cache": llm_cache_stats(),
         }
 
+    # --- Prometheus metrics ---
+    from fastapi.responses import PlainTextResponse
+    from app.utils.metrics import REGISTRY
+
+    @app.get("/metrics", tags=["系统"], response_class=PlainTextResponse)
+    async def metrics():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
     return app
 
 
@@ -1,7 +1,8 @@
 """Auth service — JWT token creation and password hashing."""
 
 from datetime import datetime, timedelta, timezone
-from jose import jwt
+from typing import Optional
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.config import settings
@@ -30,3 +31,14 @@ def create_token(user_id: int, username: str, role: str) -> str:
 
 def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+
+def token_user_id(authorization: Optional[str]) -> Optional[int]:
+    """User id from an `Authorization: Bearer <token>` header; None if absent or invalid."""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return int(decode_token(token.strip())["sub"])
+    except (JWTError, KeyError, ValueError):
+        return None
@@ -0,0 +1,206 @@
+"""Parallel chapter-wise generation of bidding documents.
+
+The single-call generation streams all chapters of BIDDING_SYSTEM_PROMPT one
+after another, so wall-clock time grows with the total document length.
+generate_chapters() instead starts one LLM stream per chapter, at most
+BIDDING_GENERATE_CONCURRENCY at a time (earlier chapters first), all sharing
+the same system prompt and bidder context as their prompt prefix, and
+yields one text stream in chapter order:
+
+- the chapter at the head streams through live; later chapters are buffered
+  and flushed the moment the chapters before them finish
+- the document title, chapter headings and `---` separators are emitted
+  locally, so the first content reaches the client before any model output
+- a failed chapter is retried on its own (BIDDING_GENERATE_RETRIES); text it
+  already produced is kept and the retry is asked to continue after it, so
+  nothing already sent to the client is repeated or lost
+
+generate_from_template() runs a rendered template (app.services.bidding_template)
+through the same ordered_stream(): its fixed, field-driven text is yielded
+as is and only the free-form slots are LLM streams, so most of the document
+arrives at once and the model writes a few paragraphs instead of all of it.
+
+Both return a plain chunk iterator, usable with open_stream() / sse_stream()
+like a single llm.stream().
+"""
+
+import asyncio
+import re
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from app.config import settings
+from app.core.llm.base import BaseLLM
+from app.utils.logger import logger
+
+_DONE = object()
+_HEADING_LINE = re.compile(r"^\s*(#{1,2}\s|---)")  # title / chapter heading / separator; ### sections are content
+_MAX_FIRST_LINE = 200  # characters held back while checking a line for a repeated heading
+
+
+class Chapter(NamedTuple):
+    number: str  # 一, 二, ...
+    title: str
+    brief: str  # what the chapter contains
+
+    @property
+    def heading(self) -> str:
+        return f"## {self.number}、{self.title}"
+
+
+class Slot(NamedTuple):
+    """Free-form part of a rendered template, written by the LLM."""
+    chapter: str  # heading text of the chapter it sits in, e.g. 一、投标函
+    section: str  # heading text of its ### section ("" directly under the chapter)
+    instruction: str
+
+
+class GenerationError(RuntimeError):
+    def __init__(self, label: str, cause: Exception):
+        super().__init__(f"{label} 生成失败: {cause}")
+        self.label = label
+
+
+_NO_EXTRAS = "不要输出文档总标题、章节或小节标题、`---` 分隔线或其他章节的内容。"
+_CONTINUE = "\n\n本部分已输出以下内容（输出在此中断），请紧接其后继续输出剩余部分，不要重复已输出的内容：\n\n"
+
+
+def chapter_prompt(context: str, chapter: Chapter, produced: str = "") -> str:
+    prompt = (
+        f"{context}\n\n本次只生成第{chapter.number}章「{chapter.title}」（{chapter.brief}）。"
+        f"直接输出本章正文（可包含 ### 小节和表格），{_NO_EXTRAS}"
+    )
+    return prompt + _CONTINUE + produced if produced else prompt
+
+
+def slot_prompt(context: str, slot: Slot, produced: str = "") -> str:
+    where = f"「{slot.chapter}」中「{slot.section}」部分" if slot.section else f"「{slot.chapter}」中的一段正文"
+    prompt = (
+        f"{context}\n\n投标文件的其余部分已按模板生成。本次只撰写{where}：{slot.instruction}。"
+        f"直接输出该部分正文，{_NO_EXTRAS}"
+    )
+    return prompt + _CONTINUE + produced if produced else prompt
+
+
+async def _strip_heading(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Drop a leading title / chapter heading / separator the model repeats despite the prompt."""
+    head = ""
+    async for chunk in chunks:
+        if head is None:
+            yield chunk
+            continue
+        head += chunk
+        while head is not None:
+            stripped = head.lstrip()
+            if not stripped:
+                break
+            if stripped[0] not in "#-":
+                yield stripped  # ordinary text: no need to wait for the line to end
+                head = None
+                break
+            newline = stripped.find("\n")
+            if newline < 0 and len(stripped) < _MAX_FIRST_LINE:
+                break  # heading-like line not complete yet
+            if newline >= 0 and _HEADING_LINE.match(stripped):
+                head = stripped[newline + 1:]
+                continue
+            yield stripped
+            head = None
+    if head:
+        yield head.lstrip()
+
+
+# An LLM-written part: a label (logs / errors) and its prompt given the text already produced
+LLMPart = Tuple[str, Callable[[str], str]]
+
+
+async def ordered_stream(
+    llm: BaseLLM,
+    system: str,
+    parts: Sequence[Union[str, LLMPart]],
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield `parts` in order: text as is, LLM parts as streams that all start at once.
+
+    Text before the first LLM part goes out immediately; an LLM part streams
+    live once everything before it is out, and is buffered until then.
+    """
+    limit = asyncio.Semaphore(concurrency or settings.BIDDING_GENERATE_CONCURRENCY)
+    retries = settings.BIDDING_GENERATE_RETRIES if retries is None else retries
+
+    async def run(label: str, prompt: Callable[[str], str], out: asyncio.Queue):
+        produced: List[str] = []
+        async with limit:
+            for attempt in range(retries + 1):
+                try:
+                    stream = llm.stream(prompt("".join(produced)), system=system)
+                    async for chunk in _strip_heading(stream) if not produced else stream:
+                        produced.append(chunk)
+                        out.put_nowait(chunk)
+                    out.put_nowait(_DONE)
+                    return
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if attempt == retries:
+                        out.put_nowait(GenerationError(label, e))
+                        return
+                    logger.warning(
+                        f"Generation of {label} failed (attempt {attempt + 1}, "
+                        f"{sum(map(len, produced))} chars kept): {e}"
+                    )
+
+    # Started in document order: with fewer slots than parts, the head goes first
+    queues: Dict[int, asyncio.Queue] = {i: asyncio.Queue() for i, part in enumerate(parts) if not isinstance(part, str)}
+    tasks = [asyncio.ensure_future(run(*parts[i], queue)) for i, queue in queues.items()]
+    try:
+        for i, part in enumerate(parts):
+            if isinstance(part, str):
+                yield part
+                continue
+            while True:
+                item = await queues[i].get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        # Client gone or a part failed for good: stop the other streams
+        for task in tasks:
+            task.cancel()
+
+
+def generate_chapters(
+    llm: BaseLLM,
+    system: str,
+    context: str,
+    chapters: Sequence[Chapter],
+    title: str,
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """Generate `chapters` concurrently; yield the document (title, chapters) in order."""
+    parts: List[Union[str, LLMPart]] = [f"# {title}\n\n"]
+    for i, chapter in enumerate(chapters):
+        parts.append(("\n\n---\n\n" if i else "") + f"{chapter.heading}\n\n")
+        parts.append((f"{chapter.number}、{chapter.title}", partial(chapter_prompt, context, chapter)))
+    return ordered_stream(llm, system, parts, concurrency, retries)
+
+
+def generate_from_template(
+    llm: BaseLLM,
+    system: str,
+    context: str,
+    rendered: Sequence[Union[str, Slot]],
+    concurrency: Optional[int] = None,
+    retries: Optional[int] = None,
+) -> AsyncIterator[str]:
+    """Stream a rendered template (app.services.bidding_template); only its slots call the LLM."""
+    parts: List[Union[str, LLMPart]] = [
+        part if isinstance(part, str) else (f"{part.chapter} {part.section}".strip(), partial(slot_prompt, context, part))
+        for part in rendered
+    ]
+    return ordered_stream(llm, system, parts, concurrency, retries)
@@ -0,0 +1,147 @@
+"""Deterministic template pre-fill for bidding documents.
+
+Most of the 商务分册 is boilerplate plus field substitution from
+BiddingRequest (tables, declarations, signature blocks). A template
+(BIDDING_TEMPLATE_PATH, Markdown) renders those locally; the LLM is only
+asked for the free-form slots the template marks.
+
+Syntax (a small Mustache subset, no dependency):
+
+- `{{field}}` — the value; empty → 【待填写】, or `{{field|默认文本}}`
+- `{{#field}}…{{/field}}` — rendered when the value is non-empty; for a list,
+  once per item with `{{.}}` (the item) and `{{@n}}` (1-based index)
+- `{{^field}}…{{/field}}` — rendered when the value is empty
+- `{{llm|说明}}` — a free-form slot written by the LLM following 说明; it
+  knows its chapter (`## `) and section (`### `) from the headings above it
+
+Section tags alone on a line take the line with them. Values are escaped for
+Markdown tables (`|`) and joined onto one line.
+"""
+
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from app.config import settings
+from app.services.bidding_generator import Slot
+
+MISSING = "【待填写】"
+
+_STANDALONE = re.compile(r"^[ \t]*(\{\{[#^/][^}]*\}\})[ \t]*\n", re.MULTILINE)
+_TAG = re.compile(r"\{\{\s*([#^/]?)\s*([^}|]+?)\s*(?:\|([^}]*))?\}\}")
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+class _Var(NamedTuple):
+    name: str
+    default: Optional[str]
+
+
+class _Section(NamedTuple):
+    name: str
+    inverted: bool
+    children: list
+
+
+class _LLM(NamedTuple):
+    instruction: str
+
+
+Node = Union[str, _Var, _Section, _LLM]
+
+
+def parse(template: str) -> List[Node]:
+    """Template text → node tree (raises ValueError on unbalanced sections)."""
+    template = _STANDALONE.sub(r"\1", template)
+    root: List[Node] = []
+    stack: List[Tuple[str, List[Node]]] = [("", root)]
+    position = 0
+    for match in _TAG.finditer(template):
+        if match.start() > position:
+            stack[-1][1].append(template[position:match.start()])
+        position = match.end()
+        kind, name, default = match.group(1), match.group(2), match.group(3)
+        if kind in ("#", "^"):
+            section = _Section(name, kind == "^", [])
+            stack[-1][1].append(section)
+            stack.append((name, section.children))
+        elif kind == "/":
+            if stack[-1][0] != name:
+                raise ValueError(f"Unexpected {{{{/{name}}}}} (open: {stack[-1][0] or 'none'})")
+            stack.pop()
+        elif name == "llm":
+            stack[-1][1].append(_LLM((default or "").strip()))
+        else:
+            stack[-1][1].append(_Var(name, default))
+    if len(stack) > 1:
+        raise ValueError(f"Unclosed {{{{#{stack[-1][0]}}}}}")
+    if position < len(template):
+        root.append(template[position:])
+    return root
+
+
+def _format(value) -> str:
+    return " ".join(str(value).split()).replace("|", "\\|")
+
+
+def _empty(value) -> bool:
+    if isinstance(value, (str, list, tuple)):
+        return not any(str(v).strip() for v in value)
+    return not value
+
+
+def render(nodes: Sequence[Node], values: Dict[str, object]) -> List[Union[str, Slot]]:
+    """Render to text runs and LLM slots, in document order (adjacent text merged)."""
+    out: List[Union[str, Slot]] = []
+    headings = {"##": "", "###": ""}
+
+    def emit(text: str):
+        for line in text.splitlines():
+            if line.startswith("## "):
+                headings["##"], headings["###"] = line[3:].strip(), ""
+            elif line.startswith("### "):
+                headings["###"] = line[4:].strip()
+        if out and isinstance(out[-1], str):
+            out[-1] += text
+        else:
+            out.append(text)
+
+    def walk(nodes: Sequence[Node], scope: Dict[str, object]):
+        for node in nodes:
+            if isinstance(node, str):
+                emit(node)
+            elif isinstance(node, _Var):
+                value = scope.get(node.name)
+                emit(_format(value) if not _empty(value) else (node.default if node.default is not None else MISSING))
+            elif isinstance(node, _LLM):
+                out.append(Slot(headings["##"], headings["###"], node.instruction))
+            elif _empty(scope.get(node.name)) == node.inverted:
+                value = scope.get(node.name)
+                if isinstance(value, (list, tuple)) and not node.inverted:
+                    items = [v for v in value if str(v).strip()]
+                    for n, item in enumerate(items, 1):
+                        walk(node.children, {**scope, ".": item, "@n": n})
+                else:
+                    walk(node.children, scope)
+
+    walk(nodes, values)
+    return [_BLANK_LINES.sub("\n\n", part) if isinstance(part, str) else part for part in out]
+
+
+_cache: Dict[str, Tuple[float, List[Node]]] = {}
+
+
+def load_template(path: Optional[str] = None) -> List[Node]:
+    """Parsed template file (re-read when it changes on disk)."""
+    path = path or settings.BIDDING_TEMPLATE_PATH
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding="utf-8") as f:
+            cached = _cache[path] = (mtime, parse(f.read()))
+    return cached[1]
+
+
+def lines(text: Optional[str]) -> List[str]:
+    """Newline-separated request field (parsed requirements / risks) → list items."""
+    return [line.strip().lstrip("-*•").strip() for line in (text or "").splitlines() if line.strip()]
@@ -0,0 +1,270 @@
+"""Chat persistence — write-behind buffer for Message rows.
+
+The chat stream must not wait on the database. Finished turns are handed to
+MessageWriter.enqueue(), which only appends to an in-memory buffer; a
+background task batch-inserts the buffered rows when CHAT_PERSIST_BATCH_SIZE
+rows are pending or CHAT_PERSIST_FLUSH_MS after the first one, so N
+concurrent chats cost one INSERT round trip per batch instead of one commit
+per message. The buffer is flushed on shutdown (close_message_writer in the
+lifespan) and is bounded by CHAT_PERSIST_MAX_PENDING (oldest rows dropped).
+
+New conversations need an id before their first message can be written;
+create_conversation() is started alongside the LLM call so its round trip
+overlaps the model's time to first token. A conversation_id sent by the
+client is checked the same way (one SELECT by primary key and owner); an id
+the user does not own starts a new conversation instead. A new conversation
+whose first turn fails is deleted again (discard_conversation).
+
+Persistence is best effort: database errors are logged and never reach the
+chat response.
+"""
+
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, insert, select
+
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import CHAT_PERSIST_BATCH, CHAT_PERSIST_DROPPED, CHAT_PERSIST_PENDING, REGISTRY
+from app.utils.tokens import estimate_tokens
+
+Sink = Callable[[List[dict]], Awaitable[None]]
+
+
+async def create_conversation(user_id: int, title: str, agent_id: Optional[int] = None) -> int:
+    from app.extensions import async_session_factory
+    from app.models.conversation import Conversation
+
+    async with async_session_factory() as session:
+        conversation = Conversation(user_id=user_id, title=title[:256] or "新对话", agent_id=agent_id)
+        session.add(conversation)
+        await session.commit()
+        return conversation.id
+
+
+async def insert_messages(rows: List[dict]):
+    """One transaction, one multi-row INSERT (SQLAlchemy insertmanyvalues)."""
+    from app.extensions import async_session_factory
+    from app.models.conversation import Message
+
+    async with async_session_factory() as session:
+        await session.execute(insert(Message), rows)
+        await session.commit()
+
+
+async def is_owner(conversation_id: int, user_id: int) -> bool:
+    from app.extensions import async_session_factory
+    from app.models.conversation import Conversation
+
+    async with async_session_factory() as session:
+        found = await session.scalar(
+            select(Conversation.id).where(Conversation.id == conversation_id, Conversation.user_id == user_id)
+        )
+        return found is not None
+
+
+async def delete_conversation(conversation_id: int):
+    from app.extensions import async_session_factory
+    from app.models.conversation import Conversation
+
+    try:
+        async with async_session_factory() as session:
+            await session.execute(delete(Conversation).where(Conversation.id == conversation_id))
+            await session.commit()
+    except Exception as e:
+        logger.warning(f"Deleting empty conversation {conversation_id} failed: {e}")
+
+
+async def ensure_conversation(conversation_id: Optional[int], user_id: int, title: str, agent_id: Optional[int] = None) -> Optional[int]:
+    """
+    The given id if it is one of the user's conversations, else a newly
+    created conversation's id; None if the database is unavailable.
+    """
+    try:
+        if conversation_id is not None:
+            if await is_owner(conversation_id, user_id):
+                return conversation_id
+            logger.warning(f"Conversation {conversation_id} does not belong to user {user_id}, starting a new one")
+        return await create_conversation(user_id, title, agent_id)
+    except Exception as e:
+        logger.warning(f"Resolving conversation failed, turn will not be persisted: {e}")
+        return None
+
+
+def start_conversation(conversation_id: Optional[int], user_id: int, title: str, agent_id: Optional[int] = None) -> "asyncio.Future":
+    """Resolve the conversation id in the background, overlapping the LLM call."""
+    return asyncio.ensure_future(ensure_conversation(conversation_id, user_id, title, agent_id))
+
+
+def discard_conversation(conversation: "asyncio.Future", requested_id: Optional[int]):
+    """
+    The turn failed before anything was persisted: delete the conversation if
+    this request created it, so a failed first turn leaves no empty row.
+    """
+    def on_resolved(f: "asyncio.Future"):
+        if not f.cancelled() and f.result() is not None and f.result() != requested_id:
+            asyncio.ensure_future(delete_conversation(f.result()))
+
+    conversation.add_done_callback(on_resolved)
+
+
+async def persist_turn(
+    conversation: "asyncio.Future",
+    user_text: str,
+    assistant_text: str,
+    prompt_tokens: int,
+    output_tokens: int,
+    **metadata,
+) -> Optional[int]:
+    """
+    Buffer one user / assistant exchange; returns the conversation id.
+
+    The conversation has been resolving since the LLM call started, so this
+    rarely waits. The client needs the id for its next turn, so a slow
+    database is given CHAT_PERSIST_CONVERSATION_WAIT_MS; after that the rows
+    are buffered once it resolves and None is returned.
+    """
+    def enqueue(conversation_id: Optional[int]):
+        if conversation_id is not None:
+            get_message_writer().enqueue([
+                message_row(conversation_id, "user", user_text, prompt_tokens),
+                message_row(conversation_id, "assistant", assistant_text, output_tokens, **metadata),
+            ])
+
+    if not conversation.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(conversation), settings.CHAT_PERSIST_CONVERSATION_WAIT_MS / 1000)
+        except asyncio.TimeoutError:
+            logger.warning("Conversation not resolved in time, its id is missing from this response")
+            conversation.add_done_callback(lambda f: None if f.cancelled() else enqueue(f.result()))
+            return None
+    enqueue(conversation.result())
+    return conversation.result()
+
+
+def message_row(conversation_id: int, role: str, content: str, token_count: Optional[int] = None, **metadata) -> dict:
+    return {
+        "conversation_id": conversation_id,
+        "role": role,
+        "content": content,
+        "token_count": estimate_tokens(content) if token_count is None else token_count,
+        "metadata_": metadata,
+    }
+
+
+class MessageWriter:
+    def __init__(
+        self,
+        sink: Sink = insert_messages,
+        batch_size: Optional[int] = None,
+        flush_ms: Optional[float] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size or settings.CHAT_PERSIST_BATCH_SIZE
+        self.flush_interval = (settings.CHAT_PERSIST_FLUSH_MS if flush_ms is None else flush_ms) / 1000
+        self.max_pending = max_pending or settings.CHAT_PERSIST_MAX_PENDING
+        self._pending: deque = deque()
+        self._wakeup: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+
+    def enqueue(self, rows: List[dict]):
+        """Non-blocking: buffer rows for the next batch insert."""
+        self._pending.extend(rows)
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            for _ in range(overflow):
+                self._pending.popleft()
+            self.dropped += overflow
+            CHAT_PERSIST_DROPPED.inc(overflow)
+            logger.warning(f"Chat persistence backlog full, dropped {overflow} oldest messages")
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        if len(self._pending) >= self.batch_size:
+            self._wake()
+
+    def _wake(self):
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    async def _run(self):
+        while self._pending:
+            # Wait for a full batch, or the flush interval after the first row
+            if len(self._pending) < self.batch_size and not self._closing:
+                self._wakeup = asyncio.get_running_loop().create_future()
+                try:
+                    await asyncio.wait_for(self._wakeup, self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    self._wakeup = None
+            await self._flush_batch()
+
+    async def _flush_batch(self):
+        batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+        if batch:
+            await self._write(batch)
+
+    async def _write(self, batch: List[dict]):
+        try:
+            await self.sink(batch)
+        except Exception as e:
+            # One bad conversation id must not lose the whole batch
+            if len({row["conversation_id"] for row in batch}) > 1:
+                logger.warning(f"Batch insert of {len(batch)} messages failed ({e}), retrying per conversation")
+                groups: Dict[int, List[dict]] = {}
+                for row in batch:
+                    groups.setdefault(row["conversation_id"], []).append(row)
+                for rows in groups.values():
+                    await self._write(rows)
+            else:
+                self.dropped += len(batch)
+                CHAT_PERSIST_DROPPED.inc(len(batch))
+                logger.error(f"Persisting {len(batch)} messages of conversation {batch[0]['conversation_id']} failed: {e}")
+            return
+        self.written += len(batch)
+        self.batches += 1
+        CHAT_PERSIST_BATCH.observe(len(batch))
+
+    async def close(self):
+        """Flush everything still buffered (called from the lifespan on shutdown)."""
+        self._closing = True  # _run stops waiting for full batches
+        self._wake()
+        while self._task is not None and not self._task.done():
+            await self._task
+        await self._run()
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._pending), "written": self.written, "batches": self.batches, "dropped": self.dropped}
+
+
+_writer: Optional[MessageWriter] = None
+
+
+def get_message_writer() -> MessageWriter:
+    global _writer
+    if _writer is None:
+        _writer = MessageWriter()
+    return _writer
+
+
+async def close_message_writer():
+    global _writer
+    if _writer is not None:
+        await _writer.close()
+        stats = _writer.stats()
+        logger.info(f"Chat persistence flushed: {stats['written']} messages in {stats['batches']} batches, {stats['dropped']} dropped")
+        _writer = None
+
+
+def _collect_metrics():
+    CHAT_PERSIST_PENDING.set(len(_writer._pending) if _writer is not None else 0)
+
+
+REGISTRY.add_collector(_collect_metrics)
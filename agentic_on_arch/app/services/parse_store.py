@@ -0,0 +1,201 @@
+"""Content-addressed store of bidding uploads and their parse results.
+
+A tender file is identified by the SHA-256 of its bytes (`document_id`), so a
+re-upload of the same file — renamed or not — finds what was done before:
+
+- documents: the extracted text (zlib-compressed), so /parse, generation and
+  knowledge-base import never extract the same file twice
+- parse_results: the /parse response data per (document_id, version), where
+  version is the caller's prompt version + mode; bumping the prompt version
+  simply stops matching old rows
+
+Backed by one SQLite file (PARSE_STORE_PATH, next to the uploads by default:
+it holds the same content as the uploaded files). Documents beyond
+PARSE_STORE_MAX_DOCUMENTS are pruned least-recently-used first, together with
+their results. SQLite calls run in the default executor.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import PARSE_STORE_LOOKUPS
+
+_TOUCH_INTERVAL = 60.0  # seconds; refresh a document's last-used time at most this often
+
+
+class StoredDocument(NamedTuple):
+    id: str
+    filename: str
+    size: int  # bytes of the original upload
+    text: str
+
+
+def digest(data: bytes) -> str:
+    """document_id of an upload: hex SHA-256 of its bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+async def document_id(data: bytes) -> str:
+    """digest() off the event loop (hashlib releases the GIL on large buffers)."""
+    return await asyncio.get_running_loop().run_in_executor(None, digest, data)
+
+
+class ParseStore:
+    """SQLite-backed document text + parse result store."""
+
+    def __init__(self, path: str, max_documents: int):
+        self.path = path
+        self.max_documents = max_documents
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db: Optional[sqlite3.Connection] = sqlite3.connect(path, check_same_thread=False)
+        try:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS documents "
+                "(id TEXT PRIMARY KEY, filename TEXT, size INTEGER, text BLOB, used_at REAL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS parse_results "
+                "(document_id TEXT, version TEXT, data TEXT, created_at REAL, PRIMARY KEY (document_id, version))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS documents_used_at ON documents (used_at)")
+            self._db.commit()
+        except sqlite3.Error:
+            self._db.close()
+            raise
+
+    # --- SQLite (runs in the default executor) ---
+
+    def _touch(self, doc_id: str):
+        now = time.time()
+        self._db.execute("UPDATE documents SET used_at = ? WHERE id = ? AND used_at < ?", (now, doc_id, now - _TOUCH_INTERVAL))
+        self._db.commit()
+
+    def _get_document(self, doc_id: str) -> Optional[StoredDocument]:
+        with self._lock:
+            row = self._db.execute("SELECT filename, size, text FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            if row is None:
+                return None
+            self._touch(doc_id)
+        return StoredDocument(doc_id, row[0], row[1], zlib.decompress(row[2]).decode())
+
+    def _put_document(self, doc_id: str, filename: str, size: int, text: str):
+        blob = zlib.compress(text.encode())
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO documents (id, filename, size, text, used_at) VALUES (?, ?, ?, ?, ?)",
+                (doc_id, filename, size, blob, time.time()),
+            )
+            overflow = self._db.execute("SELECT COUNT(*) FROM documents").fetchone()[0] - self.max_documents
+            if overflow > 0:
+                stale = [r[0] for r in self._db.execute(
+                    "SELECT id FROM documents ORDER BY used_at LIMIT ?", (overflow,)
+                ).fetchall()]
+                self._db.executemany("DELETE FROM parse_results WHERE document_id = ?", [(s,) for s in stale])
+                self._db.executemany("DELETE FROM documents WHERE id = ?", [(s,) for s in stale])
+            self._db.commit()
+
+    def _get_result(self, doc_id: str, version: str, prefix: bool) -> Optional[str]:
+        with self._lock:
+            if prefix:
+                row = self._db.execute(
+                    "SELECT data FROM parse_results WHERE document_id = ? AND substr(version, 1, ?) = ? "
+                    "ORDER BY created_at DESC LIMIT 1",
+                    (doc_id, len(version), version),
+                ).fetchone()
+            else:
+                row = self._db.execute(
+                    "SELECT data FROM parse_results WHERE document_id = ? AND version = ?", (doc_id, version)
+                ).fetchone()
+            if row is not None:
+                self._touch(doc_id)
+        return row[0] if row else None
+
+    def _put_result(self, doc_id: str, version: str, data: str):
+        with self._lock:
+            # A result without its document would outlive pruning
+            if self._db.execute("SELECT 1 FROM documents WHERE id = ?", (doc_id,)).fetchone() is None:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO parse_results (document_id, version, data, created_at) VALUES (?, ?, ?, ?)",
+                (doc_id, version, data, time.time()),
+            )
+            self._db.commit()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # --- public API (errors are logged and treated as a miss) ---
+
+    async def get_document(self, doc_id: str) -> Optional[StoredDocument]:
+        try:
+            document = await self._run(self._get_document, doc_id)
+        except (sqlite3.Error, zlib.error) as e:
+            logger.warning(f"Parse store read failed: {e}")
+            document = None
+        PARSE_STORE_LOOKUPS.inc(kind="text", outcome="hit" if document else "miss")
+        return document
+
+    async def put_document(self, doc_id: str, filename: str, size: int, text: str):
+        try:
+            await self._run(self._put_document, doc_id, filename, size, text)
+        except sqlite3.Error as e:
+            logger.warning(f"Parse store write failed: {e}")
+
+    async def get_result(self, doc_id: str, version: str, prefix: bool = False) -> Optional[dict]:
+        """Stored parse data for `version`; with prefix=True the newest whose version starts with it."""
+        try:
+            data = await self._run(self._get_result, doc_id, version, prefix)
+        except sqlite3.Error as e:
+            logger.warning(f"Parse store read failed: {e}")
+            data = None
+        PARSE_STORE_LOOKUPS.inc(kind="result", outcome="hit" if data else "miss")
+        return json.loads(data) if data else None
+
+    async def put_result(self, doc_id: str, version: str, data: dict):
+        try:
+            await self._run(self._put_result, doc_id, version, json.dumps(data, ensure_ascii=False))
+        except sqlite3.Error as e:
+            logger.warning(f"Parse store write failed: {e}")
+
+    def close(self):
+        if self._db is not None:
+            with self._lock:
+                self._db.close()
+            self._db = None
+
+
+_store: Optional[ParseStore] = None
+_disabled = False  # opening PARSE_STORE_PATH failed; not retried until close_parse_store()
+
+
+def get_parse_store() -> Optional[ParseStore]:
+    """Process-wide store (created on first use); None when PARSE_STORE_PATH is empty or unusable."""
+    global _store, _disabled
+    if _store is None and settings.PARSE_STORE_PATH and not _disabled:
+        try:
+            _store = ParseStore(settings.PARSE_STORE_PATH, settings.PARSE_STORE_MAX_DOCUMENTS)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Parse store {settings.PARSE_STORE_PATH} unavailable, running without it: {e}")
+            _disabled = True
+    return _store
+
+
+def close_parse_store():
+    global _store, _disabled
+    if _store is not None:
+        _store.close()
+        _store = None
+    _disabled = False
@@ -0,0 +1,157 @@
+"""Map-reduce parsing of full-length tender documents.
+
+The single-call parse only ever saw text[:8000]; requirements and 否决条件 near
+the end of a long tender file were lost. Here:
+
+- map: the (masked) text is cut into section-aware windows
+  (app.core.documents.windows) and every window is parsed by its own LLM call,
+  at most BIDDING_PARSE_CONCURRENCY at a time, so wall-clock time stays
+  close to one call for typical documents
+- reduce: per-window JSON is merged into the single-call schema — scalar
+  fields take the first window that states them (the cover / announcement
+  comes first), list fields are concatenated in document order with
+  near-duplicates removed
+
+A window whose call fails is retried once; windows that still fail (or do
+not return JSON) are reported in `failed_windows` so coverage is explicit.
+"""
+
+import asyncio
+import json
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.documents.windows import Window, split_windows
+from app.core.llm.base import BaseLLM
+from app.utils.logger import logger
+
+LIST_FIELDS = ("requirements", "key_terms", "disqualification_risks")
+_MISSING = ("", "未明确", "无", "未知", None)
+_NUMBER = re.compile(r"\d+(?:\.\d+)?|[一二三四五六七八九十百千万零〇]+(?=[章节条款项天日个%％元])")
+_NORMALIZE = re.compile(r"[\s，。、；：,.;:（）()\[\]【】“”\"'《》]+")
+
+
+def parse_json_response(response: str) -> dict:
+    """JSON object from an LLM reply (tolerates markdown fences / surrounding text)."""
+    match = re.search(r"\{[\s\S]*\}", response)
+    return json.loads(match.group() if match else response)
+
+
+def _key(item: str) -> str:
+    return _NORMALIZE.sub("", item).lower()
+
+
+def _bigrams(text: str) -> set:
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+
+def _is_duplicate(key: str, grams: set, seen: List[Tuple[str, set, List[str]]]) -> bool:
+    numbers = _NUMBER.findall(key)
+    for other, other_grams, other_numbers in seen:
+        if key == other:
+            return True
+        if numbers != other_numbers:
+            continue  # "保证金 5 万元" vs "保证金 10 万元", "第 3 条" vs "第 7 条": different facts
+        if len(key) >= 6 and (key in other or other in key):
+            return True
+        # Overlap coefficient of character bigrams: robust to 具备/具有-style rewording
+        if len(grams & other_grams) / min(len(grams), len(other_grams)) >= settings.BIDDING_PARSE_DEDUP_SIMILARITY:
+            return True
+    return False
+
+
+def merge_parsed(results: List[dict]) -> dict:
+    """Reduce per-window results (in document order) into one result of the same schema."""
+    merged: Dict[str, object] = {}
+    for result in results:
+        for field, value in result.items():
+            if field in LIST_FIELDS:
+                continue
+            if merged.get(field) in _MISSING and value not in _MISSING:
+                merged[field] = value
+            merged.setdefault(field, value)
+
+    for field in LIST_FIELDS:
+        items: List[str] = []
+        seen: List[Tuple[str, set, List[str]]] = []
+        for result in results:
+            values = result.get(field) or []
+            for item in values if isinstance(values, list) else [values]:
+                item = str(item).strip()
+                key = _key(item)
+                if not key or item in _MISSING:
+                    continue
+                grams = _bigrams(key)
+                if _is_duplicate(key, grams, seen):
+                    continue
+                seen.append((key, grams, _NUMBER.findall(key)))
+                items.append(item)
+        merged[field] = items[:settings.BIDDING_PARSE_MAX_ITEMS]
+    return merged
+
+
+def _window_prompt(window: Window, total: int) -> str:
+    where = f"（所在章节：{window.heading}）" if window.heading else ""
+    return (
+        f"以下是一份招标文件的第 {window.index + 1}/{total} 部分{where}。"
+        f"只提取本部分中出现的信息，本部分没有的字段填写 \"未明确\"，列表字段没有则返回空列表：\n\n{window.text}"
+    )
+
+
+async def parse_document(
+    llm: BaseLLM,
+    text: str,
+    system: str,
+    window_chars: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    restore: Optional[Callable[[str], str]] = None,
+) -> Tuple[dict, dict]:
+    """
+    Parse all of `text`; returns (merged result, window / coverage stats).
+
+    `restore` is applied to each raw reply before JSON parsing (NER re-identification).
+    """
+    windows = split_windows(
+        text,
+        window_chars or settings.BIDDING_PARSE_WINDOW_CHARS,
+        settings.BIDDING_PARSE_OVERLAP_CHARS,
+    )
+    limit = asyncio.Semaphore(concurrency or settings.BIDDING_PARSE_CONCURRENCY)
+
+    raw: Dict[int, str] = {}
+
+    async def one(window: Window) -> Optional[dict]:
+        async with limit:
+            for attempt in range(2):
+                try:
+                    response = await llm.generate(_window_prompt(window, len(windows)), system=system)
+                    break
+                except Exception as e:
+                    logger.warning(f"Parse window {window.index + 1}/{len(windows)} failed (attempt {attempt + 1}): {e}")
+            else:
+                return None
+        response = restore(response) if restore else response
+        try:
+            return parse_json_response(response)
+        except json.JSONDecodeError:
+            # Not retried: a cached reply would come back identical
+            raw[window.index] = response
+            return None
+
+    results = await asyncio.gather(*(one(w) for w in windows))
+    parsed = [r for r in results if isinstance(r, dict)]
+    failed = [w.index for w, r in zip(windows, results) if not isinstance(r, dict)]
+    if not parsed and not raw:
+        raise RuntimeError(f"All {len(windows)} parse windows failed")
+    # Characters seen by a successful call (windows are in order and may overlap)
+    covered, reach = 0, 0
+    for window, result in zip(windows, results):
+        if isinstance(result, dict) and window.end > reach:
+            covered += window.end - max(window.start, reach)
+            reach = window.end
+    stats = {"windows": len(windows), "failed_windows": failed, "coverage": round(covered / max(1, len(text)), 4)}
+    if not parsed:
+        logger.warning(f"No parse window returned JSON, returning raw: {raw[min(raw)][:200]}")
+        return {"raw_response": raw[min(raw)], "parse_error": True}, stats
+    return merge_parsed(parsed), stats
@@ -29,6 +29,11 @@ class ForbiddenError(AppError):
         super().__init__(message, code=403)
 
 
+class RateLimitError(AppError):
+    def __init__(self, message: str = "请求过于频繁，请稍后重试"):
+        super().__init__(message, code=429)
+
+
 def register_exception_handlers(app: FastAPI):
     @app.exception_handler(AppError)
     async def app_error_handler(request: Request, exc: AppError):
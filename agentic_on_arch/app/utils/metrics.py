@@ -0,0 +1,218 @@
+"""In-process metrics with Prometheus text exposition (served at /metrics).
+
+A deliberately small subset of the Prometheus client model — Counter, Gauge
+and Histogram with fixed label names — so the hot path costs one dict lookup
+and a bisect, and no extra dependency is needed.
+
+The route label comes from a context variable set by RouteMiddleware, so
+code deep in the LLM / NER layers can label samples without the route being
+passed down explicitly. It is the matched route template
+(/api/bidding/generate/{stream_id}), never the raw path, so path parameters
+cannot create a series per request.
+"""
+
+import bisect
+import threading
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_scope: "ContextVar[Optional[dict]]" = ContextVar("metrics_scope", default=None)
+
+
+def current_route() -> str:
+    scope = _scope.get()
+    if scope is None:
+        return "-"
+    # The router adds "route" to the (shared) scope dict once it has matched
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class RouteMiddleware:
+    """Pure ASGI middleware: tags everything done for a request (including its SSE stream) with its route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            _scope.set(scope)
+        await self.app(scope, receive, send)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in items]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in items]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # key → [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _labels(self.labelnames, key, 'le="%g"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-2]:g}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], None]):
+        """fn runs before each scrape, e.g. to copy pool / queue stats into gauges."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            fn()
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+_NER_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+_COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+LLM_TTFT = REGISTRY.register(Histogram(
+    "llm_ttft_seconds", "Time from LLM stream start to first chunk.", ("provider", "route"), _LATENCY_BUCKETS))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "llm_request_duration_seconds", "Total LLM call duration.", ("provider", "route", "kind"), _LATENCY_BUCKETS))
+LLM_CHUNKS = REGISTRY.register(Histogram(
+    "llm_stream_chunks", "Chunks per LLM stream.", ("provider", "route"), _COUNT_BUCKETS))
+LLM_OUTPUT_TOKENS = REGISTRY.register(Histogram(
+    "llm_output_tokens", "Estimated output tokens per LLM call.", ("provider", "route", "kind"), _COUNT_BUCKETS))
+LLM_ERRORS = REGISTRY.register(Counter(
+    "llm_errors_total", "Failed LLM calls.", ("provider", "route", "kind")))
+NER_MASK = REGISTRY.register(Histogram(
+    "ner_mask_seconds", "NER de-identification time per text.", ("route",), _NER_BUCKETS))
+NER_DEMASK = REGISTRY.register(Histogram(
+    "ner_demask_seconds", "NER re-identification time per response (summed over a stream).", ("route",), _NER_BUCKETS))
+SSE_ACTIVE = REGISTRY.register(Gauge(
+    "sse_active_streams", "SSE responses currently streaming.", ("route",)))
+SSE_STREAMS = REGISTRY.register(Counter(
+    "sse_streams_total", "SSE responses by outcome (ok / error / disconnected).", ("route", "outcome")))
+SSE_RESUMABLE = REGISTRY.register(Gauge(
+    "sse_resumable_streams", "Resumable SSE streams held for reconnects, by state (running / finished).", ("state",)))
+SSE_RESUMES = REGISTRY.register(Counter(
+    "sse_resumes_total", "Reconnects to resumable SSE streams (resumed / expired / unknown).", ("route", "outcome")))
+CHAT_PERSIST_BATCH = REGISTRY.register(Histogram(
+    "chat_persist_batch_rows", "Message rows per write-behind batch insert.", (), _COUNT_BUCKETS))
+CHAT_PERSIST_PENDING = REGISTRY.register(Gauge(
+    "chat_persist_pending_rows", "Message rows buffered for the next batch insert."))
+CHAT_PERSIST_DROPPED = REGISTRY.register(Counter(
+    "chat_persist_dropped_rows_total", "Message rows lost to a full backlog or a failed insert."))
+PARSE_STORE_LOOKUPS = REGISTRY.register(Counter(
+    "parse_store_lookups_total", "Bidding parse store lookups by kind (text / result) and outcome (hit / miss).", ("kind", "outcome")))
+LLM_INFLIGHT = REGISTRY.register(Gauge(
+    "llm_inflight_requests", "LLM calls holding a governor slot.", ("provider",)))
+LLM_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "llm_queue_depth", "LLM calls waiting in the governor queue.", ("provider", "priority")))
+LLM_CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "llm_cache_hit_ratio", "Response cache hit ratio since start."))
+LLM_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "llm_queue_wait_seconds", "Time an LLM call waited for a governor slot.", ("provider", "priority"), _LATENCY_BUCKETS))
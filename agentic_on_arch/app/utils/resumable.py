@@ -0,0 +1,216 @@
+"""Resumable SSE streams (Last-Event-ID replay).
+
+A long bidding generation used to die with its HTTP connection: a browser
+reconnect or a proxy timeout threw away every token and the retry started a
+new LLM call. Here the upstream stream runs in a background task owned by a
+ResumableStream, not by the response:
+
+- frames produced by sse_stream() are kept in a per-stream ring buffer of
+  SSE_RESUME_BUFFER_FRAMES; older frames are spilled to
+  SSE_RESUME_SPILL_DIR when it is set, otherwise dropped
+- a response only tails the buffer, so any number of clients can attach and
+  a client that reconnects with `Last-Event-ID: n` continues at frame n + 1
+- with no client attached the upstream keeps running for
+  SSE_RESUME_GRACE_SECONDS, then is cancelled (closing the LLM stream)
+- a finished stream stays available for SSE_RESUME_RETENTION_SECONDS
+
+Stream ids are random and returned in the X-Stream-ID response header.
+Only outputs that are safe to keep server-side should be made resumable:
+spilled frames are plain text on disk.
+"""
+
+import asyncio
+import os
+import uuid
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.responses import StreamingResponse
+
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import REGISTRY, SSE_RESUMABLE, SSE_RESUMES, current_route
+from app.utils.sse import HEARTBEAT, SSE_HEADERS, encode_frame, sse_stream
+
+_REPLAY_BATCH = 256  # frames joined into one write when a client catches up
+
+
+class ResumableStream:
+    def __init__(self, chunks: AsyncIterator[str], error_prefix: str):
+        self.id = uuid.uuid4().hex
+        self.error_prefix = error_prefix
+        self.finished = False
+        self.next_id = 0  # id the next produced frame will get
+        self._frames: deque = deque()  # in-memory frames, ids _first .. next_id - 1
+        self._first = 0
+        self._capacity = max(1, settings.SSE_RESUME_BUFFER_FRAMES)
+        self._spill = None  # file of frames 0 .. _first - 1, when spilling
+        self._offsets: List[int] = [0]  # spill file offset of each spilled frame, plus the end
+        self._changed: Optional[asyncio.Future] = None
+        self._clients = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._task = asyncio.ensure_future(self._run(chunks))
+        self._schedule(settings.SSE_RESUME_GRACE_SECONDS)  # until the first client attaches
+
+    @property
+    def _spill_path(self) -> str:
+        return os.path.join(settings.SSE_RESUME_SPILL_DIR, f"{self.id}.sse")
+
+    async def _run(self, chunks: AsyncIterator[str]):
+        # sse_stream numbers frames from first_id=0, in step with next_id
+        try:
+            async for frame in sse_stream(chunks, error_prefix=self.error_prefix):
+                if frame is HEARTBEAT:
+                    continue
+                self._append(frame)
+        finally:
+            self.finished = True
+            self._notify()
+            if self._clients == 0 and self.id in _streams:
+                self._schedule(settings.SSE_RESUME_RETENTION_SECONDS)
+
+    def _append(self, frame: bytes):
+        self._frames.append(frame)
+        self.next_id += 1
+        if len(self._frames) > self._capacity:
+            evicted = self._frames.popleft()
+            self._first += 1
+            if settings.SSE_RESUME_SPILL_DIR:
+                if self._spill is None:
+                    os.makedirs(settings.SSE_RESUME_SPILL_DIR, exist_ok=True)
+                    self._spill = open(self._spill_path, "w+b")
+                self._spill.seek(0, os.SEEK_END)
+                self._spill.write(evicted)
+                self._offsets.append(self._offsets[-1] + len(evicted))
+        self._notify()
+
+    def _notify(self):
+        if self._changed is not None and not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = None
+
+    def _read(self, start: int) -> Tuple[Optional[bytes], int]:
+        """Up to _REPLAY_BATCH frames from id `start`, and the id after them; None if they were dropped."""
+        if start >= self._first:
+            i = start - self._first
+            batch = list(islice(self._frames, i, i + _REPLAY_BATCH))
+            return b"".join(batch), start + len(batch)
+        if self._spill is None or start < 0:
+            return None, start
+        end = min(self._first, start + _REPLAY_BATCH)
+        self._spill.seek(self._offsets[start])
+        return self._spill.read(self._offsets[end] - self._offsets[start]), end
+
+    # ── client attachment / lifetime ──
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._expire)
+
+    def _expire(self):
+        self._timer = None
+        if self._clients:
+            return
+        if not self.finished:
+            logger.info(f"Resumable stream {self.id} abandoned for {settings.SSE_RESUME_GRACE_SECONDS:g}s, cancelling")
+        self.close()
+
+    def close(self):
+        """Cancel the upstream (if running) and drop the buffered frames."""
+        _streams.pop(self.id, None)
+        self._clients = 0
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._task.cancel()
+        self._frames.clear()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            try:
+                os.remove(self._spill_path)
+            except OSError:
+                pass
+
+    async def tail(self, after: int = -1) -> AsyncIterator[bytes]:
+        """SSE bytes for frames after id `after`, then live frames until the stream ends."""
+        self._clients += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        position = after + 1
+        try:
+            while True:
+                if position < self.next_id:
+                    data, position = self._read(position)
+                    if data is None:
+                        # Fell out of the ring buffer and nothing was spilled
+                        SSE_RESUMES.inc(route=current_route(), outcome="expired")
+                        yield encode_frame({"content": f"{self.error_prefix} 断点已过期，请重新生成", "done": True})
+                        return
+                    yield data
+                    continue
+                if self.finished:
+                    return
+                if self._changed is None:
+                    self._changed = asyncio.get_running_loop().create_future()
+                try:
+                    # shield: one future is shared by every attached client
+                    await asyncio.wait_for(asyncio.shield(self._changed), settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self._clients -= 1
+            if self._clients == 0 and self.id in _streams:
+                if self.finished:
+                    self._schedule(settings.SSE_RESUME_RETENTION_SECONDS)
+                else:
+                    self._schedule(settings.SSE_RESUME_GRACE_SECONDS)
+
+    def response(self, after: int = -1) -> StreamingResponse:
+        return StreamingResponse(
+            self.tail(after),
+            media_type="text/event-stream",
+            headers={**SSE_HEADERS, "X-Stream-ID": self.id},
+        )
+
+
+_streams: Dict[str, ResumableStream] = {}
+
+
+def open_stream(chunks: AsyncIterator[str], error_prefix: str = "[错误]") -> ResumableStream:
+    """Start consuming `chunks` in the background; the caller returns stream.response()."""
+    stream = ResumableStream(chunks, error_prefix)
+    _streams[stream.id] = stream
+    return stream
+
+
+def resume_stream(stream_id: str) -> Optional[ResumableStream]:
+    stream = _streams.get(stream_id)
+    SSE_RESUMES.inc(route=current_route(), outcome="resumed" if stream else "unknown")
+    return stream
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """Last-Event-ID header → last frame id the client has (-1 = none)."""
+    try:
+        return int(value) if value else -1
+    except ValueError:
+        return -1
+
+
+def close_streams():
+    """Shutdown: cancel running upstreams and remove spill files."""
+    for stream in list(_streams.values()):
+        stream.close()
+
+
+def _collect_metrics():
+    running = sum(1 for s in _streams.values() if not s.finished)
+    SSE_RESUMABLE.set(running, state="running")
+    SSE_RESUMABLE.set(len(_streams) - running, state="finished")
+
+
+REGISTRY.add_collector(_collect_metrics)
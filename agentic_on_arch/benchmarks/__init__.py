@@ -0,0 +1,6 @@
+"""Offline performance benchmarks — run as `python -m benchmarks.<name>` from agentic_on_arch/."""
+
+import os
+
+# Keep per-call DEBUG logging out of the measurements
+os.environ.setdefault("DEBUG", "false")
@@ -0,0 +1,75 @@
+"""Benchmark: agent prompt building over a long matter — full history vs token budget.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_agent_context
+
+Replays a 600-turn conversation (~300-token user turns, ~800-token
+answers) through AgentExecutor._build_prompt. "full" is the previous
+behaviour: the whole history is rejoined into every prompt, so prompt size
+and build time grow with the turn number. "budgeted" is ConversationContext
+(16k-token budget) with a summarizer that takes 50ms like a fast LLM call
+and returns a capped summary. Reported at selected turns: prompt tokens
+and build time.
+"""
+
+import asyncio
+import time
+
+from app.core.agent_engine.context import ConversationContext
+from app.core.agent_engine.executor import AgentExecutor
+from app.utils.tokens import estimate_tokens
+from benchmarks.corpus import generate_corpus
+
+_TURNS = 600
+_REPORT = (10, 50, 100, 300, 600)
+
+
+async def _summarize(summary: str, messages, max_tokens: int) -> str:
+    await asyncio.sleep(0.05)
+    text = summary + "".join(m["content"][:40] for m in messages)
+    return text[-max_tokens:]
+
+
+def _full_prompt(history, user_input: str) -> str:
+    # The previous _build_prompt: every message, every turn
+    joined = "\n".join([f"{m['role']}: {m['content']}" for m in history])
+    return f"对话历史：\n{joined}\n\n用户问题：{user_input}"
+
+
+async def _run():
+    text, _ = generate_corpus(_TURNS * 1100, seed=3)
+    agent = AgentExecutor("bench", llm_provider="qwen")
+    agent.memory = ConversationContext("qwen", budget=16000, summarizer=_summarize)
+    history = []
+    rows = []
+    for turn in range(1, _TURNS + 1):
+        start = (turn - 1) * 1100
+        question, answer = text[start:start + 300], text[start + 300:start + 1100]
+
+        t0 = time.perf_counter()
+        full = _full_prompt(history, question)
+        full_us = (time.perf_counter() - t0) * 1e6
+        t0 = time.perf_counter()
+        budgeted = agent._build_prompt(question)
+        budgeted_us = (time.perf_counter() - t0) * 1e6
+        if turn in _REPORT:
+            rows.append((turn, estimate_tokens(full), full_us, estimate_tokens(budgeted), budgeted_us))
+
+        history += [{"role": "user", "content": question}, {"role": "assistant", "content": answer}]
+        agent.add_to_memory("user", question)
+        agent.add_to_memory("assistant", answer)
+        await asyncio.sleep(0.01)  # the LLM call; compaction runs meanwhile
+    await agent.memory.wait_compaction()
+    return rows
+
+
+def main():
+    rows = asyncio.run(_run())
+    print(f"{'turn':>5} | {'full tokens':>11} | {'full build us':>13} | {'budgeted tokens':>15} | {'budgeted build us':>17}")
+    print("-" * 74)
+    for turn, full_tokens, full_us, tokens, us in rows:
+        print(f"{turn:>5} | {full_tokens:>11} | {full_us:>13.0f} | {tokens:>15} | {us:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: chat message persistence — inline commits vs write-behind batches.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_chat_persist
+
+N concurrent chats each run several turns (a 20ms fake stream per turn) and
+persist the user + assistant messages when the stream completes:
+
+- inline: one session per turn, INSERT both rows and COMMIT before the done
+  frame (what a straightforward implementation does)
+- write-behind: MessageWriter.enqueue() and move on; the writer batch-inserts
+
+The database is simulated (no PostgreSQL here): a 10-connection pool like
+app.extensions, 2ms per round trip and 20us per inserted row. Reported:
+turns/s, the delay persistence adds before the done frame (p50 / p99), and
+database round trips.
+"""
+
+import asyncio
+import time
+from typing import List
+
+from app.services.chat_history import MessageWriter, message_row
+
+_RTT = 0.002
+_ROW_COST = 0.00002
+_POOL = 10
+_STREAM = 0.02
+
+
+class _SimulatedDB:
+    def __init__(self):
+        self.pool = asyncio.Semaphore(_POOL)
+        self.round_trips = 0
+        self.rows = 0
+
+    async def insert_and_commit(self, rows: List[dict]):
+        async with self.pool:
+            await asyncio.sleep(_RTT + _ROW_COST * len(rows))  # INSERT ... VALUES (...), (...)
+            await asyncio.sleep(_RTT)  # COMMIT
+        self.round_trips += 2
+        self.rows += len(rows)
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+async def _run(strategy: str, chats: int, turns: int):
+    db = _SimulatedDB()
+    writer = MessageWriter(sink=db.insert_and_commit, batch_size=200, flush_ms=100)
+    added: List[float] = []
+
+    async def chat(conversation_id: int):
+        for turn in range(turns):
+            await asyncio.sleep(_STREAM)
+            rows = [
+                message_row(conversation_id, "user", f"第{turn}轮：合同逾期付款如何处理？"),
+                message_row(conversation_id, "assistant", "根据《民法典》第五百七十七条……" * 8, model="fake"),
+            ]
+            t0 = time.perf_counter()
+            if strategy == "inline":
+                await db.insert_and_commit(rows)
+            else:
+                writer.enqueue(rows)
+            added.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(chat(i) for i in range(chats)))
+    elapsed = time.perf_counter() - t0
+    await writer.close()  # lifespan shutdown flush
+    return elapsed, added, db
+
+
+def main():
+    turns = 10
+    print(f"{'chats':>5} | {'strategy':<12} | {'turns/s':>8} | {'added p50 ms':>12} | {'added p99 ms':>12} | {'round trips':>11} | {'rows':>5}")
+    print("-" * 86)
+    for chats in (50, 200, 500):
+        for strategy in ("inline", "write-behind"):
+            elapsed, added, db = asyncio.run(_run(strategy, chats, turns))
+            print(
+                f"{chats:>5} | {strategy:<12} | {chats * turns / elapsed:>8.0f} | {_pct(added, 0.5):>12.2f}"
+                f" | {_pct(added, 0.99):>12.2f} | {db.round_trips:>11} | {db.rows:>5}"
+            )
+
+
+if __name__ == "__main__":
+    main()
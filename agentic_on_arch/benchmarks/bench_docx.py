@@ -0,0 +1,144 @@
+"""Benchmark: DOCX text extraction — ET.fromstring + findall vs streaming iterparse.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_docx
+
+Generates tender-like .docx files (body paragraphs, a qualification table
+every 20 paragraphs, two headers, footnotes) with document.xml of roughly 8
+and 40MB, then compares the previous extract_text_from_docx ("legacy") with
+app.core.documents.docx:
+
+- time and peak memory (tracemalloc) of one extraction, in a fresh process
+- characters extracted (legacy misses tables' structure, headers, footnotes)
+- the longest event-loop stall while a handler extracts the file: legacy
+  runs inline, the new path awaits extract_docx_text (process pool)
+"""
+
+import asyncio
+import io
+import multiprocessing
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+from xml.sax.saxutils import escape
+
+from benchmarks.corpus import generate_corpus
+
+_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _paragraph(text: str) -> str:
+    return f'<w:p><w:pPr><w:jc w:val="both"/></w:pPr><w:r><w:rPr><w:sz w:val="24"/></w:rPr><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _table(rows) -> str:
+    body = "".join("<w:tr>" + "".join(f"<w:tc>{_paragraph(c)}</w:tc>" for c in row) + "</w:tr>" for row in rows)
+    return f"<w:tbl>{body}</w:tbl>"
+
+
+def build_docx(target_xml_mb: float, seed: int = 0) -> bytes:
+    text, _ = generate_corpus(200_000, seed=seed)
+    lines = [text[i:i + 120] for i in range(0, len(text), 120)]
+    parts, size, i = [], 0, 0
+    while size < target_xml_mb * 1024 * 1024:
+        if i % 20 == 19:
+            chunk = _table([["序号", "资格要求", "证明材料"], [str(i), lines[i % len(lines)][:40], "营业执照复印件"]])
+        else:
+            chunk = _paragraph(lines[i % len(lines)])
+        parts.append(chunk)
+        size += len(chunk.encode())
+        i += 1
+    document = f'<?xml version="1.0" encoding="UTF-8"?><w:document {_NS}><w:body>{"".join(parts)}</w:body></w:document>'
+    header = f'<w:hdr {_NS}>{_paragraph("项目编号：CMCC-2026-LEGAL-001")}</w:hdr>'
+    footnotes = f'<w:footnotes {_NS}><w:footnote w:id="1">{_paragraph("注：最高限价为人民币 980,000 元，超过即否决。")}</w:footnote></w:footnotes>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", "<Types/>")
+        zf.writestr("word/document.xml", document)
+        zf.writestr("word/header1.xml", header)
+        zf.writestr("word/header2.xml", header)
+        zf.writestr("word/footnotes.xml", footnotes)
+    return buffer.getvalue()
+
+
+def legacy_extract(file_bytes: bytes) -> str:
+    # The previous app.api.bidding.extract_text_from_docx
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
+        xml_content = zf.read("word/document.xml")
+    root = ET.fromstring(xml_content)
+    ns = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+    paragraphs = []
+    for p in root.findall(".//w:p", ns):
+        texts = [t.text for t in p.findall(".//w:t", ns) if t.text]
+        line = "".join(texts).strip()
+        if line:
+            paragraphs.append(line)
+    return "\n".join(paragraphs)
+
+
+def _measure(strategy: str, data: bytes, results):
+    from app.core.documents.docx import docx_text
+
+    extract = legacy_extract if strategy == "legacy" else docx_text
+    t0 = time.perf_counter()
+    text = extract(data)
+    elapsed = time.perf_counter() - t0
+    # Second run under tracemalloc: peak Python allocations, result string included
+    tracemalloc.start()
+    extract(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    results.put((elapsed, peak / 1e6, len(text), "否决" in text, "项目编号" in text))
+
+
+def _isolated(strategy: str, data: bytes):
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(strategy, data, results))
+    proc.start()
+    out = results.get()
+    proc.join()
+    return out
+
+
+async def _stall(strategy: str, data: bytes) -> float:
+    from app.core.documents.docx import extract_docx_text
+
+    worst = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal worst
+        while running:
+            t0 = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst = max(worst, time.perf_counter() - t0 - 0.005)
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.05)
+    if strategy == "legacy":
+        legacy_extract(data)
+    else:
+        await extract_docx_text(data)
+    running = False
+    await tick
+    return worst
+
+
+def main():
+    print(f"{'document.xml':>12} | {'docx':>7} | {'strategy':<9} | {'time s':>6} | {'peak mem MB':>11} | {'chars':>9} | {'footnote':>8} | {'header':>6} | {'loop stall ms':>13}")
+    print("-" * 104)
+    for xml_mb in (8, 40):
+        data = build_docx(xml_mb)
+        for strategy in ("legacy", "streaming"):
+            elapsed, peak, chars, footnote, header = _isolated(strategy, data)
+            stall = asyncio.run(_stall(strategy, data))
+            print(
+                f"{xml_mb:>10}MB | {len(data) / 1e6:>5.1f}MB | {strategy:<9} | {elapsed:>6.2f} | {peak:>11.0f}"
+                f" | {chars:>9} | {str(footnote):>8} | {str(header):>6} | {stall * 1000:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
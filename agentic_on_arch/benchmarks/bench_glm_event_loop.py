@@ -0,0 +1,92 @@
+"""Load test: do GLM streams stall other requests on the same event loop?
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_glm_event_loop
+
+Concurrent GLM streams run against a local fake upstream while a probe task
+measures event-loop lag (how late a 10ms sleep wakes up) — a stand-in for
+every other user's SSE stream on the same worker. "blocking" replays the
+previous adapter (synchronous HTTP client iterated inside `async def`, which
+is what the zhipuai SDK did); "async" is the current GLMLLM.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+import httpx
+
+from app.config import settings
+from benchmarks.upstream import FakeUpstream
+
+
+def _blocking_adapter(base_url: str):
+    """Previous behaviour: sync client iterated inside an async generator."""
+    client = httpx.Client(base_url=base_url, timeout=60)
+
+    async def stream(prompt: str):
+        payload = {"model": "glm-4", "messages": [{"role": "user", "content": prompt}], "stream": True}
+        with client.stream("POST", "/chat/completions", json=payload) as response:
+            for line in response.iter_lines():
+                if line.startswith("data:") and line[5:].strip() != "[DONE]":
+                    yield json.loads(line[5:])["choices"][0]["delta"]["content"]
+
+    return stream, client.close
+
+
+def _async_adapter(base_url: str):
+    from app.core.llm.glm import GLMLLM
+    settings.GLM_BASE_URL = base_url
+    llm = GLMLLM()
+    return llm.stream, llm.aclose
+
+
+async def _probe(lags: List[float], stop: asyncio.Event, period: float = 0.01):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(period)
+        lags.append(time.perf_counter() - t0 - period)
+
+
+async def _scenario(make_adapter, base_url: str, streams: int):
+    # Adapters are long-lived in the app, so build once outside the measured window
+    stream, close = make_adapter(base_url)
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+
+    async def consume():
+        async for _ in stream("测试"):
+            pass
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(consume() for _ in range(streams)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await probe
+    result = close()
+    if asyncio.iscoroutine(result):
+        await result
+    return elapsed, lags
+
+
+def main():
+    chunks, interval_ms = 50, 20
+    print(f"upstream: {chunks} chunks x {interval_ms}ms per stream (~{chunks * interval_ms / 1000:.1f}s)")
+    print(f"{'adapter':<9} | {'streams':>7} | {'wall s':>7} | {'probe ticks':>11} | {'lag p50 ms':>10} | {'lag max ms':>10}")
+    print("-" * 70)
+    with FakeUpstream(chunks=chunks, interval_ms=interval_ms) as upstream:
+        for streams in (1, 4, 8):
+            for name, fn in (("blocking", _blocking_adapter), ("async", _async_adapter)):
+                elapsed, lags = asyncio.run(_scenario(fn, upstream.base_url, streams))
+                lags = lags or [0.0]
+                print(
+                    f"{name:<9} | {streams:>7} | {elapsed:>7.2f} | {len(lags):>11}"
+                    f" | {statistics.median(lags) * 1000:>10.1f} | {max(lags) * 1000:>10.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
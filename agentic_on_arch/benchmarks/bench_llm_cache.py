@@ -0,0 +1,75 @@
+"""Benchmark: exact-match LLM response cache on repeated bidding-parse calls.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_llm_cache [--disk PATH]
+
+The GLM adapter talks to a local fake upstream that answers after a fixed
+delay. The same (system prompt, tender text) pairs are sent repeatedly — the
+re-upload / retry pattern — first uncached, then through CachedLLM, and a
+cached response is replayed as a stream to measure time to first chunk.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.config import settings
+from app.core.llm.cache import CachedLLM, ResponseCache
+from benchmarks.corpus import generate_corpus
+from benchmarks.upstream import FakeUpstream
+
+SYSTEM = "你是一位专业的投标文件分析专家。"
+
+
+async def _run(base_url: str, documents: int, repeats: int, disk: str = None):
+    from app.core.llm.glm import GLMLLM
+    settings.GLM_BASE_URL = base_url
+    raw = GLMLLM()
+    cache = ResponseCache(ttl_seconds=3600, max_entries=1024, max_bytes=64 * 1024 * 1024, path=disk)
+    cached = CachedLLM(raw, "glm", cache)
+    prompts = [generate_corpus(8000, seed=i)[0] for i in range(documents)]
+
+    results = {}
+    for name, llm in (("uncached", raw), ("cached", cached)):
+        t0 = time.perf_counter()
+        for _ in range(repeats):
+            await asyncio.gather(*(llm.generate(p, system=SYSTEM) for p in prompts))
+        results[name] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    first = None
+    async for _ in cached.stream(prompts[0], system=SYSTEM):
+        if first is None:
+            first = time.perf_counter() - t0
+    replay_total = time.perf_counter() - t0
+
+    await raw.aclose()
+    stats = cache.stats()
+    cache.close()
+    return results, first, replay_total, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--documents", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--disk", default=None, help="SQLite path for the disk tier")
+    args = parser.parse_args()
+
+    with FakeUpstream(chunks=25, interval_ms=20) as upstream:
+        results, first, replay_total, stats = asyncio.run(
+            _run(upstream.base_url, args.documents, args.repeats, args.disk)
+        )
+        upstream_calls = upstream.requests
+
+    calls = args.documents * args.repeats
+    print(f"{calls} generate calls ({args.documents} documents x {args.repeats} repeats), upstream ~0.5s per call")
+    for name, elapsed in results.items():
+        print(f"{name:<9} | wall {elapsed:>6.2f}s | {calls / elapsed:>8.1f} calls/s")
+    print(f"upstream requests: {upstream_calls} (cache misses: {stats['misses']})")
+    print(f"stream replay of a hit: first chunk {first * 1000:.2f}ms, full response {replay_total * 1000:.2f}ms")
+    print(f"cache: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Benchmark: single-flight coalescing of duplicated LLM bursts.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_llm_coalesce
+
+A burst of concurrent requests where each distinct prompt is repeated
+`dup` times (a team uploading the same tender, the same Copilot question) is
+sent through the GLM adapter against a local fake upstream — once direct and
+once through CoalescingLLM. Upstream requests should drop by ~dup x.
+"""
+
+import asyncio
+import time
+
+from app.config import settings
+from app.core.llm.coalesce import CoalescingLLM
+from benchmarks.upstream import FakeUpstream
+
+
+async def _burst(llm, mode: str, burst: int, dup: int) -> float:
+    prompts = [f"招标文件 #{i // dup}" for i in range(burst)]
+
+    async def one(prompt: str):
+        if mode == "generate":
+            await llm.generate(prompt)
+        else:
+            async for _ in llm.stream(prompt):
+                pass
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(one(p) for p in prompts))
+    return time.perf_counter() - t0
+
+
+async def _run(upstream: FakeUpstream, mode: str, burst: int, dup: int):
+    from app.core.llm.glm import GLMLLM
+    settings.GLM_BASE_URL = upstream.base_url
+    raw = GLMLLM()
+    rows = []
+    for name, llm in (("direct", raw), ("coalesced", CoalescingLLM(raw, "glm"))):
+        before = upstream.requests
+        elapsed = await _burst(llm, mode, burst, dup)
+        rows.append((name, upstream.requests - before, elapsed))
+    await raw.aclose()
+    return rows
+
+
+def main():
+    burst = 64
+    print(f"burst of {burst} concurrent requests, upstream 20 chunks x 20ms")
+    print(f"{'mode':<8} | {'dup':>3} | {'adapter':<9} | {'upstream':>8} | {'wall s':>6}")
+    print("-" * 48)
+    with FakeUpstream(chunks=20, interval_ms=20) as upstream:
+        for mode in ("generate", "stream"):
+            for dup in (1, 4, 16):
+                for name, calls, elapsed in asyncio.run(_run(upstream, mode, burst, dup)):
+                    print(f"{mode:<8} | {dup:>3} | {name:<9} | {calls:>8} | {elapsed:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark: per-provider governor — priority classes and per-user fair share.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_llm_governor
+
+A provider limited to 4 concurrent calls (ScriptedLLM, ~300ms per call) gets
+a burst of 40 batch bidding-chapter calls from one user; 200ms later 5
+interactive chat calls and 5 batch calls from a second user arrive. Compared:
+everything in one class (plain FIFO) vs priority classes + fair share.
+Reported: queue wait p50/max per group and the scheduler's own metrics.
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from app.config import settings
+from app.core.llm.scheduler import GovernedLLM, Priority, ProviderScheduler, set_llm_context
+from benchmarks.bench_llm_router import ScriptedLLM
+
+
+async def _run(classes: bool):
+    settings.LLM_QUEUE_TIMEOUT_SECONDS = {"interactive": 60.0, "normal": 60.0, "batch": 60.0}
+    provider = ScriptedLLM("qwen", 250, sigma=0.1, chunks=5, chunk_ms=10)
+    scheduler = ProviderScheduler("qwen", max_concurrency=4)
+    llm = GovernedLLM(provider, scheduler)
+    waits: Dict[str, List[float]] = {"flood (batch, user A)": [], "chat (interactive)": [], "batch (user B)": []}
+
+    async def one(group: str, priority: Priority, user: str, delay: float):
+        await asyncio.sleep(delay)
+        set_llm_context(priority if classes else Priority.NORMAL, user if classes else "anyone")
+        t0 = time.perf_counter()
+        async for _ in llm.stream("第N章"):
+            waits[group].append(time.perf_counter() - t0)
+            break
+
+    tasks = [one("flood (batch, user A)", Priority.BATCH, "A", 0) for _ in range(40)]
+    tasks += [one("chat (interactive)", Priority.INTERACTIVE, f"u{i}", 0.2) for i in range(5)]
+    tasks += [one("batch (user B)", Priority.BATCH, "B", 0.2) for _ in range(5)]
+    t0 = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return waits, time.perf_counter() - t0, scheduler.stats()
+
+
+def main():
+    print(f"{'scheduling':<18} | {'group':<22} | {'TTFT p50 ms':>11} | {'TTFT max ms':>11}")
+    print("-" * 72)
+    for classes in (False, True):
+        waits, elapsed, stats = asyncio.run(_run(classes))
+        label = "priority+fair" if classes else "fifo"
+        for group, values in waits.items():
+            print(f"{label:<18} | {group:<22} | {statistics.median(values) * 1000:>11.0f} | {max(values) * 1000:>11.0f}")
+        print(f"{'':<18} | wall {elapsed:.2f}s, peak queue {stats['peak_queue']}, wait {stats['wait']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Benchmark: latency-aware router with failover and hedging, fully offline.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_llm_router
+
+Providers are ScriptedLLM fakes whose time-to-first-token follows a scripted
+distribution (lognormal body + heavy tail) that can change half-way through
+the run, plus an error rate. Each scenario streams the same request sequence
+through a single fixed provider, the router without hedging and the router
+with hedging, and reports TTFT p50/p99, failed requests and upstream calls
+(hedging costs extra calls).
+"""
+
+import asyncio
+import random
+import statistics
+import time
+from typing import AsyncGenerator, List, Optional, Tuple
+
+from app.core.llm.base import BaseLLM
+from app.core.llm.router import RouterLLM
+
+
+class ScriptedLLM(BaseLLM):
+    """
+    Fake provider: TTFT ~ lognormal(median_ms, sigma) with probability `tail`
+    of a `tail_ms` stall; `error_rate` of calls fail before the first chunk.
+    `phases` switches to other (median_ms, tail, error_rate) after N calls.
+    """
+
+    def __init__(self, name: str, median_ms: float, sigma: float = 0.3, tail: float = 0.0, tail_ms: float = 2000,
+                 error_rate: float = 0.0, phases: Optional[List[Tuple[int, float, float, float]]] = None,
+                 chunks: int = 5, chunk_ms: float = 2.0, seed: int = 0):
+        self.name = name
+        self.median_ms, self.sigma, self.tail, self.tail_ms, self.error_rate = median_ms, sigma, tail, tail_ms, error_rate
+        self.phases = sorted(phases or [])
+        self.chunks, self.chunk_ms = chunks, chunk_ms
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.cancelled = 0
+
+    def _script(self) -> Tuple[float, bool]:
+        self.calls += 1
+        median, tail, error_rate = self.median_ms, self.tail, self.error_rate
+        for after, m, t, e in self.phases:
+            if self.calls > after:
+                median, tail, error_rate = m, t, e
+        delay = self.rng.lognormvariate(0, self.sigma) * median
+        if self.rng.random() < tail:
+            delay += self.tail_ms
+        return delay / 1000, self.rng.random() < error_rate
+
+    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
+        return "".join([c async for c in self.stream(prompt, system)])
+
+    async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
+        delay, fail = self._script()
+        try:
+            await asyncio.sleep(delay)
+            if fail:
+                raise RuntimeError(f"{self.name}: scripted 503")
+            for i in range(self.chunks):
+                yield f"{self.name}{i}"
+                await asyncio.sleep(self.chunk_ms / 1000)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+    def get_model_name(self) -> str:
+        return self.name
+
+
+SCENARIOS = {
+    # qwen is normally fastest, degrades (5x slower + stalls) after 100 calls
+    "qwen degrades": lambda: {
+        "qwen": ScriptedLLM("qwen", 80, tail=0.02, phases=[(100, 400, 0.2, 0.0)], seed=1),
+        "glm": ScriptedLLM("glm", 120, tail=0.02, seed=2),
+        "claude": ScriptedLLM("claude", 150, tail=0.02, seed=3),
+    },
+    # qwen starts failing 60% of calls after 100 calls
+    "qwen errors": lambda: {
+        "qwen": ScriptedLLM("qwen", 80, phases=[(100, 80, 0.0, 0.6)], seed=4),
+        "glm": ScriptedLLM("glm", 120, seed=5),
+        "claude": ScriptedLLM("claude", 150, seed=6),
+    },
+    # everyone healthy but with a 2% heavy tail — the hedging case
+    "heavy tail": lambda: {
+        "qwen": ScriptedLLM("qwen", 80, tail=0.02, tail_ms=1500, seed=7),
+        "glm": ScriptedLLM("glm", 90, tail=0.02, tail_ms=1500, seed=8),
+        "claude": ScriptedLLM("claude", 150, tail=0.02, tail_ms=1500, seed=9),
+    },
+}
+
+
+async def _drive(llm: BaseLLM, requests: int, concurrency: int):
+    ttfts: List[float] = []
+    failures = 0
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                async for _ in llm.stream("问"):
+                    ttfts.append(time.perf_counter() - t0)
+                    break
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return ttfts, failures
+
+
+def _pct(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000 if ordered else float("nan")
+
+
+def main():
+    requests, concurrency = 400, 8
+    print(f"{requests} streamed requests per run, concurrency {concurrency}")
+    print(f"{'scenario':<14} | {'adapter':<13} | {'p50 ms':>7} | {'p99 ms':>7} | {'failed':>6} | {'upstream':>8}")
+    print("-" * 70)
+    for scenario, build in SCENARIOS.items():
+        for name in ("fixed qwen", "router", "router+hedge"):
+            providers = build()
+            if name == "fixed qwen":
+                llm = providers["qwen"]
+            else:
+                llm = RouterLLM(providers, hedge=name.endswith("hedge"))
+            ttfts, failures = asyncio.run(_drive(llm, requests, concurrency))
+            calls = sum(p.calls for p in providers.values())
+            print(
+                f"{scenario:<14} | {name:<13} | {statistics.median(ttfts) * 1000:>7.0f} | {_pct(ttfts, 0.99):>7.0f}"
+                f" | {failures:>6} | {calls:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
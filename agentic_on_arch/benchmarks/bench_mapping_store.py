@@ -0,0 +1,65 @@
+"""Benchmark: MappingStore store/retrieve throughput under concurrent sessions.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_mapping_store
+    python -m benchmarks.bench_mapping_store --redis-url redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from app.core.ner.mapping_store import MappingStore, MemoryBackend, RedisBackend
+
+
+def _mapping(n: int, seed: int):
+    rng = random.Random(seed)
+    return {f"[PER-{i:03d}]": "张" + chr(0x4e00 + rng.randint(0, 2000)) for i in range(1, n + 1)}
+
+
+async def _session(store: MappingStore, session_id: int, turns: int, entities: int):
+    """One conversation: a retrieve + store per turn, mapping growing each turn."""
+    for turn in range(turns):
+        await store.retrieve(1, session_id)
+        await store.store(1, session_id, _mapping(entities + turn, session_id))
+        await asyncio.sleep(0)  # interleave sessions like concurrent chats do
+
+
+async def _run(store: MappingStore, sessions: int, turns: int, entities: int) -> float:
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_session(store, s, turns, entities) for s in range(sessions)))
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", help="benchmark the Redis backend instead of memory")
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--entities", type=int, default=30, help="entities per mapping at turn 0")
+    args = parser.parse_args()
+
+    key = os.urandom(32)
+    print(f"{'backend':<8} | {'sessions':>8} | {'budget MB':>9} | {'ops/s':>9} | {'hit rate':>8} | {'evict lru':>9} | {'entries':>7}")
+    print("-" * 76)
+    for sessions in (100, 1_000, 5_000):
+        for budget_mb in (64, 2):
+            if args.redis_url:
+                backend, label = RedisBackend(args.redis_url, ttl_seconds=600, prefix="bench:"), "redis"
+            else:
+                backend, label = MemoryBackend(ttl_seconds=600, max_bytes=budget_mb * 1024 * 1024), "memory"
+            store = MappingStore(backend=backend, key=key)
+            elapsed = asyncio.run(_run(store, sessions, args.turns, args.entities))
+            stats = store.stats()
+            ops = sessions * args.turns * 2
+            print(
+                f"{label:<8} | {sessions:>8} | {budget_mb:>9} | {ops / elapsed:>9.0f} | {stats['hit_rate']:>8.2%}"
+                f" | {stats.get('evicted_lru', '-'):>9} | {stats.get('entries', '-'):>7}"
+            )
+            if args.redis_url:
+                break
+
+
+if __name__ == "__main__":
+    main()
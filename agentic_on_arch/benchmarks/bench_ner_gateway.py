@@ -0,0 +1,163 @@
+"""NER gateway benchmark suite — NERDetector / NERMasker / NERDemasker hot paths, offline.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_ner_gateway
+    python -m benchmarks.bench_ner_gateway --size 400000 --density 15
+    python -m benchmarks.bench_ner_gateway --save baseline.json       # record a baseline
+    python -m benchmarks.bench_ner_gateway --compare baseline.json    # exit 1 on regression
+
+Per operation it reports throughput on one long document (million chars/s),
+p50/p99 latency over many chat-sized paragraphs, peak traced memory and the
+number of memory blocks still allocated afterwards (tracemalloc), plus
+detector recall against the corpus ground truth.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from app.core.ner.demasker import NERDemasker
+from app.core.ner.detector import NERDetector
+from app.core.ner.masker import NERMasker
+from benchmarks.corpus import generate_corpus, generate_paragraphs
+
+
+def _throughput(fn: Callable, arg, chars: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return chars / best / 1e6
+
+
+def _latencies(fn: Callable, args: List) -> Dict[str, float]:
+    samples = []
+    for arg in args:
+        t0 = time.perf_counter()
+        fn(arg)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {
+        "p50_us": statistics.median(samples) * 1e6,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1e6,
+    }
+
+
+def _memory(fn: Callable, arg) -> Dict[str, float]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    result = fn(arg)  # keep the result alive so its blocks are counted
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return {"peak_kb": peak / 1024, "blocks": blocks}
+
+
+def run(size: int, density: float, paragraphs: int, seed: int) -> Dict[str, Dict[str, float]]:
+    detector = NERDetector()
+    masker = NERMasker(detector)
+    demasker = NERDemasker()
+
+    document, truth = generate_corpus(size, density, seed)
+    chunks = generate_paragraphs(paragraphs, size=400, density=density, seed=seed + 1)
+
+    masked_document, document_mapping = masker.mask(document)
+    masked_chunks = [masker.mask(chunk) for chunk in chunks]
+
+    def stream_demask(masked_text: str):
+        # Simulate an LLM emitting ~8-char chunks
+        stream = demasker.streaming(document_mapping)
+        out = [stream.feed(masked_text[i:i + 8]) for i in range(0, len(masked_text), 8)]
+        out.append(stream.flush())
+        return out
+
+    operations = {
+        "detect": (detector.detect, document, chunks),
+        "mask": (masker.mask, document, chunks),
+        "mask_many": (masker.mask_many, chunks, [chunks[i:i + 50] for i in range(0, len(chunks), 50)]),
+        "demask": (
+            lambda text: demasker.demask(text, document_mapping),
+            masked_document,
+            [text for text, _ in masked_chunks],
+        ),
+        "demask_stream": (stream_demask, masked_document, [text for text, _ in masked_chunks]),
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, (fn, doc_arg, small_args) in operations.items():
+        chars = sum(map(len, doc_arg)) if isinstance(doc_arg, list) else len(doc_arg)
+        row = {"mchars_per_s": _throughput(fn, doc_arg, chars, repeat=3)}
+        row.update(_latencies(fn, small_args))
+        row.update(_memory(fn, doc_arg))
+        results[name] = row
+
+    found = {(e[0], e[2], e[3]) for e in detector.detect(document)}
+    hit = sum(1 for etype, _, start, end in truth if (etype, start, end) in found)
+    results["detect"]["recall"] = hit / len(truth) if truth else 1.0
+    return results
+
+
+def _print(results: Dict[str, Dict[str, float]], size: int, density: float):
+    print(f"corpus: {size:,} chars, {density} PII / 1k chars")
+    print(f"{'operation':<14} | {'Mchars/s':>8} | {'p50 µs':>8} | {'p99 µs':>8} | {'peak KB':>9} | {'blocks':>8}")
+    print("-" * 71)
+    for name, row in results.items():
+        print(
+            f"{name:<14} | {row['mchars_per_s']:>8.2f} | {row['p50_us']:>8.1f} | {row['p99_us']:>8.1f}"
+            f" | {row['peak_kb']:>9.1f} | {row['blocks']:>8}"
+        )
+    print(f"detector recall: {results['detect']['recall']:.2%}")
+
+
+def _compare(results, baseline, tolerance: float) -> List[str]:
+    """Throughput drops or p99 rises beyond tolerance are regressions."""
+    failures = []
+    for name, row in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["mchars_per_s"] < row["mchars_per_s"] * (1 - tolerance):
+            failures.append(f"{name}: {current['mchars_per_s']:.2f} Mchars/s < baseline {row['mchars_per_s']:.2f}")
+        if current["p99_us"] > row["p99_us"] * (1 + tolerance):
+            failures.append(f"{name}: p99 {current['p99_us']:.1f}µs > baseline {row['p99_us']:.1f}")
+        if "recall" in row and current.get("recall", 0) < row["recall"]:
+            failures.append(f"{name}: recall {current['recall']:.2%} < baseline {row['recall']:.2%}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000, help="document size in characters")
+    parser.add_argument("--density", type=float, default=8.0, help="PII entities per 1k characters")
+    parser.add_argument("--paragraphs", type=int, default=2_000, help="chat-sized texts for latency percentiles")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args.size, args.density, args.paragraphs, args.seed)
+    _print(results, args.size, args.density)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            failures = _compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: /api/bidding/parse — first upload vs re-upload of the same file.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_parse_store
+
+The tender of bench_tender_parse (~110k characters) is written into a .docx
+and uploaded through the real endpoint (TestClient) with the parse model
+replaced by bench_tender_parse.ExtractingLLM (about 1.2s per call). The
+parse store lives in a temporary directory.
+
+- cold: extraction (process pool) + NER + 16 window calls, then stored
+- repeat: the same bytes under another file name → stored result
+- other mode: stored text is reused (no extraction), head mode is parsed
+- refresh: ?refresh=true re-parses from the stored text
+
+Reported per upload: wall time, LLM calls and whether the result was stored.
+"""
+
+import io
+import os
+import tempfile
+import time
+import zipfile
+
+from benchmarks.bench_docx import _NS, _paragraph
+from benchmarks.bench_tender_parse import ExtractingLLM, build_tender
+
+
+def build_docx(text: str) -> bytes:
+    body = "".join(_paragraph(line) for line in text.splitlines())
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", "<Types/>")
+        zf.writestr("word/document.xml", f'<?xml version="1.0" encoding="UTF-8"?><w:document {_NS}><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix="parse_store_")
+    os.environ["PARSE_STORE_PATH"] = os.path.join(tmp, "parse_store.db")
+
+    from fastapi.testclient import TestClient
+
+    import app.api.bidding as bidding
+    from app.config import settings
+    from app.main import create_app
+
+    settings.PARSE_STORE_PATH = os.environ["PARSE_STORE_PATH"]
+    llm = ExtractingLLM()
+    bidding.get_llm = lambda: llm
+
+    text, _ = build_tender()
+    data = build_docx(text)
+    print(f"tender: {len(text)} chars, .docx {len(data) / 1e3:.0f}KB")
+    print(f"{'upload':<10} | {'wall ms':>8} | {'calls':>5} | {'stored':>6} | items")
+    print("-" * 50)
+    uploads = (
+        ("cold", "tender.docx", ""),
+        ("repeat", "tender (1).docx", ""),
+        ("repeat", "tender.docx", ""),
+        ("head mode", "tender.docx", "?mode=head"),
+        ("refresh", "tender.docx", "?refresh=true"),
+    )
+    with TestClient(create_app()) as client:
+        for label, name, query in uploads:
+            calls = llm.calls
+            t0 = time.perf_counter()
+            response = client.post(f"/api/bidding/parse{query}", files={"file": (name, data)}).json()
+            elapsed = time.perf_counter() - t0
+            parsed = response["data"]["parsed"]
+            items = sum(len(parsed[f]) for f in ("requirements", "key_terms", "disqualification_risks"))
+            print(f"{label:<10} | {elapsed * 1000:>8.1f} | {llm.calls - calls:>5} | {str(response['data']['cached']):>6} | {items}")
+
+
+if __name__ == "__main__":
+    main()
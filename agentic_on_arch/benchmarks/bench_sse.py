@@ -0,0 +1,100 @@
+"""Benchmark: per-chunk SSE frames vs the shared coalescing encoder (app.utils.sse).
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_sse
+
+A fake provider emits a long bidding document as 2-character chunks, either
+as fast as possible or paced like a real model (tokens/s). Each frame is
+written to a real socket (a socketpair drained by a reader thread), so the
+per-frame syscall is part of the cost. Reported per strategy: frames sent,
+frames/s, CPU microseconds per generated token (process time, both ends of
+the socket included) and the worst added delay between a chunk being
+produced and written.
+
+"legacy" is the previous event_generator: json.dumps + f-string per chunk.
+"source" only consumes the chunks (no frames, no writes) — the fake
+provider's own cost, to subtract from the other two.
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from typing import List
+
+from benchmarks.corpus import generate_corpus
+from app.utils.sse import sse_stream
+
+CHUNK_CHARS = 2
+
+
+def _drain(sock: socket.socket):
+    while sock.recv(1 << 16):
+        pass
+
+
+async def _source(text: str, tokens_per_second: float, produced: List[float]):
+    interval = CHUNK_CHARS / tokens_per_second if tokens_per_second else 0
+    for i in range(0, len(text), CHUNK_CHARS):
+        if interval:
+            await asyncio.sleep(interval)
+        produced.append(time.perf_counter())
+        yield text[i:i + CHUNK_CHARS]
+
+
+async def _legacy(chunks):
+    async for chunk in chunks:
+        yield f"data: {json.dumps({'content': chunk, 'done': False}, ensure_ascii=False)}\n\n".encode()
+    yield f"data: {json.dumps({'content': '', 'done': True}, ensure_ascii=False)}\n\n".encode()
+
+
+async def _run(strategy: str, text: str, tokens_per_second: float):
+    writer, reader = socket.socketpair()
+    drainer = threading.Thread(target=_drain, args=(reader,), daemon=True)
+    drainer.start()
+    produced: List[float] = []
+    chunks = _source(text, tokens_per_second, produced)
+    if strategy == "coalesced":
+        frames = sse_stream(chunks)
+    elif strategy == "legacy":
+        frames = _legacy(chunks)
+    else:  # source only: the fake provider's own cost, to subtract
+        frames = chunks
+
+    count = 0
+    max_delay = 0.0
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    async for frame in frames:
+        if strategy == "source":
+            continue
+        writer.sendall(frame)
+        count += 1
+        if produced:
+            max_delay = max(max_delay, time.perf_counter() - produced[-1])
+    cpu, elapsed = time.process_time() - cpu0, time.perf_counter() - t0
+    writer.close()
+    drainer.join()
+    reader.close()
+    return count, elapsed, cpu, max_delay
+
+
+def main():
+    # unpaced: a long bidding document; paced: a shorter one (real time)
+    documents = {0: generate_corpus(60_000, seed=7)[0], 2000: generate_corpus(12_000, seed=7)[0]}
+    print(f"{CHUNK_CHARS}-char chunks; unpaced {len(documents[0])} chars, paced {len(documents[2000])} chars")
+    print(f"{'pace':<12} | {'strategy':<9} | {'frames':>6} | {'frames/s':>9} | {'CPU us/token':>12} | {'max delay ms':>12}")
+    print("-" * 76)
+    for pace, text in documents.items():
+        tokens = len(text)
+        for strategy in ("source", "legacy", "coalesced"):
+            count, elapsed, cpu, max_delay = asyncio.run(_run(strategy, text, pace))
+            label = "unpaced" if not pace else f"{pace} tok/s"
+            print(
+                f"{label:<12} | {strategy:<9} | {count:>6} | {count / elapsed:>9.0f}"
+                f" | {cpu / tokens * 1e6:>12.2f} | {max_delay * 1000:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
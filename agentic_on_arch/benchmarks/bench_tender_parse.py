@@ -0,0 +1,108 @@
+"""Benchmark: tender parsing — first 8000 chars (one call) vs map-reduce over the whole text.
+
+Run from agentic_on_arch/:
+    python -m benchmarks.bench_tender_parse
+
+A synthetic tender of ~110k characters: 12 chapters of filler text with
+qualification requirements, commercial terms and 否决条件 spread through the
+document (several repeated in other chapters, as real tenders do).
+ExtractingLLM answers like a parse model: it returns the schema JSON with
+the marked items found in its prompt, and takes 0.3s + 1ms per 100 input
+characters (prefill) + a fixed 0.8s of output (the JSON), scaled 1:1.
+
+Reported per mode: wall time, LLM calls, coverage and the share of the
+ground-truth items found.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from typing import AsyncGenerator, Dict, List
+
+from app.api.bidding import PARSE_SYSTEM_PROMPT
+from app.config import settings
+from app.core.llm.base import BaseLLM
+from app.services.tender_parser import parse_document
+from benchmarks.corpus import generate_corpus
+
+_FIELDS = {"资格要求": "requirements", "商务条款": "key_terms", "否决条件": "disqualification_risks"}
+_ITEM = re.compile(r"(资格要求|商务条款|否决条件)：([^\n。]+)")
+
+
+class ExtractingLLM(BaseLLM):
+    def __init__(self):
+        self.calls = 0
+
+    async def generate(self, prompt: str, system: str = "", **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.3 + len(prompt) / 100 * 0.001 + 0.8)
+        found: Dict[str, List[str]] = {v: [] for v in _FIELDS.values()}
+        for label, item in _ITEM.findall(prompt):
+            found[_FIELDS[label]].append(item)
+        budget = re.search(r"最高限价[为：]?([\d,]+元)", prompt)
+        return json.dumps({
+            "project_name": "法律顾问服务采购项目" if "项目名称" in prompt else "未明确",
+            "budget": budget.group(1) if budget else "未明确",
+            **found,
+        }, ensure_ascii=False)
+
+    async def stream(self, prompt: str, system: str = "", **kwargs) -> AsyncGenerator[str, None]:
+        yield await self.generate(prompt, system)
+
+    def get_model_name(self) -> str:
+        return "extracting"
+
+
+def build_tender(seed: int = 0):
+    rng = random.Random(seed)
+    filler, _ = generate_corpus(130_000, seed=seed)
+    lines = [filler[i:i + 150] for i in range(0, len(filler), 150)]
+    truth = {v: set() for v in _FIELDS.values()}
+    out = ["招标公告", "项目名称：法律顾问服务采购项目"]
+    for chapter in range(1, 13):
+        out.append(f"第{chapter}章 {'投标人须知' if chapter % 2 else '合同条款'}")
+        for n in range(60):
+            out.append(lines[(chapter * 60 + n) % len(lines)])
+            if n % 15 == 7:
+                label = rng.choice(list(_FIELDS))
+                item = f"第{chapter}章第{n}条约定的{label}事项"
+                truth[_FIELDS[label]].add(item)
+                out.append(f"{label}：{item}。")
+                if rng.random() < 0.3:  # restated in a later chapter
+                    out.insert(len(out) - rng.randint(5, 40), f"{label}：{item}。")
+    out.append("第13章 其他\n注：最高限价为980,000元，报价超过最高限价的投标将被否决。")
+    return "\n".join(out), truth
+
+
+async def _run(mode: str, text: str):
+    llm = ExtractingLLM()
+    t0 = time.perf_counter()
+    if mode == "full":
+        parsed, stats = await parse_document(llm, text, PARSE_SYSTEM_PROMPT)
+    else:
+        parsed, stats = await parse_document(llm, text[:8000], PARSE_SYSTEM_PROMPT)
+        stats["coverage"] = round(8000 / len(text), 4)
+    return time.perf_counter() - t0, llm.calls, stats, parsed
+
+
+def main():
+    settings.BIDDING_PARSE_MAX_ITEMS = 100  # count recall, not the UI cap
+    text, truth = build_tender()
+    total = sum(len(v) for v in truth.values())
+    print(f"tender: {len(text)} chars, {total} ground-truth items")
+    print(f"{'mode':<5} | {'wall s':>6} | {'calls':>5} | {'coverage':>8} | {'items found':>11} | {'duplicates':>10} | budget")
+    print("-" * 72)
+    for mode in ("head", "full"):
+        elapsed, calls, stats, parsed = asyncio.run(_run(mode, text))
+        items = [i for field in truth for i in parsed[field]]
+        found = sum(1 for field in truth for i in parsed[field] if i in truth[field])
+        print(
+            f"{mode:<5} | {elapsed:>6.2f} | {calls:>5} | {stats['coverage']:>8.0%} | {found:>4}/{total:<6}"
+            f" | {len(items) - len(set(items)):>10} | {parsed.get('budget')}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""End-to-end SSE load test against the running app.
+
+Run from agentic_on_arch/:
+    # start a local server on the offline fake provider and load it
+    python -m benchmarks.loadtest_sse --serve --clients 100 --requests 500
+
+    # or drive an already running app
+    python -m benchmarks.loadtest_sse --url http://127.0.0.1:8000 --endpoint bidding
+
+Each client posts to /api/chat/completions (or /api/bidding/generate) and
+reads the SSE stream. Reported: request throughput, content frames/s, time
+to first content frame (TTFT) and the gap between consecutive content frames
+(p50 / p99 / max). With --serve the fake provider's own TTFT and chunk
+interval are known, so the difference is the streaming stack's overhead
+(NER, governor, cache/coalescing layers, SSE framing, uvicorn).
+
+Prompts are unique per request by default, so the response cache and
+single-flight coalescing do not short-circuit the provider; --same sends
+identical prompts to measure them instead.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+import httpx
+
+ENDPOINTS = {
+    "chat": "/api/chat/completions",
+    "bidding": "/api/bidding/generate",
+}
+
+
+def _body(endpoint: str, i: int, same: bool) -> dict:
+    tag = "" if same else f"（编号 {i}）"
+    if endpoint == "chat":
+        return {"message": f"张三与北京某科技有限公司的买卖合同纠纷，对方逾期付款怎么办？{tag}", "stream": True}
+    return {
+        "company_name": "北京某律师事务所",
+        "legal_representative": "李四",
+        "project_name": f"法律顾问服务采购项目{tag}",
+        "client_name": "某市人民政府",
+        "stream": True,
+    }
+
+
+class _Result:
+    __slots__ = ("ttft", "gaps", "frames", "error")
+
+    def __init__(self):
+        self.ttft: Optional[float] = None
+        self.gaps: List[float] = []
+        self.frames = 0
+        self.error: Optional[str] = None
+
+
+async def _one(client: httpx.AsyncClient, path: str, body: dict) -> _Result:
+    result = _Result()
+    t0 = time.perf_counter()
+    last = None
+    try:
+        async with client.stream("POST", path, json=body) as response:
+            if response.status_code != 200:
+                result.error = f"HTTP {response.status_code}"
+                return result
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                frame = json.loads(line[5:])
+                content = frame.get("content", "")
+                if frame.get("done"):
+                    if content.startswith("["):  # [错误] / [生成错误] frames
+                        result.error = content[:80]
+                    break
+                if not content:
+                    continue
+                now = time.perf_counter()
+                if last is None:
+                    result.ttft = now - t0
+                else:
+                    result.gaps.append(now - last)
+                last = now
+                result.frames += 1
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _pct(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+async def _drive(base_url: str, endpoint: str, clients: int, requests: int, same: bool):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    sem = asyncio.Semaphore(clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=300) as client:
+        async def bounded(i: int):
+            async with sem:
+                return await _one(client, ENDPOINTS[endpoint], _body(endpoint, i, same))
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(bounded(i) for i in range(requests)))
+        return results, time.perf_counter() - t0
+
+
+def _serve(port: int, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DEBUG="false",
+        DEFAULT_LLM="fake",
+        FAKE_LLM_TTFT_MS=str(args.ttft_ms),
+        FAKE_LLM_TOKENS_PER_SECOND=str(args.tps),
+        FAKE_LLM_CHUNK_TOKENS=str(args.chunk_tokens),
+        FAKE_LLM_OUTPUT_TOKENS=str(args.output_tokens),
+        FAKE_LLM_ERROR_RATE=str(args.error_rate),
+        LLM_DEFAULT_CONCURRENCY=str(max(args.clients, 16)),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not become healthy within 30s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="base URL of a running app")
+    parser.add_argument("--serve", action="store_true", help="start uvicorn with DEFAULT_LLM=fake")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent SSE clients")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--same", action="store_true", help="identical prompts (exercise cache / coalescing)")
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--tps", type=float, default=40.0, help="fake provider tokens per second")
+    parser.add_argument("--chunk-tokens", type=int, default=2)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if not args.url and not args.serve:
+        parser.error("pass --url of a running app or --serve")
+    proc = _serve(args.port, args) if args.serve else None
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        results, elapsed = asyncio.run(_drive(base_url, args.endpoint, args.clients, args.requests, args.same))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    ok = [r for r in results if r.error is None and r.ttft is not None]
+    errors = [r.error for r in results if r.error is not None]
+    ttfts = [r.ttft for r in ok]
+    gaps = [g for r in ok for g in r.gaps]
+    frames = sum(r.frames for r in results)
+
+    print(f"{args.endpoint}: {args.requests} requests, {args.clients} concurrent clients, {elapsed:.2f}s")
+    print(f"  throughput : {len(ok) / elapsed:8.1f} req/s   {frames / elapsed:10.1f} frames/s")
+    print(f"  TTFT       : p50 {_pct(ttfts, 0.5):7.1f}ms  p95 {_pct(ttfts, 0.95):7.1f}ms  p99 {_pct(ttfts, 0.99):7.1f}ms")
+    print(f"  chunk gap  : p50 {_pct(gaps, 0.5):7.1f}ms  p99 {_pct(gaps, 0.99):7.1f}ms  max {_pct(gaps, 1.0):7.1f}ms")
+    print(f"  errors     : {len(errors)}" + (f" (e.g. {errors[0]})" if errors else ""))
+    if args.serve and ttfts:
+        interval = args.chunk_tokens / args.tps * 1000
+        print(
+            f"  overhead   : TTFT +{statistics.median(ttfts) * 1000 - args.ttft_ms:.1f}ms over the provider's"
+            f" {args.ttft_ms:.0f}ms; gap p99 +{_pct(gaps, 0.99) - interval:.1f}ms over its {interval:.0f}ms interval"
+        )
+
+
+if __name__ == "__main__":
+    main()
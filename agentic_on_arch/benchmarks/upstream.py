@@ -0,0 +1,99 @@
+"""Local fake chat-completions upstream (OpenAI / GLM v4 compatible SSE) for offline benchmarks.
+
+Runs on its own thread and event loop, so a client that blocks the caller's
+loop cannot also stall the server.
+
+    with FakeUpstream(chunks=50, interval_ms=20) as upstream:
+        settings.GLM_BASE_URL = upstream.base_url
+"""
+
+import asyncio
+import json
+import threading
+from typing import Optional
+
+
+class FakeUpstream:
+    """Serves POST /chat/completions; streams `chunks` deltas `interval_ms` apart when stream=true."""
+
+    def __init__(self, chunks: int = 50, interval_ms: float = 20.0, text: str = "依据合同法"):
+        self.chunks = chunks
+        self.interval = interval_ms / 1000
+        self.text = text
+        self.port: Optional[int] = None
+        self.requests = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "FakeUpstream":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    async def _shutdown(self):
+        # Drop idle keep-alive handlers so the loop stops without pending tasks
+        self._server.close()
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                body = json.loads(await reader.readexactly(length)) if length else {}
+                if head.startswith(b"HEAD "):  # connection warm-up
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n")
+                    await writer.drain()
+                    continue
+                self.requests += 1
+                if body.get("stream"):
+                    await self._stream(writer)
+                    return  # close-delimited body
+                content = self.text * self.chunks
+                payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode()
+                await asyncio.sleep(self.interval * self.chunks)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nConnection: close\r\n\r\n")
+        for _ in range(self.chunks):
+            await asyncio.sleep(self.interval)
+            delta = json.dumps({"choices": [{"delta": {"content": self.text}}]}, ensure_ascii=False)
+            writer.write(f"data: {delta}\n\n".encode())
+            await writer.drain()
+        writer.write(b"data: [DONE]\n\n")
+        await writer.drain()
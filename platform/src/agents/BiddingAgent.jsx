@@ -65,7 +65,7 @@ export default function BiddingAgent() {
         project_id: '', registered_capital: '', established_date: '', address: '',
         contact_person: '', contact_phone: '', contact_email: '', bid_amount: '',
         guarantee_amount: '', delegate_name: '', validity_days: '120',
-        parsed_requirements: '', parsed_risks: '', budget: '',
+        parsed_requirements: '', parsed_risks: '', budget: '', document_id: '',
     });
     const [output, setOutput] = useState('');
     const [generating, setGenerating] = useState(false);
@@ -138,6 +138,8 @@ export default function BiddingAgent() {
                     budget: p.budget || prev.budget,
                     parsed_requirements: Array.isArray(p.requirements) ? p.requirements.join('\n') : (p.requirements || ''),
                     parsed_risks: Array.isArray(p.disqualification_risks) ? p.disqualification_risks.join('\n') : (p.disqualification_risks || ''),
+                    // 生成时后端按 document_id 复用已存储的解析结果
+                    document_id: result.data.document_id || '',
                 }));
                 setStep(3);
             } else {
@@ -167,29 +169,55 @@ export default function BiddingAgent() {
         try {
             const controller = new AbortController();
             abortRef.current = controller;
-            const res = await fetch(`${API_BASE}/api/bidding/generate`, {
+            let res = await fetch(`${API_BASE}/api/bidding/generate`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ ...form, stream: true }),
                 signal: controller.signal,
             });
             if (!res.ok) throw new Error(`HTTP ${res.status}`);
-            const reader = res.body.getReader();
-            const decoder = new TextDecoder();
+            // 断线续传：后端生成不中断，凭 X-Stream-ID + Last-Event-ID 从断点继续
+            const streamId = res.headers.get('X-Stream-ID');
             let full = '';
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-                const text = decoder.decode(value, { stream: true });
-                for (const line of text.split('\n')) {
-                    if (!line.startsWith('data: ')) continue;
-                    try {
-                        const data = JSON.parse(line.slice(6));
-                        if (data.done) break;
-                        full += data.content;
-                        setOutput(full);
-                    } catch (e) { /* partial */ }
+            let lastId = null;
+            let finished = false;
+            for (let attempt = 0; ; attempt++) {
+                try {
+                    const reader = res.body.getReader();
+                    const decoder = new TextDecoder();
+                    let pending = '';
+                    while (!finished) {
+                        const { done, value } = await reader.read();
+                        if (done) break;
+                        // 帧可能跨多次 read 到达：保留最后一行未完成的部分
+                        const lines = (pending + decoder.decode(value, { stream: true })).split('\n');
+                        pending = lines.pop();
+                        for (const line of lines) {
+                            if (line.startsWith('id: ')) { lastId = line.slice(4); continue; }
+                            if (!line.startsWith('data: ')) continue;
+                            try {
+                                const data = JSON.parse(line.slice(6));
+                                if (data.done) {
+                                    finished = true;
+                                    if (data.content) full += `\n\n${data.content}`;
+                                    break;
+                                }
+                                full += data.content;
+                                setOutput(full);
+                            } catch (e) { /* partial */ }
+                        }
+                    }
+                    if (finished || !streamId) break;
+                } catch (err) {
+                    if (err.name === 'AbortError' || !streamId || attempt >= 3) throw err;
                 }
+                if (attempt >= 3) break;
+                await new Promise(r => setTimeout(r, 1000 * (attempt + 1)));
+                res = await fetch(`${API_BASE}/api/bidding/generate/${streamId}`, {
+                    headers: lastId === null ? {} : { 'Last-Event-ID': lastId },
+                    signal: controller.signal,
+                });
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
             }
             setOutput(full || '[无响应]');
             setStep(5);
@@ -211,7 +239,7 @@ export default function BiddingAgent() {
             project_id: '', registered_capital: '', established_date: '', address: '',
             contact_person: '', contact_phone: '', contact_email: '', bid_amount: '',
             guarantee_amount: '', delegate_name: '', validity_days: '120',
-            parsed_requirements: '', parsed_risks: '', budget: ''
+            parsed_requirements: '', parsed_risks: '', budget: '', document_id: ''
         });
         if (abortRef.current) abortRef.current.abort();
         clearInterval(timerRef.current);
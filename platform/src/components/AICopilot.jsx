@@ -13,6 +13,8 @@ export default function AICopilot() {
     const [isTyping, setIsTyping] = useState(false);
     const scrollRef = useRef(null);
     const abortRef = useRef(null);
+    // 后端在首轮结束帧中返回 conversation_id，后续轮次带上以续写同一会话
+    const conversationRef = useRef(null);
 
     const send = async (e) => {
         e.preventDefault();
@@ -32,10 +34,15 @@ export default function AICopilot() {
             const controller = new AbortController();
             abortRef.current = controller;
 
+            // 登录后的 JWT（/api/auth/login 返回的 access_token）：后端仅对已认证用户跨轮次保持脱敏占位符一致
+            const token = localStorage.getItem('access_token');
             const response = await fetch(`${API_BASE}/api/chat/completions`, {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: userMsg, stream: true }),
+                headers: {
+                    'Content-Type': 'application/json',
+                    ...(token ? { Authorization: `Bearer ${token}` } : {}),
+                },
+                body: JSON.stringify({ message: userMsg, stream: true, conversation_id: conversationRef.current }),
                 signal: controller.signal,
             });
 
@@ -46,19 +53,24 @@ export default function AICopilot() {
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
             let fullContent = '';
+            let pending = '';
 
             while (true) {
                 const { done, value } = await reader.read();
                 if (done) break;
 
-                const text = decoder.decode(value, { stream: true });
-                const lines = text.split('\n');
+                // 帧可能跨多次 read 到达：保留最后一行未完成的部分
+                const lines = (pending + decoder.decode(value, { stream: true })).split('\n');
+                pending = lines.pop();
 
                 for (const line of lines) {
                     if (!line.startsWith('data: ')) continue;
                     try {
                         const data = JSON.parse(line.slice(6));
-                        if (data.done) break;
+                        if (data.done) {
+                            if (data.conversation_id) conversationRef.current = data.conversation_id;
+                            break;
+                        }
                         fullContent += data.content;
                         setMsgs([...newMsgs, { r: 'ai', t: fullContent, done: false }]);
                     } catch (e) {